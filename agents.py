@@ -0,0 +1,84 @@
+"""Agents qui jouent automatiquement une partie du moteur (engine.Game).
+
+Un agent est une classe construite avec une graine et qui expose
+act(game) : la direction à prendre pour le prochain tour ("UP", "DOWN",
+"LEFT", "RIGHT") ou None pour continuer tout droit.
+"""
+import importlib
+import random
+
+from autopilot import Autopilot
+from engine import DIRECTIONS, OPPOSITE, TELEPORT_PENALTY
+
+
+class RandomAgent:
+    """ Tourne au hasard de temps en temps. """
+
+    def __init__(self, seed=None, turn_chance=0.2):
+        self.rng = random.Random(seed)
+        self.turn_chance = turn_chance
+
+    def act(self, game):
+        if self.rng.random() < self.turn_chance:
+            return self.rng.choice(DIRECTIONS)
+        return None
+
+
+class GreedyAgent:
+    """ Se dirige vers la pomme la plus proche en évitant les cases mortelles. """
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+
+    def safe_moves(self, game):
+        """ Directions qui ne tuent pas le serpent au prochain tour. """
+        board, snake = game.board, game.snake
+        # En mode easy, se téléporter avec un score trop faible fait perdre
+        can_wrap = game.easy_mode and game.score > TELEPORT_PENALTY
+        tail = snake.cells[-1]
+        moves = []
+        for direction in DIRECTIONS:
+            if direction == OPPOSITE[snake.direction]:
+                continue
+            target = board.neighbor(snake.head, direction, wrap=can_wrap)
+            if target is None:
+                continue
+            cell = board.cells[target]
+            # La queue libère sa case pendant le déplacement (sauf si elle est empilée)
+            if cell == 0 or (target == tail and cell == 1):
+                moves.append((direction, target))
+        return moves
+
+    def act(self, game):
+        moves = self.safe_moves(game)
+        if not moves:
+            return None
+        board = game.board
+        targets = [apple.position for apple in (game.special_apple, game.apple)
+                   if apple is not None and apple.position is not None]
+        if not targets:
+            return self.rng.choice(moves)[0]
+        goals = [board.index(position) for position in targets]
+
+        def distance(cell):
+            x, y = cell % board.cols, cell // board.cols
+            return min(abs(x - goal % board.cols) + abs(y - goal // board.cols) for goal in goals)
+
+        return min(moves, key=lambda move: (distance(move[1]), move[0] != game.snake.direction))[0]
+
+
+BUILTIN_AGENTS = {
+    "random": RandomAgent,
+    "greedy": GreedyAgent,
+    "autopilot": Autopilot,
+}
+
+
+def load_agent(spec):
+    """ Classe d'agent à partir d'un nom intégré ("greedy") ou d'un chemin "module:Classe". """
+    if spec in BUILTIN_AGENTS:
+        return BUILTIN_AGENTS[spec]
+    module_name, _, class_name = spec.partition(":")
+    if not class_name:
+        raise ValueError(f"Agent inconnu : {spec!r} (attendu un nom intégré ou 'module:Classe')")
+    return getattr(importlib.import_module(module_name), class_name)
@@ -0,0 +1,384 @@
+"""Plusieurs serpents sur un même plateau.
+
+Arena joue tous les serpents d'un plateau partagé tour par tour. Les
+serpents sont ceux du moteur (engine.Snake) et partagent la grille
+d'occupation du plateau. Les collisions sont testées une fois tous les
+serpents déplacés, avec l'index des têtes du tour et la grille des
+propriétaires des cases (voir Arena.step) : une centaine de serpents
+coûtent autant qu'une centaine de têtes, quelle que soit la longueur des
+corps. Les bords du plateau sont des murs.
+
+ArenaBots fait jouer des serpents automatiques (mode Arène du jeu,
+serveur multijoueur) et les fait réapparaître après leur mort.
+
+Chaque tour est aussi résumé dans un ArenaDelta : serpents apparus,
+têtes déplacées et cases libérées par les queues, serpents disparus,
+scores, pommes et obstacles modifiés. C'est ce que le serveur multijoueur
+envoie aux clients, qui le rejouent avec apply() sur leur copie de l'arène.
+"""
+import random
+from array import array
+from collections import deque
+
+from engine import APPLE_POINTS, COLS, DIRECTIONS, OPPOSITE, ROWS, Board, Snake
+
+SNAKE_LENGTH = 3  # Longueur d'un serpent qui apparaît (segments empilés sur une case)
+SPAWN_ATTEMPTS = 50  # Cases tirées au hasard pour faire apparaître un serpent
+SPAWN_CLEARANCE = 3  # Cases libres demandées devant un serpent qui apparaît
+KILL_POINTS = 50  # Points d'un serpent dans lequel un autre s'est écrasé
+RESPAWN_TICKS = 20  # Tours avant la réapparition d'un serpent mort (joueurs en réseau, serpents automatiques)
+
+
+class ArenaDelta:
+    """ Changements de l'arène pendant un tour. """
+
+    def __init__(self, tick=0):
+        self.tick = tick
+        self.added = []  # (id, cases du corps tête en premier, direction)
+        self.moves = []  # (id, nouvelle tête, case quittée par la queue, segments ajoutés)
+        self.removed = []  # ids des serpents morts ou partis
+        self.scores = {}  # id -> nouveau score
+        self.apples_removed = []
+        self.apples_added = []
+        self.obstacles_removed = []
+        self.obstacles_added = []
+
+    def __bool__(self):
+        return bool(self.added or self.moves or self.removed or self.scores or self.apples_removed
+                    or self.apples_added or self.obstacles_removed or self.obstacles_added)
+
+
+def heading(board, snake):
+    """ Direction du dernier déplacement du serpent (déduite des deux premières cases). """
+    head, neck = snake.cells[0], snake.cells[1] if len(snake.cells) > 1 else snake.cells[0]
+    if head == neck:
+        return snake.direction  # Serpent qui vient d'apparaître
+    if head // board.cols == neck // board.cols:
+        return "RIGHT" if head > neck else "LEFT"
+    return "DOWN" if head > neck else "UP"
+
+
+class Arena:
+    """ Plateau partagé par plusieurs serpents, identifiés par un entier. """
+
+    def __init__(self, cols=COLS, rows=ROWS, seed=None, apples=1, obstacles=0):
+        self.seed = seed if seed is not None else random.getrandbits(63)
+        self.rng = random.Random(self.seed)
+        self.board = Board(cols, rows)
+        self.snakes = {}  # id -> engine.Snake
+        # Propriétaire de chaque case occupée : un seul serpent par case entre deux tours
+        self.owner = array("i", [-1]) * (cols * rows)
+        self.kills = []  # (victime, serpent qui l'a tuée ou None) au dernier tour
+        self.scores = {}  # id -> score
+        self.apples = set()  # Cases des pommes
+        self.obstacles = set()
+        self.ticks = 0
+        self.next_id = 0
+        self.delta = ArenaDelta()
+        # Cases modifiées, pour un affichage incrémental (voir engine.Game.changes)
+        self.changes = None
+        for _ in range(obstacles):
+            cell = self._random_free_cell()
+            if cell is not None:
+                self.add_obstacle(cell)
+        for _ in range(apples):
+            self._spawn_apple()
+
+    def _changed(self, cells):
+        if self.changes is not None:
+            self.changes.update(cells)
+
+    def _random_free_cell(self):
+        free = self.board.free
+        for _ in range(SPAWN_ATTEMPTS):
+            if not free:
+                return None
+            cell = free[self.rng.randrange(len(free))]
+            if cell not in self.apples:
+                return cell
+        return None
+
+    def _spawn_apple(self):
+        cell = self._random_free_cell()
+        if cell is not None:
+            self.apples.add(cell)
+            self.delta.apples_added.append(cell)
+            self._changed((cell,))
+
+    def add_obstacle(self, cell):
+        self.board.add_obstacle(cell)
+        self.obstacles.add(cell)
+        self.delta.obstacles_added.append(cell)
+        self._changed((cell,))
+
+    def remove_obstacle(self, cell):
+        self.board.remove_obstacle(cell)
+        self.obstacles.discard(cell)
+        self.delta.obstacles_removed.append(cell)
+        self._changed((cell,))
+
+    def _spawn_cells(self, length):
+        """ (cases, direction) d'un serpent qui apparaît, ou None si aucune place n'a été trouvée. """
+        board = self.board
+        for _ in range(SPAWN_ATTEMPTS):
+            cell = self._random_free_cell()
+            if cell is None:
+                return None
+            for direction in self.rng.sample(DIRECTIONS, len(DIRECTIONS)):
+                ahead = cell
+                for _ in range(SPAWN_CLEARANCE):
+                    ahead = board.neighbor(ahead, direction, wrap=False)
+                    if ahead is None or not board.is_free(ahead):
+                        break
+                else:
+                    return [cell] * length, direction
+        return None
+
+    def add_snake(self, snake_id=None, length=SNAKE_LENGTH):
+        """ Fait apparaître un serpent sur une case libre ; renvoie son id, ou None s'il n'y a pas de place.
+
+        Les segments sont empilés sur la case de départ et se déplient aux
+        tours suivants, comme après grow().
+        """
+        spawn = self._spawn_cells(length)
+        if spawn is None:
+            return None
+        if snake_id is None:
+            snake_id = self.next_id
+        self.next_id = max(self.next_id, snake_id + 1)
+        cells, direction = spawn
+        self.snakes[snake_id] = Snake(self.board, cells, direction)
+        self.owner[cells[0]] = snake_id
+        self.scores[snake_id] = 0
+        self.delta.added.append((snake_id, tuple(cells), direction))
+        self.delta.scores[snake_id] = 0
+        self._changed(cells)
+        return snake_id
+
+    def remove_snake(self, snake_id):
+        snake = self.snakes.pop(snake_id, None)
+        if snake is None:
+            return
+        for cell in snake.cells:
+            self.board.remove_snake(cell)
+        self._changed(snake.cells)
+        self.scores.pop(snake_id, None)
+        self.delta.scores.pop(snake_id, None)
+        self.delta.removed.append(snake_id)
+
+    def turn(self, snake_id, direction):
+        """ Virage demandé pour un serpent (ignoré s'il est mort ou si c'est un demi-tour). """
+        snake = self.snakes.get(snake_id)
+        return snake is not None and snake.queue_turn(direction)
+
+    def step(self):
+        """ Joue un tour pour tous les serpents ; renvoie les ids des serpents morts.
+
+        Les collisions sont résolues avec deux index : les têtes du tour
+        (case -> serpents) et la grille des propriétaires (case -> serpent
+        dont un segment occupe la case). Le coût d'un tour dépend du nombre
+        de serpents, pas de la longueur de leurs corps :
+        - une tête qui entre dans le corps d'un serpent (le sien compris)
+          meurt, et le propriétaire du corps marque KILL_POINTS ;
+        - quand plusieurs têtes entrent dans la même case, la plus longue
+          survit et marque les points ; à égalité, toutes meurent.
+        """
+        self.ticks += 1
+        self.delta.tick = self.ticks
+        board, owner = self.board, self.owner
+        dead = []
+        heads = {}  # Case -> serpents dont la tête vient d'y entrer
+        for snake_id, snake in self.snakes.items():
+            state, _ = snake.move(False, 0)
+            if state == "game_over":
+                dead.append(snake_id)  # Sorti du plateau : le serpent n'a pas bougé
+            else:
+                heads.setdefault(snake.cells[0], []).append(snake_id)
+
+        # Les collisions sont testées une fois tous les serpents déplacés
+        self.kills = []
+        survivors = []
+        for head, snake_ids in heads.items():
+            cell = board.cells[head]
+            bodies = (cell & Board.SNAKE_MASK) - len(snake_ids)  # Segments déjà là avant ce tour
+            if cell & Board.OBSTACLE:
+                dead.extend(snake_ids)
+            elif bodies > 0:
+                dead.extend(snake_ids)
+                self.kills.extend((snake_id, owner[head]) for snake_id in snake_ids)
+            elif len(snake_ids) > 1:
+                lengths = sorted((len(self.snakes[snake_id].cells), snake_id) for snake_id in snake_ids)
+                winner = lengths[-1][1] if lengths[-1][0] > lengths[-2][0] else None
+                for _, snake_id in lengths:
+                    if snake_id != winner:
+                        dead.append(snake_id)
+                        self.kills.append((snake_id, winner))
+                if winner is not None:
+                    survivors.append(winner)
+            else:
+                survivors.append(snake_ids[0])
+
+        for victim, killer in self.kills:
+            if killer is not None and killer != victim and killer in self.scores and killer not in dead:
+                self._score(killer, KILL_POINTS)
+        eaten = 0
+        for snake_id in survivors:
+            snake = self.snakes[snake_id]
+            head = snake.cells[0]
+            owner[head] = snake_id
+            grow = 0
+            if head in self.apples:
+                self.apples.discard(head)
+                self.delta.apples_removed.append(head)
+                snake.grow()
+                grow = 1
+                eaten += 1
+                self._score(snake_id, APPLE_POINTS)
+            self.delta.moves.append((snake_id, head, snake.vacated, grow))
+            self._changed((head, snake.vacated))
+
+        for snake_id in dead:
+            snake = self.snakes[snake_id]
+            if snake.vacated is not None:
+                self._changed((snake.vacated,))
+            self.remove_snake(snake_id)
+        for _ in range(eaten):
+            self._spawn_apple()
+        return dead
+
+    def _score(self, snake_id, points):
+        self.scores[snake_id] += points
+        self.delta.scores[snake_id] = self.scores[snake_id]
+
+    def take_delta(self):
+        """ Changements depuis le dernier appel (à envoyer aux clients). """
+        delta, self.delta = self.delta, ArenaDelta(self.ticks)
+        return delta
+
+    def full_state(self):
+        """ Toute l'arène sous forme de changements depuis un plateau vide. """
+        delta = ArenaDelta(self.ticks)
+        delta.added = [(snake_id, tuple(snake.cells), snake.direction) for snake_id, snake in self.snakes.items()]
+        delta.scores = dict(self.scores)
+        delta.apples_added = list(self.apples)
+        delta.obstacles_added = list(self.obstacles)
+        return delta
+
+    def apply(self, delta):
+        """ Rejoue les changements d'un tour reçus du serveur (copie de l'arène côté client). """
+        board = self.board
+        for snake_id, cells, direction in delta.added:
+            self.remove_snake(snake_id)
+            self.snakes[snake_id] = Snake(board, cells, direction)
+            for cell in cells:
+                self.owner[cell] = snake_id
+            self.scores[snake_id] = 0
+            self._changed(cells)
+        for snake_id, head, tail, grow in delta.moves:
+            snake = self.snakes[snake_id]
+            snake.cells.appendleft(head)
+            board.add_snake(head)
+            self.owner[head] = snake_id
+            vacated = snake.cells.pop()
+            board.remove_snake(vacated)
+            if vacated != tail:
+                raise ValueError(f"arène désynchronisée : serpent {snake_id}, queue {vacated} au lieu de {tail}")
+            for _ in range(grow):
+                snake.grow()
+            snake.vacated = tail
+            snake.direction = heading(board, snake)
+            self._changed((head, tail))
+        for snake_id in delta.removed:
+            self.remove_snake(snake_id)
+        self.scores.update(delta.scores)
+        for cell in delta.apples_removed:
+            self.apples.discard(cell)
+        self.apples.update(delta.apples_added)
+        for cell in delta.obstacles_removed:
+            self.remove_obstacle(cell)
+        for cell in delta.obstacles_added:
+            self.add_obstacle(cell)
+        self._changed(delta.apples_removed)
+        self._changed(delta.apples_added)
+        self.ticks = delta.tick
+        self.delta = ArenaDelta(self.ticks)  # Les changements rejoués ne sont pas à renvoyer
+
+
+class ArenaAgent:
+    """ Serpent automatique de l'arène : va vers une pomme en évitant les cases occupées.
+
+    La pomme visée est gardée tant qu'elle existe : la plus proche n'est
+    recherchée que lorsqu'elle a été mangée.
+    """
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.target = None
+
+    def act(self, arena, snake_id):
+        snake = arena.snakes.get(snake_id)
+        if snake is None:
+            self.target = None
+            return None
+        board = arena.board
+        cols = board.cols
+        head, tail = snake.cells[0], snake.cells[-1]
+        if self.target not in arena.apples:
+            x, y = head % cols, head // cols
+            self.target = min(arena.apples, key=lambda cell: abs(cell % cols - x) + abs(cell // cols - y),
+                              default=None)
+        direction = heading(board, snake)
+        moves = []
+        for candidate in DIRECTIONS:
+            if candidate == OPPOSITE[direction]:
+                continue
+            cell = board.neighbor(head, candidate, wrap=False)
+            if cell is None:
+                continue
+            content = board.cells[cell]
+            if content == 0 or (cell == tail and content == 1):
+                moves.append((candidate, cell))
+        if not moves:
+            return None
+        if self.target is None:
+            return self.rng.choice(moves)[0]
+        target_x, target_y = self.target % cols, self.target // cols
+        return min(moves, key=lambda move: (abs(move[1] % cols - target_x) + abs(move[1] // cols - target_y),
+                                            move[0] != direction, self.rng.random()))[0]
+
+
+class ArenaBots:
+    """ Serpents automatiques d'une arène ; un serpent mort réapparaît après respawn_ticks tours. """
+
+    def __init__(self, arena, count, seed=None, respawn_ticks=RESPAWN_TICKS):
+        self.arena = arena
+        self.respawn_ticks = respawn_ticks
+        rng = random.Random(seed)
+        first = arena.next_id
+        # Chaque serpent automatique garde son id d'une vie à l'autre
+        self.agents = {snake_id: ArenaAgent(rng.getrandbits(32)) for snake_id in range(first, first + count)}
+        arena.next_id = first + count
+        self.respawns = deque()  # (tour de réapparition, id)
+        for snake_id in self.agents:
+            if arena.add_snake(snake_id) is None:
+                self.respawns.append((arena.ticks, snake_id))
+
+    def act(self):
+        """ Choisit les virages de tous les serpents automatiques (avant Arena.step). """
+        arena = self.arena
+        for snake_id, agent in self.agents.items():
+            if snake_id in arena.snakes:
+                direction = agent.act(arena, snake_id)
+                if direction is not None:
+                    arena.turn(snake_id, direction)
+
+    def update(self, dead):
+        """ Après Arena.step : programme la réapparition des morts et fait réapparaître ceux dont c'est le tour. """
+        arena = self.arena
+        for snake_id in dead:
+            if snake_id in self.agents:
+                self.respawns.append((arena.ticks + self.respawn_ticks, snake_id))
+        while self.respawns and self.respawns[0][0] <= arena.ticks:
+            _, snake_id = self.respawns.popleft()
+            if arena.add_snake(snake_id) is None:
+                self.respawns.append((arena.ticks + self.respawn_ticks, snake_id))  # Pas de place
@@ -0,0 +1,217 @@
+"""Affichage de tout le plateau visible en une passe, depuis un tableau NumPy des cases.
+
+La grille d'occupation du plateau (Board.cells) est lue directement par
+NumPy, sans copie : chaque octet donne le type de la case (libre, serpent,
+obstacle) et une palette de 256 couleurs le transforme en pixel. Les
+cases visibles deviennent ainsi une petite image d'un pixel par case,
+envoyée dans une surface avec pygame.surfarray.blit_array puis agrandie à
+la taille de l'écran par un seul pygame.transform.scale (au plus proche
+voisin : les cases restent des carrés nets).
+
+Seuls les pommes (petits sprites), la tête et la queue en mouvement, la
+bordure et le HUD sont dessinés par-dessus. Le coût d'une image ne
+dépend ni de la longueur du serpent ni du nombre d'obstacles, et le
+résultat est identique, au pixel près, à celui de GameRenderer.
+
+    python jeu_snake.py --renderer array
+    python array_renderer.py          # comparaison au pixel près avec GameRenderer
+"""
+import numpy as np
+import pygame
+
+from engine import Game
+from renderer import BACKGROUND, BORDER_COLOR, OBSTACLE_COLOR, SNAKE_COLOR, GameRenderer, Pellet, draw_apple
+
+
+def palette(board):
+    """ Couleur (R, G, B) de chaque valeur possible d'une case de board.cells. """
+    colors = np.empty((256, 3), dtype=np.uint8)
+    for value in range(256):
+        if value & board.SNAKE_MASK:
+            colors[value] = SNAKE_COLOR  # Le serpent est dessiné par-dessus les obstacles
+        elif value & board.OBSTACLE:
+            colors[value] = OBSTACLE_COLOR
+        else:
+            colors[value] = BACKGROUND
+    return colors
+
+
+class ArrayRenderer(GameRenderer):
+    """ Même affichage que GameRenderer, redessiné en entier à chaque image à partir de la grille du plateau.
+
+    Pas de suivi des cases modifiées : game.changes reste à None et le
+    moteur ne note plus rien.
+    """
+
+    def __init__(self, surface, game):
+        super().__init__(surface, game)
+        game.changes = None
+        board = self.board
+        self.cells = np.frombuffer(board.cells, dtype=np.uint8).reshape(board.rows, board.cols)
+        self.palette = palette(board)
+        # Une colonne de pixels par colonne de cases : surfarray indexe en [x, y]
+        self.pixels = np.empty((self.visible_cols, self.visible_rows, 3), dtype=np.uint8)
+        self.small = pygame.Surface((self.visible_cols, self.visible_rows))
+        self.scaled = pygame.Surface((self.visible_cols * self.grid_size, self.visible_rows * self.grid_size))
+        self.sprites = {}
+
+    def invalidate(self):
+        pass  # Tout est redessiné à chaque image
+
+    def _sprite(self, special):
+        """ Pomme dessinée une fois pour toutes dans une surface transparente de la taille d'une case (+1 pixel). """
+        sprite = self.sprites.get(special)
+        if sprite is None:
+            grid_size = self.grid_size
+            sprite = pygame.Surface((grid_size + 1, grid_size + 1), pygame.SRCALPHA)
+            draw_apple(sprite, Pellet((0, 0), special), grid_size)
+            self.sprites[special] = sprite
+        return sprite
+
+    def _draw_overlays(self, rect):
+        surface = self.surface
+        offset_x, offset_y = self.offset
+        for apple in self._apples():
+            surface.blit(self._sprite(apple.special), (apple.position[0] - offset_x, apple.position[1] - offset_y))
+        border = self._border()
+        if not border.inflate(-4, -4).contains(rect):
+            pygame.draw.rect(surface, BORDER_COLOR, border, 2)
+        for item in self.items.values():
+            item.draw(surface)
+
+    def render(self, alpha=None):
+        """ Dessine l'image complète et l'envoie à l'écran ; renvoie le rectangle de l'écran. """
+        self._follow()
+        camera_x, camera_y = self.camera
+        window = self.cells[camera_y:camera_y + self.visible_rows, camera_x:camera_x + self.visible_cols]
+        if window.shape == self.pixels.shape[1::-1]:
+            np.take(self.palette, window.T, axis=0, out=self.pixels)
+        else:  # La dernière case, à moitié visible, est hors du plateau
+            self.pixels[:] = BACKGROUND
+            self.pixels[:window.shape[1], :window.shape[0]] = self.palette[window.T]
+        motion = self._motion(alpha) if alpha is not None else []
+        for index, _ in motion:
+            # La case est remplie à moitié plus bas : on part de son fond (obstacle ou vide)
+            x = index % self.board.cols - camera_x
+            y = index // self.board.cols - camera_y
+            if 0 <= x < self.visible_cols and 0 <= y < self.visible_rows:
+                self.pixels[x, y] = self.palette[self.board.cells[index] & self.board.OBSTACLE]
+
+        surface = self.surface
+        pygame.surfarray.blit_array(self.small, self.pixels)
+        pygame.transform.scale(self.small, self.scaled.get_size(), self.scaled)
+        surface.blit(self.scaled, (0, 0))
+        for index, fill in motion:
+            if self.is_visible(index):
+                pygame.draw.rect(surface, SNAKE_COLOR, fill)
+        self._draw_overlays(surface.get_rect())
+        self.dirty = []
+        self.full_redraw = False
+        self._mark("draw")
+        pygame.display.flip()
+        self._mark("flip")
+        return [surface.get_rect()]
+
+
+
+# (colonnes, lignes) des plateaux comparés : plateau de la taille de la vue,
+# plateau qui déborde de la vue sans en être un multiple, grand plateau
+CHECK_BOARDS = ((40, 30), (57, 33), (100, 80))
+
+
+def _edge_cells(renderer):
+    """ Cases de l'anneau intérieur de la vue et de l'anneau juste à l'extérieur (dans le plateau). """
+    board = renderer.board
+    camera_x, camera_y = renderer.camera
+    cells = []
+    for ring in (0, 1):
+        left, top = camera_x - ring, camera_y - ring
+        right, bottom = camera_x + renderer.visible_cols - 1 + ring, camera_y + renderer.visible_rows - 1 + ring
+        for y in range(top, bottom + 1):
+            for x in range(left, right + 1):
+                if (x in (left, right) or y in (top, bottom)) and 0 <= x < board.cols and 0 <= y < board.rows:
+                    cells.append(y * board.cols + x)
+    return cells
+
+
+def check_against_game_renderer(cols, rows, seed=0, max_ticks=400, size=(800, 600)):
+    """ Joue une partie affichée par les deux renderers et compare leurs images pixel par pixel.
+
+    Chaque tour est dessiné sans interpolation et à mi-tour. La première
+    fois que la caméra n'est plus dans le coin du plateau, la pomme
+    (normale puis spéciale) est placée sur chaque case du bord de la vue
+    et juste à l'extérieur : c'est là que les pommes, qui débordent d'un
+    pixel de leur case, peuvent être coupées différemment.
+
+    Renvoie la liste des écarts (tour, alpha ou case de la pomme, pixels différents).
+    """
+    from agents import GreedyAgent
+
+    games = [Game("classic", "easy", seed=seed, cols=cols, rows=rows) for _ in range(2)]
+    surfaces = [pygame.Surface(size) for _ in range(2)]
+    renderers = [GameRenderer(surfaces[0], games[0]), ArrayRenderer(surfaces[1], games[1])]
+    agent = GreedyAgent(seed)
+    mismatches = []
+
+    def compare(label):
+        first, second = (pygame.surfarray.pixels2d(surface) for surface in surfaces)
+        differences = int(np.count_nonzero(first != second))
+        del first, second  # Libère le verrou des surfaces
+        if differences:
+            mismatches.append((games[0].ticks, label, differences))
+
+    edges_checked = False
+    while games[0].state == "continue" and games[0].ticks < max_ticks:
+        direction = agent.act(games[0])
+        for game in games:
+            game.step(direction)
+        for alpha in (None, 0.5):
+            for renderer in renderers:
+                renderer.render(alpha)
+            compare(alpha)
+        if not edges_checked and all(renderers[0].camera):
+            edges_checked = True
+            apples = [game.apple for game in games]
+            saved = [(apple.position, apple.special) for apple in apples]
+            for special in (False, True):
+                for cell in _edge_cells(renderers[0]):
+                    for apple, renderer in zip(apples, renderers):
+                        apple.position, apple.special = games[0].board.position(cell), special
+                        renderer.invalidate()
+                        renderer.render()
+                    compare(("pomme spéciale" if special else "pomme", cell))
+            for apple, renderer, (position, special) in zip(apples, renderers, saved):
+                apple.position, apple.special = position, special
+                renderer.invalidate()
+    if not edges_checked and (cols > renderers[0].view_cols or rows > renderers[0].view_rows):
+        mismatches.append((games[0].ticks, "caméra jamais déplacée : bords de la vue non vérifiés", 0))
+    return mismatches
+
+
+def main(argv=None):
+    import argparse
+    import os
+
+    parser = argparse.ArgumentParser(description="Compare les images de ArrayRenderer à celles de GameRenderer")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ticks", type=int, default=400, help="tours joués par plateau")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    pygame.init()
+    pygame.display.set_mode((1, 1))  # convert() et flip() demandent un écran
+
+    failed = False
+    for cols, rows in CHECK_BOARDS:
+        mismatches = check_against_game_renderer(cols, rows, args.seed, args.ticks)
+        print(f"{f'{cols}x{rows}':8} {'ok' if not mismatches else f'{len(mismatches)} écarts'}")
+        for tick, label, differences in mismatches[:5]:
+            print(f"  tour {tick}, {label} : {differences} pixels différents")
+        failed |= bool(mismatches)
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""Cache des ressources graphiques des menus et du HUD.
+
+Les dégradés de fond, les polices et les couches de texte statiques
+(titres et leurs ombres) sont construits une seule fois puis réutilisés à
+chaque image. Les clés contiennent la taille de l'écran : un changement
+de résolution reconstruit automatiquement les surfaces concernées.
+
+Les textes du HUD passent par render_text, un cache LRU borné des
+surfaces déjà rendues : un score ou un temps déjà affiché n'est pas
+rendu une seconde fois.
+
+Les sons ne sont plus décodés à l'import : preload_sounds les charge sur
+un thread en arrière-plan pendant que le menu s'affiche, et chaque son ou
+musique n'est lu sur le disque qu'une seule fois (cache par chemin).
+"""
+import io
+import os
+import sys
+import threading
+import time
+from functools import lru_cache
+
+import pygame
+
+STARTUP_TIME = time.perf_counter()  # Début du chargement du jeu (import de ce module)
+
+MENU_FPS = 30  # Les menus sont statiques, inutile de les redessiner plus souvent
+
+# Dégradés des menus : (couleur du haut, couleur du bas)
+MENU_GRADIENT = ((0, 0, 100), (0, 50, 255))
+CREDITS_GRADIENT = ((0, 0, 120), (30, 80, 255))
+
+TEXT_CACHE_SIZE = 512  # Nombre maximal de textes rendus gardés en mémoire
+
+# Registre des polices du jeu : nom -> (police système, taille, gras)
+FONTS = {
+    "hud": (None, 36, False),  # Score, boutons et écrans de fin
+    "timer": ("Arial", 24, False),  # Temps restant du mode chrono
+    "pause": ("Arial", 48, False),
+    "title": ("Arial", 60, True),
+    "credits_title": ("Arial", 70, True),
+    "credits": ("Arial", 35, False),
+    "profiler": (None, 22, False),  # Mesures affichées avec F3
+}
+
+# Sons du jeu : nom -> fichier
+SOUNDS = {
+    "teleport": "sons/teleport.wav",
+    "game_over": "sons/game_over.mp3",
+    "victory": "sons/victory.mp3",
+    "apple": "sons/apple_munch.mp3",
+}
+
+_fonts = {}
+_surfaces = {}
+_sounds = {}  # chemin -> pygame.mixer.Sound (None si le son n'a pas pu être chargé)
+_sound_lock = threading.Lock()
+_music = {}  # chemin -> contenu du fichier
+_current_music = None
+_first_frame_time = None
+
+
+def resource_path(relative_path):
+    """Renvoie le chemin absolu, compatible avec PyInstaller."""
+    try:
+        base_path = sys._MEIPASS  # quand c'est packagé
+    except AttributeError:
+        base_path = os.path.abspath(".")  # en mode normal
+    return os.path.join(base_path, relative_path)
+
+
+def audio_available():
+    """ Initialise le mixer si besoin ; False s'il n'y a pas de périphérique audio. """
+    if pygame.mixer.get_init():
+        return True
+    try:
+        pygame.mixer.init()
+    except pygame.error:
+        return False
+    return True
+
+
+def load_sound(path):
+    """ Son chargé une seule fois par chemin ; None si le fichier est illisible ou sans audio. """
+    sound = _sounds.get(path)
+    if sound is not None or path in _sounds:
+        return sound
+    with _sound_lock:  # Si le thread de préchargement décode ce son, on attend la fin
+        if path not in _sounds:
+            try:
+                _sounds[path] = pygame.mixer.Sound(resource_path(path)) if audio_available() else None
+            except (pygame.error, FileNotFoundError):
+                _sounds[path] = None
+    return _sounds[path]
+
+
+def preload_sounds(paths=None):
+    """ Décode les sons sur un thread en arrière-plan ; renvoie le thread. """
+    if not audio_available():
+        return None
+    paths = list(SOUNDS.values()) if paths is None else paths
+    thread = threading.Thread(target=lambda: [load_sound(path) for path in paths],
+                              name="preload_sounds", daemon=True)
+    thread.start()
+    return thread
+
+
+def play_sound(name):
+    """ Joue un son du registre SOUNDS (rien sans périphérique audio). """
+    sound = load_sound(SOUNDS[name])
+    if sound is not None:
+        sound.play()
+
+
+def play_music(path, volume=0.5, loops=-1):
+    """ Joue une musique de fond en boucle.
+
+    Le fichier est lu une seule fois en mémoire, et n'est rechargé dans le
+    mixer que si la musique demandée change.
+    """
+    global _current_music
+    if not audio_available():
+        return
+    if _current_music != path:
+        if path not in _music:
+            with open(resource_path(path), "rb") as file:
+                _music[path] = file.read()
+        pygame.mixer.music.load(io.BytesIO(_music[path]), os.path.splitext(path)[1][1:])
+        _current_music = path
+    pygame.mixer.music.set_volume(volume)
+    pygame.mixer.music.play(loops)
+
+
+def stop_music():
+    if pygame.mixer.get_init():
+        pygame.mixer.music.stop()
+
+
+def report_first_frame(verbose=False):
+    """ Note le temps écoulé jusqu'au premier affichage (une seule fois) ; avec verbose, l'affiche sur stderr. """
+    global _first_frame_time
+    if _first_frame_time is None:
+        _first_frame_time = time.perf_counter() - STARTUP_TIME
+        if verbose:
+            print(f"Premier affichage en {_first_frame_time * 1000:.0f} ms", file=sys.stderr)
+    return _first_frame_time
+
+
+def get_font(name, size, bold=False):
+    """ Police mise en cache ; name=None désigne la police par défaut de pygame. """
+    key = (name, size, bold)
+    if key not in _fonts:
+        if name is None:
+            _fonts[key] = pygame.font.Font(None, size)
+        else:
+            _fonts[key] = pygame.font.SysFont(name, size, bold=bold)
+    return _fonts[key]
+
+
+def font(name):
+    """ Police du registre FONTS, créée une seule fois. """
+    return get_font(*FONTS[name])
+
+
+@lru_cache(maxsize=TEXT_CACHE_SIZE)
+def render_text(font, text, color):
+    """ Surface du texte rendu (antialiasé), gardée dans un cache LRU.
+
+    La surface renvoyée est partagée : ne pas dessiner dessus.
+    """
+    return font.render(text, True, color)
+
+
+def _screen_size():
+    return pygame.display.get_surface().get_size()
+
+
+def gradient(top, bottom, size=None):
+    """ Surface remplie d'un dégradé vertical de top vers bottom. """
+    size = size or _screen_size()
+    key = ("gradient", top, bottom, size)
+    if key not in _surfaces:
+        width, height = size
+        surface = pygame.Surface(size).convert()
+        for i in range(height):
+            color = tuple(int(a + (b - a) * i / height) for a, b in zip(top, bottom))
+            pygame.draw.line(surface, color, (0, i), (width, i))
+        _surfaces[key] = surface
+    return _surfaces[key]
+
+
+def draw_shadowed_text(surface, font, text, center, offset, color=(255, 255, 255), shadow_color=(50, 50, 50)):
+    """ Dessine un texte centré sur center avec son ombre décalée de offset pixels. """
+    text_surf = render_text(font, text, color)
+    shadow_surf = render_text(font, text, shadow_color)
+    text_rect = text_surf.get_rect(center=center)
+    surface.blit(shadow_surf, (text_rect.x + offset, text_rect.y + offset))
+    surface.blit(text_surf, text_rect)
+
+
+def static_layer(name, build, colors=MENU_GRADIENT):
+    """ Fond d'un écran (dégradé et textes fixes) construit une fois puis mis en cache.
+
+    build(surface) dessine les éléments fixes sur une copie du dégradé.
+    Le nom identifie l'écran : deux appels avec le même nom et la même
+    taille d'écran renvoient la même surface.
+    """
+    size = _screen_size()
+    key = ("layer", name, colors, size)
+    if key not in _surfaces:
+        surface = gradient(*colors, size=size).copy()
+        build(surface)
+        _surfaces[key] = surface
+    return _surfaces[key]
+
+
+def invalidate():
+    """ Oublie toutes les surfaces construites (par exemple après un changement de mode vidéo). """
+    _surfaces.clear()
+    render_text.cache_clear()
@@ -0,0 +1,295 @@
+"""Pilote automatique : recherche de chemin sur la grille du plateau.
+
+Quand la pomme visée change, une recherche A* part de la tête et trouve le
+plus court chemin vers la pomme la plus proche en contournant les obstacles
+et le corps du serpent. En mode easy, traverser un bord coûte autant de
+points qu'une pomme en rapporte : le pilote ne s'en sert que pour se
+sortir d'un mauvais pas, jamais pour aller chercher une pomme. Le
+chemin n'est retenu que si, une fois la pomme mangée, la tête peut encore
+rejoindre la queue : le serpent ne s'enferme pas. Il est ensuite suivi tour
+après tour sans nouveau calcul, tant que la pomme visée reste en place.
+
+Quand le serpent occupe une grande partie du plateau, le pilote suit un
+cycle hamiltonien (un circuit qui passe une fois par chaque case), avec des
+raccourcis vers la pomme qui ne dépassent jamais la queue.
+
+Le pilote est aussi un agent (agents.load_agent("autopilot")) : on peut le
+mesurer avec tournament.py.
+"""
+import heapq
+from array import array
+from collections import deque
+
+from engine import DIRECTIONS, TELEPORT_PENALTY
+
+FILL_RATIO = 0.5  # Part du plateau occupée à partir de laquelle le cycle hamiltonien prend le relais
+RETRY_TICKS = 4  # Tours d'attente avant de rechercher un chemin après un échec
+GROWTH_MARGIN = 3  # Cases gardées entre la tête et la queue sur le cycle (une pomme spéciale fait grandir de 2)
+
+
+class HamiltonianCycle:
+    """ Circuit qui passe une fois par chaque case d'un rectangle du plateau.
+
+    Les lignes sont parcourues en serpentin et la première colonne sert de
+    voie de retour ; il faut donc un nombre pair de lignes (ou de colonnes,
+    le circuit est alors construit dans l'autre sens).
+    """
+
+    def __init__(self, board, left, top, width, height):
+        self.board = board
+        if height % 2 == 0:
+            points = self._serpentine(width, height)
+        else:
+            points = [(x, y) for y, x in self._serpentine(height, width)]
+        self.order = [(top + y) * board.cols + left + x for x, y in points]
+        self.length = len(self.order)
+        self.rank = array("i", [-1]) * (board.cols * board.rows)
+        for rank, cell in enumerate(self.order):
+            self.rank[cell] = rank
+
+    @staticmethod
+    def _serpentine(width, height):
+        points = []
+        for y in range(height):
+            xs = range(1, width) if y % 2 == 0 else range(width - 1, 0, -1)
+            points.extend((x, y) for x in xs)
+        points.extend((0, y) for y in range(height - 1, -1, -1))  # Remontée par la première colonne
+        return points
+
+    @classmethod
+    def for_board(cls, board):
+        """ Cycle couvrant toutes les cases sans obstacle, ou None s'il n'en existe pas de simple. """
+        cols, rows, cells = board.cols, board.rows, board.cells
+        free = [index for index in range(cols * rows) if not cells[index] & board.OBSTACLE]
+        if not free:
+            return None
+        xs = [index % cols for index in free]
+        ys = [index // cols for index in free]
+        left, top = min(xs), min(ys)
+        width, height = max(xs) - left + 1, max(ys) - top + 1
+        # Les cases libres doivent remplir exactement un rectangle (pas d'obstacle à l'intérieur)
+        if len(free) != width * height or width < 2 or height < 2 or (width % 2 and height % 2):
+            return None
+        return cls(board, left, top, width, height)
+
+    def distance(self, start, end):
+        """ Nombre de pas de start à end en suivant le circuit. """
+        return (self.rank[end] - self.rank[start]) % self.length
+
+    def next(self, cell):
+        return self.order[(self.rank[cell] + 1) % self.length]
+
+
+class Autopilot:
+    """ Agent qui joue seul : chemin le plus court et sûr vers les pommes, cycle hamiltonien en fin de partie. """
+
+    def __init__(self, seed=None):
+        self.board = None
+        self.cycle = None
+        self.cycle_checked = False
+        self.path = deque()  # Cases restant à parcourir vers la pomme visée
+        self.target = None
+        self.expected_head = None  # Case où la tête doit se trouver si le plan a été suivi
+        self.retry_tick = 0  # Pas de nouvelle recherche avant ce tour après un échec
+        self.last_plan_tick = 0  # Dernier tour où un chemin sûr a été trouvé
+        self.visited = None  # Marques de la recherche (numéro de recherche par case)
+        self.parent = None
+        self.search_id = 0
+
+    def _setup(self, board):
+        """ Tableaux de recherche, alloués une fois par plateau. """
+        self.board = board
+        self.visited = array("i", [0]) * (board.cols * board.rows)
+        self.parent = array("i", [-1]) * (board.cols * board.rows)
+        self.search_id = 0
+        self.cycle = None  # Construit seulement quand le plateau se remplit
+        self.cycle_checked = False
+        self.path.clear()
+        self.target = None
+
+    def _distance(self, a, b, wrap):
+        cols, rows = self.board.cols, self.board.rows
+        dx = abs(a % cols - b % cols)
+        dy = abs(a // cols - b // cols)
+        if wrap:
+            dx, dy = min(dx, cols - dx), min(dy, rows - dy)
+        return dx + dy
+
+    def _search(self, start, goals, blocked, wrap):
+        """ A* de start vers la case de goals la plus proche ; liste des cases (start exclue) ou None.
+
+        blocked(case) dit si une case est interdite (les buts sont toujours permis).
+        """
+        cols, rows = self.board.cols, self.board.rows
+        self.search_id += 1
+        search_id, visited, parent = self.search_id, self.visited, self.parent
+        goal_points = [(goal % cols, goal // cols) for goal in goals]
+        visited[start] = search_id
+        heap = [(0, 0, start)]  # (estimation, -pas, case)
+        while heap:
+            _, steps, cell = heapq.heappop(heap)
+            steps = 1 - steps  # Pas jusqu'aux voisins
+            x, y = cell % cols, cell // cols
+            for nx, ny in ((x, y - 1), (x, y + 1), (x - 1, y), (x + 1, y)):
+                if not (0 <= nx < cols and 0 <= ny < rows):
+                    if not wrap:
+                        continue
+                    nx, ny = nx % cols, ny % rows
+                neighbor = ny * cols + nx
+                if visited[neighbor] == search_id:
+                    continue
+                if neighbor in goals:
+                    parent[neighbor] = cell
+                    path = [neighbor]
+                    while parent[path[-1]] != start:
+                        path.append(parent[path[-1]])
+                    path.reverse()
+                    return path
+                visited[neighbor] = search_id
+                if blocked(neighbor):
+                    continue
+                parent[neighbor] = cell
+                estimate = cols + rows
+                for gx, gy in goal_points:
+                    dx, dy = abs(nx - gx), abs(ny - gy)
+                    if wrap:
+                        dx, dy = min(dx, cols - dx), min(dy, rows - dy)
+                    estimate = min(estimate, dx + dy)
+                # À estimation égale, les chemins les plus avancés d'abord
+                heapq.heappush(heap, (steps + estimate, -steps, neighbor))
+        return None
+
+    def _targets(self, game):
+        targets = {}
+        for apple, growth in ((game.apple, 1), (game.special_apple, 2)):
+            if apple is not None and apple.position is not None:
+                targets[self.board.index(apple.position)] = growth
+        return targets
+
+    def _is_blocked(self, tail):
+        cells, mask = self.board.cells, self.board.SNAKE_MASK | self.board.OBSTACLE
+        # La queue libère sa case pendant le déplacement, sauf si elle est empilée (le serpent grandit)
+        return lambda cell: cells[cell] & mask and not (cell == tail and cells[cell] == 1)
+
+    def _tail_reachable(self, body, wrap):
+        """ Vrai si, pour ce corps (tête en premier), la tête peut rejoindre la queue. """
+        if len(body) < 2:
+            return True
+        occupied = set(body[:-1])
+        cells, obstacle = self.board.cells, self.board.OBSTACLE
+        return self._search(body[0], {body[-1]}, lambda cell: cells[cell] & obstacle or cell in occupied,
+                            wrap) is not None
+
+    def _plan(self, game, wrap, risky=False):
+        """ Chemin sûr vers une pomme (ou simplement le plus court si risky), ou None. """
+        snake = game.snake
+        targets = self._targets(game)
+        if not targets:
+            return None
+        path = self._search(snake.head, targets, self._is_blocked(snake.cells[-1]), wrap)
+        if path is None or risky:
+            return path
+        growth = targets[path[-1]]
+        body = (path[::-1] + list(snake.cells))[:len(snake.cells) + growth]
+        if not self._tail_reachable(body, wrap):
+            return None
+        return path
+
+    def _safe_moves(self, game, wrap):
+        snake = game.snake
+        blocked = self._is_blocked(snake.cells[-1])
+        moves = []
+        for direction in DIRECTIONS:
+            cell = self.board.neighbor(snake.head, direction, wrap)
+            if cell is not None and not blocked(cell):
+                moves.append((direction, cell))
+        return moves
+
+    def _survive(self, game, moves, wrap):
+        """ Sans chemin sûr : le coup qui garde la queue accessible, le plus loin de la pomme.
+
+        Les traversées de bord, qui coûtent des points, ne servent qu'en dernier recours.
+        """
+        snake = game.snake
+        head = snake.head
+        targets = list(self._targets(game)) or [head]
+        body = list(snake.cells)[:-1]
+        safe = [(direction, cell) for direction, cell in moves if self._tail_reachable([cell] + body, wrap)]
+        candidates = safe or moves
+        return max(candidates, key=lambda move: (self._distance(head, move[1], wrap=False) == 1,
+                                                 min(self._distance(move[1], target, wrap)
+                                                     for target in targets)))[0]
+
+    def _follow_cycle(self, game, moves):
+        """ Coup sur le cycle hamiltonien, avec un raccourci vers la pomme s'il ne dépasse pas la queue. """
+        cycle, snake = self.cycle, game.snake
+        head, tail = snake.head, snake.cells[-1]
+        if cycle.rank[head] < 0 or cycle.rank[tail] < 0:
+            return None
+        room = cycle.distance(head, tail) - GROWTH_MARGIN  # Pas disponibles avant de rattraper la queue
+        targets = self._targets(game)
+        candidates = []
+        for direction, cell in moves:
+            if cycle.rank[cell] < 0 or self._distance(head, cell, wrap=False) != 1:
+                continue  # Le cycle ne traverse pas les bords
+            if cell != cycle.next(head) and cycle.distance(head, cell) > room:
+                continue  # Ce raccourci passerait devant la queue
+            remaining = min((cycle.distance(cell, target) for target in targets), default=0)
+            candidates.append((remaining, direction, cell))
+        # Tant que le corps n'est pas rangé dans l'ordre du cycle, chaque coup est vérifié
+        body = list(snake.cells)[:-1]
+        for _, direction, cell in sorted(candidates):
+            if self._tail_reachable([cell] + body, wrap=False):
+                return direction
+        return None
+
+    def act(self, game):
+        board, snake = game.board, game.snake
+        if board is not self.board:
+            self._setup(board)
+        wrap = game.easy_mode and game.score > TELEPORT_PENALTY
+        moves = self._safe_moves(game, wrap)
+        if not moves:
+            return None
+
+        # Fin de partie : le cycle hamiltonien garantit de ne jamais s'enfermer
+        if len(snake.cells) > FILL_RATIO * (len(board.free) + len(snake.cells)) and not self.cycle_checked:
+            self.cycle = HamiltonianCycle.for_board(board)
+            self.cycle_checked = True
+        if self.cycle is not None and len(snake.cells) > FILL_RATIO * self.cycle.length:
+            self.path.clear()
+            direction = self._follow_cycle(game, moves)
+            if direction is not None:
+                return direction
+
+        # Suivre le chemin déjà calculé tant que la pomme visée est toujours là
+        targets = self._targets(game)
+        if self.path and snake.head == self.expected_head and self.target in targets:
+            cell = self.path[0]
+            for direction, neighbor in moves:
+                if neighbor == cell:
+                    self.path.popleft()
+                    self.expected_head = cell
+                    return direction
+
+        # Nouveau plan, sans traverser les bords : une traversée coûte autant
+        # de points qu'une pomme en rapporte. Après un échec, le serpent tourne
+        # en rond quelques tours le temps que sa queue libère la place
+        path = None
+        if game.ticks >= self.retry_tick:
+            # Un serpent qui tourne en rond trop longtemps finit par prendre le risque
+            risky = game.ticks - self.last_plan_tick > board.cols * board.rows
+            path = self._plan(game, wrap=False, risky=risky)
+        if path is None:
+            self.path.clear()
+            if game.ticks >= self.retry_tick:
+                self.retry_tick = game.ticks + RETRY_TICKS
+            return self._survive(game, moves, wrap)
+        self.last_plan_tick = game.ticks
+        self.target = path[-1]
+        self.path = deque(path[1:])
+        self.expected_head = path[0]
+        for direction, neighbor in moves:
+            if neighbor == path[0]:
+                return direction
+        return self._survive(game, moves, wrap)
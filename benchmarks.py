@@ -0,0 +1,288 @@
+"""Mesures de performance des chemins critiques du jeu.
+
+Exemples :
+    python benchmarks.py --output bench.json
+    python benchmarks.py --baseline bench.json --threshold 0.25
+    python benchmarks.py --check-stdout     # le rapport sur stdout se relit en JSON
+
+Chaque mesure est paramétrée par la longueur du serpent et la taille du
+plateau. Les résultats sont écrits en JSON ; avec --baseline, ils sont
+comparés à un fichier précédent et le script sort avec le code 1 si une
+mesure est plus lente que la référence au-delà du seuil.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+from collections import deque
+
+from engine import Apple, Board, Game, Snake, generate_obstacles
+
+SNAKE_LENGTHS = (3, 100, 1000, 5000)
+GRID_SIZES = ((40, 30), (200, 150), (1000, 1000))
+QUICK_SNAKE_LENGTHS = (3, 1000)
+QUICK_GRID_SIZES = ((40, 30), (200, 150))
+
+
+def place_snake(snake, length):
+    """ Remplace le corps du serpent par un serpentin de length cases, la tête en dernier.
+
+    Le serpentin remplit les premières lignes du plateau et la tête part
+    vers le bas, dans la partie vide du plateau.
+    """
+    board = snake.board
+    for index in snake.cells:
+        board.remove_snake(index)
+    path = []
+    for i in range(length):
+        y, x = divmod(i, board.cols)
+        if y % 2:
+            x = board.cols - 1 - x
+        path.append(y * board.cols + x)
+    snake.cells = deque(reversed(path))
+    for index in snake.cells:
+        board.add_snake(index)
+    snake.direction = "DOWN"
+    snake.turns.clear()
+
+
+def make_snake(cols, rows, length):
+    snake = Snake(Board(cols, rows))
+    place_snake(snake, length)
+    return snake
+
+
+def make_game(cols, rows, length, difficulty="easy"):
+    game = Game("classic", difficulty, seed=0, cols=cols, rows=rows)
+    place_snake(game.snake, length)
+    game.apple.respawn(game.snake, game.obstacles)
+    game.score = 10 ** 6  # Les téléportations ne doivent pas finir la partie
+    return game
+
+
+def measure(func, setup=None, min_time=0.2, repeat=5):
+    """ Durée d'un appel en microsecondes (meilleure et moyenne de repeat séries).
+
+    Sans setup, func est appelée en boucle avec timeit. Avec setup, chaque
+    appel reçoit le résultat d'un setup() non chronométré, pour les mesures
+    qui modifient leur état (obstacles à retirer avant chaque appel, par exemple).
+    """
+    if setup is None:
+        timer = timeit.Timer(func)
+        number, _ = timer.autorange()
+        number = max(1, int(number * min_time / 0.2))
+        runs = [total / number for total in timer.repeat(repeat, number)]
+    else:
+        runs = []
+        for _ in range(repeat):
+            elapsed, calls = 0.0, 0
+            while elapsed < min_time / repeat or calls == 0:
+                arg = setup()
+                start = time.perf_counter()
+                func(arg)
+                elapsed += time.perf_counter() - start
+                calls += 1
+            runs.append(elapsed / calls)
+    return {"best_us": min(runs) * 1e6, "mean_us": sum(runs) / len(runs) * 1e6}
+
+
+def bench_move(cols, rows, length, min_time):
+    snake = make_snake(cols, rows, length)
+    return measure(lambda: snake.move(True, 10 ** 6), min_time=min_time)
+
+
+def bench_check_collision(cols, rows, length, min_time):
+    snake = make_snake(cols, rows, length)
+    obstacles = generate_obstacles("hard", snake)
+    return measure(lambda: snake.check_collision(obstacles), min_time=min_time)
+
+
+def bench_apple_position(cols, rows, length, min_time):
+    snake = make_snake(cols, rows, length)
+    obstacles = generate_obstacles("hard", snake)
+    apple = Apple(snake, obstacles)
+    return measure(lambda: apple.get_valid_position(snake, obstacles), min_time=min_time)
+
+
+def bench_generate_obstacles(cols, rows, length, min_time):
+    snake = make_snake(cols, rows, length)
+    state = {"obstacles": []}
+
+    def setup():
+        # Retire les obstacles de l'appel précédent plutôt que de recréer un plateau
+        for obstacle in state["obstacles"]:
+            snake.board.remove_obstacle(snake.board.index(obstacle))
+        return snake
+
+    def generate(snake):
+        state["obstacles"] = generate_obstacles("hard", snake)
+
+    return measure(generate, setup=setup, min_time=min_time)
+
+
+def bench_tick(cols, rows, length, min_time):
+    state = {"game": make_game(cols, rows, length)}
+
+    def setup():
+        # Une nouvelle partie quand le serpent finit par se mordre
+        if state["game"].state != "continue":
+            state["game"] = make_game(cols, rows, length)
+        return state["game"]
+
+    return measure(lambda game: game.step(), setup=setup, min_time=min_time)
+
+
+def bench_frame(cols, rows, length, min_time, renderer_class=None):
+    """ Une image de la boucle de jeu après un tour, avec le pilote vidéo SDL "dummy". """
+    import jeu_snake
+    from renderer import GameRenderer
+
+    renderer_class = renderer_class or GameRenderer
+    state = {}
+
+    def new_game():
+        state["game"] = make_game(cols, rows, length)
+        state["renderer"] = renderer_class(jeu_snake.display, state["game"])
+        state["renderer"].render()  # Premier affichage complet, hors mesure
+
+    def setup():
+        if "game" not in state or state["game"].state != "continue":
+            new_game()
+        state["game"].step()
+        return state["renderer"]
+
+    def frame(renderer):
+        game = renderer.game
+        jeu_snake.draw_special_apple_bar(renderer, game)
+        jeu_snake.draw_score(renderer, game.score, 0, game.difficulty)
+        renderer.render()
+
+    return measure(frame, setup=setup, min_time=min_time)
+
+
+def bench_array_frame(cols, rows, length, min_time):
+    """ Comme bench_frame, avec l'affichage de tout le plateau par NumPy (array_renderer). """
+    from array_renderer import ArrayRenderer
+
+    return bench_frame(cols, rows, length, min_time, ArrayRenderer)
+
+
+# (nom, fonction)
+BENCHMARKS = (
+    ("snake_move", bench_move),
+    ("check_collision", bench_check_collision),
+    ("apple_get_valid_position", bench_apple_position),
+    ("generate_obstacles_hard", bench_generate_obstacles),
+    ("headless_tick", bench_tick),
+    ("rendered_frame", bench_frame),  # La caméra ne dessine que la zone visible
+    ("array_frame", bench_array_frame),
+)
+
+
+def run(names=None, lengths=SNAKE_LENGTHS, grids=GRID_SIZES, min_time=0.2):
+    results = {}
+    for name, func in BENCHMARKS:
+        if names and name not in names:
+            continue
+        for cols, rows in grids:
+            for length in lengths:
+                if length > cols * rows - 2 * cols:
+                    continue  # Le serpent doit laisser de la place sur le plateau
+                key = f"{name}[len={length},grid={cols}x{rows}]"
+                result = func(cols, rows, length, min_time)
+                result.update({"benchmark": name, "snake_length": length, "grid": [cols, rows]})
+                results[key] = result
+                print(f"{key:60} {result['best_us']:12.2f} us", file=sys.stderr)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """ Compare aux résultats de référence ; renvoie la liste des régressions. """
+    regressions = []
+    # Sur stderr : stdout peut porter le rapport JSON (--output -)
+    print(f"{'mesure':60} {'réf. (us)':>12} {'actuel (us)':>12} {'ratio':>7}", file=sys.stderr)
+    for key, result in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            continue
+        ratio = result["best_us"] / reference["best_us"] if reference["best_us"] else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(key)
+        print(f"{key:60} {reference['best_us']:12.2f} {result['best_us']:12.2f} {ratio:7.2f}{flag}",
+              file=sys.stderr)
+    return regressions
+
+
+def check_stdout():
+    """ Vérifie que le rapport écrit sur stdout (--output -) se relit avec json.loads.
+
+    Rien d'autre ne doit s'y mêler : la mesure du rendu importe pygame,
+    dont la bannière irait sinon sur stdout avant le JSON.
+    """
+    command = [sys.executable, os.path.abspath(__file__), "--quick", "--only", "rendered_frame",
+               "--min-time", "0.01", "--output", "-"]
+    output = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, check=True).stdout
+    try:
+        report = json.loads(output)
+    except ValueError as error:
+        raise SystemExit(f"stdout n'est pas du JSON valide ({error}) :\n{output[:200]}")
+    print(f"ok : {len(report['results'])} mesures relues depuis stdout", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks des chemins critiques du jeu Snake")
+    parser.add_argument("--output", "-o", help="fichier JSON de sortie ('-' pour stdout)", default="-")
+    parser.add_argument("--baseline", help="fichier JSON de référence à comparer")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="ralentissement toléré par rapport à la référence (0.2 = +20%%)")
+    parser.add_argument("--only", nargs="+", choices=[name for name, _ in BENCHMARKS],
+                        help="ne lancer que ces mesures")
+    parser.add_argument("--lengths", nargs="+", type=int, help="longueurs de serpent à mesurer")
+    parser.add_argument("--quick", action="store_true", help="jeu de paramètres réduit")
+    parser.add_argument("--min-time", type=float, default=0.2, help="durée minimale de chaque mesure (s)")
+    parser.add_argument("--check-stdout", action="store_true",
+                        help="vérifie que le rapport sur stdout (--output -) est du JSON valide")
+    args = parser.parse_args(argv)
+
+    # Le rendu est mesuré sans écran ni carte son, et sans la bannière de
+    # pygame, qui serait écrite sur stdout avant le rapport JSON
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    if args.check_stdout:
+        check_stdout()
+        return
+
+    lengths = args.lengths or (QUICK_SNAKE_LENGTHS if args.quick else SNAKE_LENGTHS)
+    grids = QUICK_GRID_SIZES if args.quick else GRID_SIZES
+    results = run(args.only, lengths, grids, args.min_time)
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    if args.output == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+"""Capture des images d'une partie sans écran, et export en vidéo ou en GIF animé.
+
+La partie (un replay, ou un agent qui joue) est dessinée par le renderer
+habituel dans la fenêtre du pilote vidéo SDL "dummy" : rien ne s'affiche,
+ce qui permet de faire des extraits ou des images de référence sur une
+machine d'intégration continue sans écran.
+
+Les images sont copiées avec pygame.surfarray dans des lots préalloués
+(BATCH_FRAMES images par tableau NumPy) : la boucle principale ne fait
+qu'une copie brute des pixels de 32 bits (une fraction de milliseconde),
+et un thread convertit les lots en RVB et les encode pendant qu'elle
+simule et dessine la suite. Le nombre de
+lots en attente est borné : si l'encodeur prend du retard, la capture
+l'attend (ou, avec block=False, laisse tomber des images) au lieu de
+remplir la mémoire.
+
+Formats, d'après l'extension du fichier de sortie :
+    .gif                      GIF animé (Pillow, MAX_GIF_FRAMES images au plus ; ou ffmpeg à défaut)
+    .mp4 .webm .mkv .mov .avi  vidéo encodée par un processus ffmpeg (images brutes sur son entrée)
+    sans extension            dossier d'images PNG (aucune dépendance en plus de pygame)
+
+Exemples :
+    python capture.py partie.snkr extrait.mp4 --start 300 --end 600
+    python capture.py --agent autopilot --seed 3 --max-ticks 2000 partie.gif --speed 4
+    python capture.py partie.snkr images/ --fps 10      # images de référence
+"""
+import argparse
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import time
+
+import numpy as np
+import pygame
+
+from engine import HEIGHT, WIDTH, Game
+from levels import PRESETS
+
+BATCH_FRAMES = 16  # Images copiées dans un même tableau avant d'être passées à l'encodeur
+QUEUE_BATCHES = 4  # Lots en attente d'encodage au plus
+HUD_COLOR = (255, 255, 255)
+VIDEO_EXTENSIONS = (".mp4", ".webm", ".mkv", ".mov", ".avi")
+# Images d'un GIF écrit avec Pillow, toutes gardées en mémoire jusqu'à la
+# fin (un octet par pixel : environ 240 Mo à 800 x 600)
+MAX_GIF_FRAMES = 500
+
+
+class CaptureError(RuntimeError):
+    """ Export impossible : dépendance manquante, format inconnu ou erreur de l'encodeur. """
+
+
+class PngEncoder:
+    """ Une image PNG par image capturée, numérotées dans un dossier.
+
+    size et fps ne servent pas (la taille vient de chaque lot d'images) :
+    ils sont acceptés pour que tous les encodeurs se construisent de la
+    même façon dans encoder_for.
+    """
+
+    def __init__(self, directory, size, fps):
+        self.directory = directory
+        self.count = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, frames):
+        size = frames.shape[2], frames.shape[1]
+        for frame in frames:
+            path = os.path.join(self.directory, f"frame_{self.count:06d}.png")
+            pygame.image.save(pygame.image.frombuffer(frame.tobytes(), size, "RGB"), path)
+            self.count += 1
+
+    def close(self):
+        pass
+
+
+class FfmpegEncoder:
+    """ Vidéo (ou GIF) encodée par ffmpeg, qui lit les images brutes sur son entrée standard. """
+
+    def __init__(self, path, size, fps):
+        executable = shutil.which("ffmpeg")
+        if executable is None:
+            raise CaptureError(f"l'export en {os.path.splitext(path)[1]} demande ffmpeg, introuvable dans le PATH")
+        width, height = size
+        command = [executable, "-y", "-loglevel", "error",
+                   "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", str(fps), "-i", "-"]
+        if path.endswith(".gif"):
+            command += ["-vf", "split[a][b];[a]palettegen[p];[b][p]paletteuse"]
+        else:
+            # Les codecs vidéo courants veulent des dimensions paires
+            command += ["-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-pix_fmt", "yuv420p"]
+        self.path = path
+        self.process = subprocess.Popen(command + [path], stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def write(self, frames):
+        try:
+            self.process.stdin.write(frames.tobytes())
+        except BrokenPipeError:
+            raise CaptureError(f"ffmpeg s'est arrêté : {self._errors()}")
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+        except BrokenPipeError:
+            pass
+        if self.process.wait() != 0:
+            raise CaptureError(f"ffmpeg a échoué : {self._errors()}")
+
+    def _errors(self):
+        return self.process.stderr.read().decode(errors="replace").strip() or f"code {self.process.poll()}"
+
+
+class GifEncoder:
+    """ GIF animé écrit avec Pillow.
+
+    Pillow écrit un GIF en un seul appel : les images sont converties en
+    couleurs indexées au fil de l'eau (un octet par pixel) et le fichier
+    est écrit à la fermeture. Elles restent toutes en mémoire jusque-là :
+    au-delà de max_frames images, l'export s'arrête sur une CaptureError
+    (les vidéos, encodées par ffmpeg au fil de l'eau, n'ont pas de limite).
+    """
+
+    def __init__(self, path, size, fps, max_frames=MAX_GIF_FRAMES):
+        try:
+            from PIL import Image
+        except ImportError:
+            raise CaptureError("l'export en GIF demande Pillow (pip install Pillow) ou ffmpeg")
+        self.image = Image
+        self.path = path
+        self.fps = fps
+        self.duration = round(1000 / fps)
+        self.max_frames = max_frames
+        self.frames = []
+
+    def write(self, frames):
+        if len(self.frames) + len(frames) > self.max_frames:
+            raise CaptureError(f"un GIF est limité à {self.max_frames} images ({self.max_frames / self.fps:.1f} s "
+                               f"à {self.fps} images/s) : raccourcissez l'extrait, baissez --fps ou exportez "
+                               "en vidéo (.mp4, .webm...)")
+        for frame in frames:
+            image = self.image.fromarray(frame)
+            self.frames.append(image.convert("P", palette=self.image.ADAPTIVE))
+
+    def close(self):
+        if self.frames:
+            self.frames[0].save(self.path, save_all=True, append_images=self.frames[1:], duration=self.duration,
+                                loop=0)
+
+
+def encoder_for(path, size, fps):
+    """ Encodeur adapté à l'extension de path ; CaptureError si le format ou sa dépendance manque. """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == "":
+        return PngEncoder(path, size, fps)
+    if extension == ".gif":
+        try:
+            return GifEncoder(path, size, fps)
+        except CaptureError:
+            if shutil.which("ffmpeg") is None:
+                raise
+            return FfmpegEncoder(path, size, fps)
+    if extension in VIDEO_EXTENSIONS:
+        return FfmpegEncoder(path, size, fps)
+    raise CaptureError(f"format de sortie inconnu : {extension} (.gif, {', '.join(VIDEO_EXTENSIONS)} "
+                       "ou un dossier pour des PNG)")
+
+
+class FrameRecorder:
+    """ Copie les images d'une surface par lots et les encode sur un thread.
+
+    capture() copie les pixels bruts (32 bits) de l'image courante dans le
+    lot en cours ; un lot plein part au thread et un tableau libre est
+    repris. Le thread passe les lots aux encodeurs en RVB, ligne par ligne
+    (tableau images x hauteur x largeur x 3). close() termine l'encodage
+    et relance l'erreur de l'encodeur s'il y en a eu une.
+    """
+
+    def __init__(self, path, size, fps=30, batch_frames=BATCH_FRAMES, block=True):
+        self.path = path
+        self.encoder = encoder_for(path, size, fps)  # Les dépendances manquantes sont signalées tout de suite
+        self.block = block  # False : on perd des images plutôt que d'attendre l'encodeur (partie jouée en direct)
+        self.frames = 0
+        self.dropped = 0
+        self.error = None
+        self.size = size
+        self.shifts = None  # Position des octets rouge, vert et bleu dans un pixel de la surface capturée
+        width, height = size
+        self.pending = queue.Queue()  # (tableau, nombre d'images) à encoder ; None pour finir
+        self.free = queue.Queue()  # Tableaux disponibles pour la capture
+        for _ in range(QUEUE_BATCHES + 1):
+            self.free.put(np.empty((batch_frames, height, width), dtype=np.uint32))
+        self.batch = self.free.get()
+        self.count = 0
+        self.thread = threading.Thread(target=self._encode, name="capture", daemon=True)
+        self.thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def capture(self, surface):
+        """ Ajoute l'image courante de surface (de la taille donnée à la création). """
+        if surface.get_bytesize() != 4:
+            surface = surface.convert(32)
+        if self.error is not None:
+            if isinstance(self.error, CaptureError):
+                raise self.error
+            raise CaptureError(f"l'encodage a échoué : {self.error}") from self.error
+        if self.batch is None:
+            try:
+                self.batch = self.free.get(block=self.block)
+            except queue.Empty:
+                self.dropped += 1
+                return
+        if self.shifts is None:
+            self.shifts = surface.get_shifts()[:3]
+        # surfarray indexe en [x, y] : la transposée se copie ligne par ligne d'un bloc
+        self.batch[self.count] = pygame.surfarray.pixels2d(surface).T
+        self.count += 1
+        self.frames += 1
+        if self.count == len(self.batch):
+            self._flush()
+
+    def _flush(self):
+        if self.count:
+            self.pending.put((self.batch, self.count))
+            self.batch, self.count = None, 0
+
+    def _encode(self):
+        rgb = None
+        while True:
+            item = self.pending.get()
+            if item is None:
+                break
+            batch, count = item
+            if self.error is None:
+                try:
+                    if rgb is None:
+                        rgb = np.empty(batch.shape + (3,), dtype=np.uint8)
+                    for channel, shift in enumerate(self.shifts):
+                        rgb[:count, :, :, channel] = batch[:count] >> shift
+                    self.encoder.write(rgb[:count])
+                except Exception as error:  # Relancée par capture() ou close(), sur le thread principal
+                    self.error = error
+            self.free.put(batch)
+        if self.error is None:
+            try:
+                self.encoder.close()
+            except Exception as error:
+                self.error = error
+
+    def close(self):
+        """ Encode les dernières images et ferme le fichier ; renvoie son chemin. """
+        if self.thread.is_alive():
+            self._flush()
+            self.pending.put(None)
+            self.thread.join()
+        if self.error is not None:
+            if isinstance(self.error, CaptureError):
+                raise self.error
+            raise CaptureError(f"l'encodage a échoué : {self.error}") from self.error
+        return self.path
+
+
+def headless_display(size):
+    """ Fenêtre de la taille size, sans écran si le pilote vidéo n'est pas encore choisi. """
+    if not pygame.display.get_init():
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    return pygame.display.set_mode(size)
+
+
+def record(game, advance, path, fps=30, speed=1.0, size=(WIDTH, HEIGHT), renderer_class=None, max_frames=None,
+           hold=1.0, finished=None):
+    """ Dessine la partie hors écran et l'enregistre dans path ; renvoie le FrameRecorder fermé.
+
+    advance() joue le tour suivant de game. Le temps de jeu avance de
+    speed / fps par image, avec la tête et la queue interpolées comme à
+    l'écran. La dernière image est gardée hold secondes.
+    """
+    import assets
+    from renderer import GameRenderer
+
+    finished = finished or (lambda: game.state != "continue")
+    display = headless_display((min(game.board.width, size[0]), min(game.board.height, size[1])))
+    renderer = (renderer_class or GameRenderer)(display, game)
+    font = assets.font("hud")
+    width = display.get_width()
+    lag = 0.0
+    with FrameRecorder(path, display.get_size(), fps) as recorder:
+        while not finished() and (max_frames is None or recorder.frames < max_frames):
+            lag += speed / fps
+            while lag >= 1 / game.speed and not finished():
+                lag -= 1 / game.speed
+                advance()
+            renderer.set_text("score", f"Score: {game.score}", font, HUD_COLOR,
+                              lambda text_width: (width // 3 - text_width // 2, 20))
+            renderer.render(None if finished() else min(lag * game.speed, 1.0))
+            recorder.capture(display)
+        renderer.render()
+        for _ in range(round(hold * fps)):
+            recorder.capture(display)
+    return recorder
+
+
+def record_replay(replay, path, start=0, end=None, **options):
+    """ Extrait d'un replay, du tour start au tour end (toute la partie par défaut). """
+    from replay import ReplayPlayer
+
+    player = ReplayPlayer(replay)
+    player.seek(start)
+    end = replay.ticks if end is None else min(end, replay.ticks)
+    return record(player.game, player.step, path, finished=lambda: player.finished() or player.tick >= end,
+                  **options)
+
+
+def record_agent(agent, path, mode="classic", difficulty="easy", seed=None, max_ticks=None, level=None, **options):
+    """ Partie jouée par un agent (agents.py), enregistrée au fur et à mesure. """
+    game = Game(mode, difficulty, seed=seed, level=level)
+    return record(game, lambda: game.step(agent.act(game)), path,
+                  finished=lambda: game.state != "continue" or (max_ticks is not None and game.ticks >= max_ticks),
+                  **options)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export d'une partie de Snake en vidéo, en GIF ou en images PNG")
+    parser.add_argument("source", nargs="?", help="replay à exporter (.snkr) ; sinon une partie jouée par --agent")
+    parser.add_argument("output", help="fichier .gif, .mp4, .webm... ou dossier pour des images PNG")
+    parser.add_argument("--agent", default="greedy", help="agent qui joue sans replay (random, greedy, autopilot "
+                                                          "ou module:Classe)")
+    parser.add_argument("--mode", choices=("classic", "chrono"), default="classic")
+    parser.add_argument("--difficulty", choices=("easy", "medium", "hard"), default="easy")
+    parser.add_argument("--level", choices=PRESETS, help="niveau généré pour la partie de l'agent")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-ticks", type=int, default=3000, help="limite de tours de la partie de l'agent")
+    parser.add_argument("--start", type=int, default=0, help="premier tour du replay exporté")
+    parser.add_argument("--end", type=int, default=None, help="dernier tour du replay exporté")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--speed", type=float, default=1.0, help="vitesse de la partie par rapport au temps réel")
+    parser.add_argument("--renderer", choices=("cells", "array"), default="cells")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # Pas de fenêtre, même avec un écran
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    options = {"fps": args.fps, "speed": args.speed}
+    if args.renderer == "array":
+        from array_renderer import ArrayRenderer
+
+        options["renderer_class"] = ArrayRenderer
+    start = time.perf_counter()
+    try:
+        if args.source:
+            from replay import Replay
+
+            recorder = record_replay(Replay.load(args.source), args.output, args.start, args.end, **options)
+        else:
+            from agents import load_agent
+
+            agent = load_agent(args.agent)(args.seed)
+            recorder = record_agent(agent, args.output, args.mode, args.difficulty, args.seed, args.max_ticks,
+                                    args.level, **options)
+    except CaptureError as error:
+        parser.exit(1, f"Erreur : {error}\n")
+    print(f"{recorder.frames} images ({recorder.frames / args.fps:.1f} s) dans {args.output} "
+          f"en {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
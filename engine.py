@@ -0,0 +1,616 @@
+"""Moteur du jeu Snake, indépendant de pygame.
+
+Toutes les règles du jeu (plateau, serpent, pommes, obstacles, score,
+chrono et pénalité de téléportation) vivent ici. Le module n'importe
+jamais pygame : on peut donc simuler des milliers de tours par seconde
+dans des tests ou pour des bots, et l'interface graphique (jeu_snake.py)
+se contente de piloter un objet Game.
+"""
+import copy
+import random
+import time
+from array import array
+from collections import deque, namedtuple
+from itertools import compress
+
+from levels import load_level, obstacle_cells
+
+# Dimensions du plateau (en pixels) et taille d'une case
+WIDTH, HEIGHT = 800, 600  # Taille de la fenêtre ; le plateau (cols x rows) peut être plus grand
+GRID_SIZE = 20
+COLS, ROWS = WIDTH // GRID_SIZE, HEIGHT // GRID_SIZE  # Plateau par défaut : tout l'écran
+
+DIRECTIONS = ("UP", "DOWN", "LEFT", "RIGHT")
+OPPOSITE = {"UP": "DOWN", "DOWN": "UP", "LEFT": "RIGHT", "RIGHT": "LEFT"}
+
+# Règles du score
+APPLE_POINTS = 10
+SPECIAL_APPLE_POINTS = 20
+TELEPORT_PENALTY = 10
+SPECIAL_APPLE_CHANCE = 0.1  # Probabilité d'apparition d'une pomme spéciale
+SPECIAL_APPLE_LIFETIME = 10  # Durée de vie de la pomme spéciale en secondes
+BASE_SPEED = 10  # Nombre de tours par seconde en début de partie
+SPEED_RAMP = 100  # Points à marquer pour gagner un tour par seconde
+MAX_SPEED = 20
+TURN_BUFFER = 3  # Virages mémorisés d'avance (touches pressées pendant un même tour)
+LEVEL_CLEARANCE = 3  # Cases laissées libres devant la tête dans un niveau généré
+
+# Mode chrono : (temps limite en secondes, score requis pour gagner)
+CHRONO_SETTINGS = {
+    "easy": (180, 500),  # 3 minutes
+    "medium": (120, 300),  # 2 minutes
+    "hard": (60, 200),  # 1 minute
+}
+
+# Résultat d'un tour de simulation
+StepResult = namedtuple("StepResult", ["state", "score", "events"])
+
+
+def tick_rate(score):
+    """ Tours par seconde pour un score donné.
+
+    La vitesse augmente d'un tour par seconde tous les SPEED_RAMP points,
+    par petits pas (chaque pomme l'accélère un peu), jusqu'à MAX_SPEED.
+    """
+    return min(BASE_SPEED + max(score, 0) / SPEED_RAMP, MAX_SPEED)
+
+
+class GameClock:
+    """ Horloge du temps de jeu, monotone (time.perf_counter par défaut).
+
+    Le temps de jeu s'arrête pendant la pause et avance scale fois plus vite
+    que le temps réel (0.5 pour un ralenti). C'est la seule source de temps
+    de l'interface : la boucle de jeu transforme ce temps en tours à pas fixe,
+    et le chrono comme la durée de vie des pommes spéciales sont comptés en
+    temps de jeu (Game.elapsed).
+    """
+
+    def __init__(self, scale=1.0, source=time.perf_counter):
+        self.source = source
+        self.scale = scale
+        self.now = 0.0  # Temps de jeu écoulé en secondes
+        self.paused = False
+        self._last = source()
+
+    def tick(self):
+        """ Avance l'horloge et renvoie le temps de jeu écoulé depuis l'appel précédent. """
+        real = self.source()
+        dt = 0.0 if self.paused else (real - self._last) * self.scale
+        self._last = real
+        self.now += dt
+        return dt
+
+    def pause(self):
+        self.tick()
+        self.paused = True
+
+    def resume(self):
+        self._last = self.source()  # Le temps passé en pause n'est jamais compté
+        self.paused = False
+
+    def set_scale(self, scale):
+        self.tick()  # Le temps déjà écoulé garde l'ancienne vitesse
+        self.scale = scale
+
+
+class Board:
+    """ Grille d'occupation du plateau, une case par octet.
+
+    Les 7 bits de poids faible comptent les segments du serpent présents
+    dans la case (grow() empile des segments sur la queue) et le bit de
+    poids fort marque un obstacle. Les tests de collision sont ainsi en
+    O(1), quelle que soit la longueur du serpent ou le nombre d'obstacles.
+
+    La grille tient aussi un index des cases libres : un tableau des
+    cases libres et, pour chaque case, sa place dans ce tableau (-1 si
+    elle est occupée). Une case qui devient occupée est retirée en
+    l'échangeant avec la dernière, ce qui permet de tirer une case libre
+    au hasard en temps constant.
+    """
+    OBSTACLE = 0x80
+    SNAKE_MASK = 0x7F
+    _FREE_TABLE = bytes([1]) + bytes(255)  # translate() : 1 pour une case libre, 0 sinon
+
+    def __init__(self, cols=COLS, rows=ROWS, grid_size=GRID_SIZE):
+        self.cols = cols
+        self.rows = rows
+        self.grid_size = grid_size
+        self.width = cols * grid_size
+        self.height = rows * grid_size
+        self.cells = bytearray(cols * rows)
+        self.obstacle_version = 0  # Incrémenté à chaque ajout ou retrait d'obstacle
+        self.free = array("i", range(cols * rows))
+        self.free_slot = array("i", range(cols * rows))
+
+    def index(self, position):
+        """ Indice de la case contenant la position [x, y] en pixels. """
+        return (position[1] // self.grid_size) * self.cols + position[0] // self.grid_size
+
+    def position(self, index):
+        """ Position [x, y] en pixels de la case d'indice index. """
+        return [(index % self.cols) * self.grid_size, (index // self.cols) * self.grid_size]
+
+    def _take(self, index):
+        # Retire la case de l'index des cases libres (échange avec la dernière)
+        slot = self.free_slot[index]
+        last = self.free.pop()
+        if last != index:
+            self.free[slot] = last
+            self.free_slot[last] = slot
+        self.free_slot[index] = -1
+
+    def _release(self, index):
+        self.free_slot[index] = len(self.free)
+        self.free.append(index)
+
+    def add_snake(self, index):
+        if self.cells[index] == 0:
+            self._take(index)
+        self.cells[index] += 1
+
+    def remove_snake(self, index):
+        self.cells[index] -= 1
+        if self.cells[index] == 0:
+            self._release(index)
+
+    def add_obstacle(self, index):
+        if self.cells[index] == 0:
+            self._take(index)
+        self.cells[index] |= self.OBSTACLE
+        self.obstacle_version += 1
+
+    def remove_obstacle(self, index):
+        if self.cells[index] & self.OBSTACLE:
+            self.obstacle_version += 1
+            self.cells[index] &= self.SNAKE_MASK
+            if self.cells[index] == 0:
+                self._release(index)
+
+    def add_obstacles(self, indices):
+        """ Ajoute beaucoup d'obstacles d'un coup (niveau généré) : l'index des cases libres est reconstruit une seule fois. """
+        cells = self.cells
+        for index in indices:
+            cells[index] |= self.OBSTACLE
+        self.free = array("i", compress(range(len(cells)), cells.translate(self._FREE_TABLE)))
+        free_slot = self.free_slot = array("i", [-1]) * len(cells)
+        for slot, index in enumerate(self.free):
+            free_slot[index] = slot
+        self.obstacle_version += 1
+
+    def is_free(self, index):
+        return self.cells[index] == 0
+
+    def is_obstacle(self, index):
+        return bool(self.cells[index] & self.OBSTACLE)
+
+    def snake_count(self, index):
+        return self.cells[index] & self.SNAKE_MASK
+
+    def neighbor(self, index, direction, wrap):
+        """ Case voisine dans une direction, ou None si on sort du plateau sans téléportation. """
+        x, y = index % self.cols, index // self.cols
+        if direction == "UP":
+            y -= 1
+        elif direction == "DOWN":
+            y += 1
+        elif direction == "LEFT":
+            x -= 1
+        else:
+            x += 1
+        if wrap:
+            x %= self.cols
+            y %= self.rows
+        elif x < 0 or x >= self.cols or y < 0 or y >= self.rows:
+            return None
+        return y * self.cols + x
+
+    def random_free_position(self, rng=random):
+        """ Position [x, y] d'une case libre tirée au hasard, ou None si le plateau est plein. """
+        if not self.free:
+            return None
+        return self.position(self.free[rng.randrange(len(self.free))])
+
+
+class CellView:
+    """ Vue en lecture seule d'une suite de cases (corps du serpent, obstacles d'un niveau généré).
+
+    Se parcourt comme l'ancienne liste : des positions [x, y] en pixels,
+    dans l'ordre des cases (la tête en premier pour le serpent).
+    """
+    __slots__ = ("_cells", "_board")
+
+    def __init__(self, cells, board):
+        self._cells = cells
+        self._board = board
+
+    def __iter__(self):
+        position = self._board.position
+        for index in self._cells:
+            yield position(index)
+
+    def __len__(self):
+        return len(self._cells)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return list(self)[i]
+        return self._board.position(self._cells[i])
+
+    def __contains__(self, position):
+        return self._board.index(position) in self._cells
+
+
+class Snake:
+    """ Le serpent, stocké comme une file d'indices de cases (tête à gauche).
+
+    move() et grow() sont en O(1) et n'allouent pas de liste : la tête est
+    ajoutée au début de la deque et la queue retirée à la fin.
+
+    Les virages demandés sont mis dans une petite file (turns) et move() en
+    consomme un par tour : deux touches pressées pendant le même tour
+    (HAUT puis GAUCHE) donnent deux virages au lieu d'un.
+    """
+    __slots__ = ("board", "cells", "direction", "turns", "teleported", "vacated")
+
+    def __init__(self, board=None, cells=None, direction="RIGHT"):
+        """ cells : cases du corps, tête en premier (par défaut le départ d'une partie en solo). """
+        self.board = board if board is not None else Board()
+        if cells is None:
+            cells = (self.board.index(position) for position in ([100, 100], [80, 100], [60, 100]))
+        self.cells = deque(cells)
+        for index in self.cells:
+            self.board.add_snake(index)
+        self.direction = direction
+        self.turns = deque()
+        self.teleported = False  # Vrai si le dernier déplacement a traversé un bord
+        self.vacated = None  # Case quittée par la queue au dernier déplacement
+
+    @property
+    def head(self):
+        """ Indice de la case de la tête. """
+        return self.cells[0]
+
+    @property
+    def body(self):
+        return CellView(self.cells, self.board)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def queue_turn(self, direction):
+        """ Mémorise un virage ; les demi-tours, les répétitions et l'excédent sont ignorés. """
+        last = self.turns[-1] if self.turns else self.direction
+        if direction == last or direction == OPPOSITE[last] or len(self.turns) >= TURN_BUFFER:
+            return False
+        self.turns.append(direction)
+        return True
+
+    def move(self, easy_mode, score):
+        self.teleported = False
+        if self.turns:
+            self.direction = self.turns.popleft()
+
+        board = self.board
+        cols, rows = board.cols, board.rows
+        x, y = self.cells[0] % cols, self.cells[0] // cols
+        if self.direction == "UP":
+            y -= 1
+        elif self.direction == "DOWN":
+            y += 1
+        elif self.direction == "LEFT":
+            x -= 1
+        elif self.direction == "RIGHT":
+            x += 1
+
+        # Gestion de la téléportation et réduction du score
+        teleported = False
+        if easy_mode:
+            if x < 0:
+                x = cols - 1
+                teleported = True
+            elif x >= cols:
+                x = 0
+                teleported = True
+            if y < 0:
+                y = rows - 1
+                teleported = True
+            elif y >= rows:
+                y = 0
+                teleported = True
+        else:  # Mode medium et hard -> Game over si on touche le bord
+            if x < 0 or x >= cols or y < 0 or y >= rows:
+                return "game_over", score
+        if teleported:
+            self.teleported = True
+            score = max(score - TELEPORT_PENALTY, 0)  # Réduction du score
+            if score <= 0:
+                return "game_over", score  # Fin du jeu si le score atteint 0
+
+        head = y * cols + x
+        self.cells.appendleft(head)
+        board.add_snake(head)
+        self.vacated = self.cells.pop()
+        board.remove_snake(self.vacated)
+        return "continue", score
+
+    def grow(self):
+        tail = self.cells[-1]
+        self.cells.append(tail)
+        self.board.add_snake(tail)
+
+    def check_collision(self, obstacles):
+        """ Vrai si la tête touche le corps ou un obstacle.
+
+        Les obstacles sont lus dans la grille du plateau, où
+        generate_obstacles les a enregistrés.
+        """
+        cell = self.board.cells[self.cells[0]]
+        return bool(cell & Board.OBSTACLE) or (cell & Board.SNAKE_MASK) > 1
+
+
+def generate_obstacles(level, snake, rng=random):
+    board = snake.board
+    grid_size = board.grid_size
+    obstacles = []
+
+    # Ajouter des murs sur les bords du jeu
+    if level in ["medium", "hard"]:
+        for x in range(0, board.width, grid_size):
+            obstacles.append([x, 0])
+            obstacles.append([x, board.height - grid_size])
+        for y in range(0, board.height, grid_size):
+            obstacles.append([0, y])
+            obstacles.append([board.width - grid_size, y])
+        for obstacle in obstacles:
+            board.add_obstacle(board.index(obstacle))
+
+    # Ajouter des obstacles aléatoires en plus des murs si niveau "hard"
+    if level == "hard":
+        for _ in range(10):
+            while True:
+                # Générer une position aléatoire
+                new_obstacle = [rng.randrange(1, board.cols - 1) * grid_size,
+                                rng.randrange(2, board.rows - 1) * grid_size]
+
+                # Vérifier si l'obstacle ne chevauche pas le serpent ou d'autres obstacles
+                index = board.index(new_obstacle)
+                if board.is_free(index):
+                    obstacles.append(new_obstacle)
+                    board.add_obstacle(index)
+                    break  # Si l'obstacle est valide, on sort de la boucle while
+
+    return obstacles
+
+
+def level_obstacles(preset, snake, seed, **params):
+    """ Obstacles d'un niveau généré par levels.py (depuis le cache s'il existe) ; renvoie leurs indices.
+
+    Le corps du serpent et les LEVEL_CLEARANCE cases devant sa tête restent
+    libres, et toutes les cases libres sont accessibles depuis la tête.
+    """
+    board = snake.board
+    keep = list(snake.cells)
+    index = snake.head
+    for _ in range(LEVEL_CLEARANCE):
+        index = board.neighbor(index, snake.direction, False)
+        if index is None:
+            break
+        keep.append(index)
+    cells = obstacle_cells(load_level(board.cols, board.rows, preset, seed, snake.head, keep, **params))
+    board.add_obstacles(cells)
+    return cells
+
+
+class Apple:
+    def __init__(self, snake, obstacles, special=False, rng=random, now=0.0):
+        self.special = special
+        self.rng = rng
+        self.position = self.get_valid_position(snake, obstacles)
+        self.time_limit = SPECIAL_APPLE_LIFETIME  # Durée de vie de la pomme spéciale en secondes
+        self.start_time = now  # Temps de jeu (en secondes) à l'apparition de la pomme
+        self.progress_bar_width = 100  # Largeur de la barre de progression
+        self.progress_bar_height = 10  # Hauteur de la barre de progression
+
+    def get_valid_position(self, snake, obstacles):
+        # Les obstacles sont déjà enregistrés dans la grille du plateau
+        # Retourner une position valide ou None si aucune position n'est disponible
+        return snake.board.random_free_position(self.rng)
+
+    def respawn(self, snake, obstacles):
+        new_position = self.get_valid_position(snake, obstacles)
+        if new_position:
+            self.position = new_position
+
+    def remaining(self, now):
+        """ Temps restant (en secondes) avant la disparition de la pomme. """
+        return self.time_limit - (now - self.start_time)
+
+
+class Game:
+    """ Une partie complète, pilotée tour par tour avec step(). """
+
+    def __init__(self, mode="chrono", difficulty="easy", seed=None, cols=COLS, rows=ROWS, level=None):
+        """ level : preset de levels.py (None : les obstacles habituels de la difficulté). """
+        self.mode = mode
+        self.difficulty = difficulty
+        self.level = level
+        self.easy_mode = (difficulty == "easy")  # La téléportation est activée uniquement en mode easy
+        # La graine est toujours connue : elle suffit, avec les directions, à rejouer la partie
+        self.seed = seed if seed is not None else random.getrandbits(63)
+        self.rng = random.Random(self.seed)
+        self.board = Board(cols, rows)
+        self.snake = Snake(self.board)
+        if level is None:
+            self.obstacles = generate_obstacles(difficulty, self.snake, self.rng)
+        else:
+            # Le niveau a son propre générateur : le tirage des pommes ne dépend pas du cache
+            self.obstacles = CellView(level_obstacles(level, self.snake, self.seed), self.board)
+        self.apple = Apple(self.snake, self.obstacles, rng=self.rng)
+        self.special_apple = None
+        self.score = 0
+        self.speed = tick_rate(self.score)
+        self.elapsed = 0.0  # Temps de jeu écoulé en secondes
+        self.ticks = 0
+        self.state = "continue"
+        self.end_reason = None  # "wall", "teleport", "collision" ou "time_up"
+        self.events = []
+        # Cases modifiées depuis la dernière lecture, pour un affichage
+        # incrémental ; None tant que personne ne les suit
+        self.changes = None
+        self.profiler = None  # profiler.FrameProfiler qui mesure les phases du tour (F3 en jeu)
+
+        if mode == "chrono":
+            self.time_limit, self.victory_score = CHRONO_SETTINGS[difficulty]
+        else:
+            self.time_limit, self.victory_score = None, None
+
+    def snapshot(self):
+        """ Copie de l'état de la partie, générateur aléatoire compris, à reprendre avec restore().
+
+        Les obstacles ne changent pas pendant une partie : ils ne sont pas copiés.
+        """
+        board, snake = self.board, self.snake
+        return {
+            "rng": self.rng.getstate(),
+            "cells": bytes(board.cells),
+            "free": array("i", board.free),
+            "free_slot": array("i", board.free_slot),
+            "snake": tuple(snake.cells),
+            "direction": snake.direction,
+            "turns": tuple(snake.turns),
+            "vacated": snake.vacated,
+            "apple": copy.copy(self.apple),
+            "special_apple": copy.copy(self.special_apple),
+            "score": self.score,
+            "speed": self.speed,
+            "elapsed": self.elapsed,
+            "ticks": self.ticks,
+            "state": self.state,
+            "end_reason": self.end_reason,
+        }
+
+    def restore(self, snapshot):
+        """ Remet la partie dans l'état d'un snapshot() pris sur cette même partie.
+
+        L'affichage doit ensuite être refait en entier (GameRenderer.invalidate).
+        """
+        board, snake = self.board, self.snake
+        self.rng.setstate(snapshot["rng"])
+        board.cells[:] = snapshot["cells"]
+        board.free = array("i", snapshot["free"])
+        board.free_slot = array("i", snapshot["free_slot"])
+        snake.cells = deque(snapshot["snake"])
+        snake.direction = snapshot["direction"]
+        snake.turns = deque(snapshot["turns"])
+        snake.vacated = snapshot["vacated"]
+        snake.teleported = False
+        # Les pommes gardent le générateur de la partie (copie superficielle)
+        self.apple = copy.copy(snapshot["apple"])
+        self.special_apple = copy.copy(snapshot["special_apple"])
+        for name in ("score", "speed", "elapsed", "ticks", "state", "end_reason"):
+            setattr(self, name, snapshot[name])
+        self.events = []
+        if self.changes is not None:
+            self.changes.clear()
+
+    def time_remaining(self):
+        """ Secondes entières restantes en mode chrono (None en mode classique). """
+        if self.time_limit is None:
+            return None
+        return self.time_limit - int(self.elapsed)
+
+    def special_apple_remaining(self):
+        """ Temps restant de la pomme spéciale, ou None s'il n'y en a pas. """
+        if self.special_apple is None:
+            return None
+        return self.special_apple.remaining(self.elapsed)
+
+    def _end(self, state, reason):
+        self.state = state
+        self.end_reason = reason
+        self.events.append(state)
+
+    def step(self, action=None, dt=None):
+        """ Avance la partie d'un tour.
+
+        action est une direction ("UP", "DOWN", "LEFT", "RIGHT"), ajoutée à la
+        file des virages du serpent, ou None pour garder la direction courante ;
+        dt est le temps écoulé depuis le tour
+        précédent (par défaut la durée d'un tour à la vitesse du jeu).
+        """
+        if self.state != "continue":
+            return StepResult(self.state, self.score, [])
+        self.events = []
+        if self.changes is not None:
+            apples_before = self._apple_cells()
+        self.elapsed += (1 / self.speed) if dt is None else dt
+        self.ticks += 1
+        if action is not None:
+            self.snake.queue_turn(action)
+
+        # Vérifier si le temps est écoulé
+        if self.time_limit is not None and self.time_remaining() <= 0:
+            if self.score >= self.victory_score:
+                self._end("victory", "time_up")
+            else:
+                self._end("game_over", "time_up")
+            return StepResult(self.state, self.score, self.events)
+
+        game_state, self.score = self.snake.move(self.easy_mode, self.score)
+        if self.profiler is not None:
+            self.profiler.mark("move")
+        if self.snake.teleported:
+            self.events.append("teleport")
+        if game_state == "game_over":
+            self._end("game_over", "teleport" if self.snake.teleported else "wall")
+            return StepResult(self.state, self.score, self.events)
+
+        if self.changes is not None:
+            self.changes.add(self.snake.head)
+            self.changes.add(self.snake.vacated)
+
+        if self.special_apple is not None and self.special_apple_remaining() <= 0:
+            self.special_apple = None  # La pomme spéciale disparaît
+
+        head = self.snake.head
+        if self.apple.position is not None and head == self.board.index(self.apple.position):
+            self.snake.grow()
+            self.score += APPLE_POINTS
+            self.apple.respawn(self.snake, self.obstacles)
+            self.events.append("apple")
+            if self.score % 100 == 0 or (self.special_apple is None and self.rng.random() < SPECIAL_APPLE_CHANCE):
+                self.special_apple = Apple(self.snake, self.obstacles, special=True,
+                                           rng=self.rng, now=self.elapsed)
+
+        if self.special_apple and self.special_apple.position is not None \
+                and head == self.board.index(self.special_apple.position):
+            self.snake.grow()
+            self.snake.grow()
+            self.score += SPECIAL_APPLE_POINTS
+            self.special_apple = None
+            self.events.append("special_apple")
+        if self.profiler is not None:
+            self.profiler.mark("apples")
+
+        if self.snake.check_collision(self.obstacles):
+            self._end("game_over", "collision")
+        if self.profiler is not None:
+            self.profiler.mark("collision")
+        self.speed = tick_rate(self.score)
+
+        if self.changes is not None:
+            apples_after = self._apple_cells()
+            if apples_after != apples_before:
+                self.changes.update(cell for cell in apples_before + apples_after if cell is not None)
+
+        return StepResult(self.state, self.score, self.events)
+
+    def _apple_cells(self):
+        """ Cases de la pomme et de la pomme spéciale (None si absente). """
+        cells = []
+        for apple in (self.apple, self.special_apple):
+            if apple is None or apple.position is None:
+                cells.append(None)
+            else:
+                cells.append(self.board.index(apple.position))
+        return cells
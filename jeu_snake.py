@@ -1,29 +1,25 @@
-import pygame
-import random
-import pygame.mixer
+import argparse
 import os
+import pygame
 import sys
 import time
-
-def resource_path(relative_path):
-    """Renvoie le chemin absolu, compatible avec PyInstaller."""
-    try:
-        base_path = sys._MEIPASS  # quand c'est packagé
-    except AttributeError:
-        base_path = os.path.abspath(".")  # en mode normal
-    return os.path.join(base_path, relative_path)
-
-# Initialisation de Pygame
+from functools import partial
+
+import assets
+from assets import resource_path
+from arena import Arena, ArenaBots
+from autopilot import Autopilot
+from profiler import FrameProfiler, trace_dir
+from engine import WIDTH, HEIGHT, COLS, ROWS, BASE_SPEED, Game, GameClock
+from levels import PRESETS
+from renderer import ArenaRenderer, GameRenderer, ProgressBar
+from replay import Replay, save_recent
+from scores import ScoreStore
+
+# Initialisation de Pygame (les sons sont chargés en arrière-plan par assets.preload_sounds)
 pygame.init()
-pygame.mixer.init()
-teleport_sound = pygame.mixer.Sound(resource_path("sons/teleport.wav"))
-son_game_over = pygame.mixer.Sound(resource_path("sons/game_over.mp3"))
-son_victoire = pygame.mixer.Sound(resource_path("sons/victory.mp3"))
-son_pomme = pygame.mixer.Sound(resource_path("sons/apple_munch.mp3"))
-
-# Définition des constantes
-WIDTH, HEIGHT = 800, 600
-GRID_SIZE=20
+
+# Définition des couleurs (les dimensions du plateau viennent du moteur)
 WHITE = (255, 255, 255)
 GREEN = (0, 255, 0)
 RED = (255, 0, 0)
@@ -34,170 +30,69 @@ GRAY = (169, 169, 169)# Obstacles
 DARK_RED = (200, 0, 0)
 DARK_GREEN = (0, 200, 0)
 DARK_YELLOW=(204, 204, 0)
+DARK_ORANGE = (204, 132, 0)
 
 # Création de la fenêtre
 display = pygame.display.set_mode((WIDTH, HEIGHT), pygame.FULLSCREEN)
 pygame.display.set_caption("Snake Game")
 clock = pygame.time.Clock()
-font = pygame.font.Font(None, 36)
+font = assets.font("hud")
+
+
+def refresh_rate():
+    """ Fréquence de rafraîchissement de l'écran (60 Hz si elle est inconnue). """
+    try:
+        rates = pygame.display.get_desktop_refresh_rates()
+    except (AttributeError, pygame.error):
+        rates = []
+    return rates[0] if rates and rates[0] > 0 else 60
+
+
+FPS = refresh_rate()  # L'affichage et le clavier suivent l'écran, pas la vitesse du serpent
+MAX_TICKS_PER_FRAME = 5  # Au-delà, la simulation laisse tomber le retard (fenêtre déplacée...)
+# Taille du plateau en cases (option --board) ; s'il dépasse de l'écran,
+# la caméra du renderer suit la tête du serpent
+BOARD_SIZE = (COLS, ROWS)
+LEVEL = None  # Preset de niveau généré (option --level) ; None : obstacles de la difficulté
+RENDERER = GameRenderer  # Classe d'affichage des parties (option --renderer)
+SHOW_STARTUP_TIME = False  # Affiche le temps jusqu'au premier menu sur stderr (option --startup-time)
+
+# Base des scores, ouverte au premier besoin ; les anciens fichiers
+# highscore/*.txt y sont importés la première fois
+_score_store = None
+
+
+def score_store():
+    global _score_store
+    if _score_store is None:
+        _score_store = ScoreStore(legacy_dir=resource_path("highscore"))
+    return _score_store
 
-# Fichier du high score
-HIGH_SCORE_FILE = "highscore.txt"
 
 def get_high_score(difficulty, mode="chrono"):
-    filename = resource_path(f"highscore/highscore_{mode}_{difficulty}.txt")
-    if os.path.exists(filename):
-        with open(filename, "r") as file:
-            return int(file.read().strip())
-    return 0
+    return score_store().best(mode, difficulty)  # Lu en mémoire, sans accès disque
 
 def save_high_score(score, difficulty, mode="chrono"):
-    high_score = get_high_score(difficulty, mode)
-    filename = resource_path(f"highscore/highscore_{mode}_{difficulty}.txt")
-    if score > high_score:
-        with open(filename, "w") as file:
-            file.write(str(score))
-
-
-def draw_score(surface, score, high_score, difficulty):
-    score_text = font.render(f"Score: {score}", True, WHITE)
-    high_score_text = font.render(f"High Score ({difficulty}): {high_score}", True, WHITE)
-    surface.blit(score_text, (WIDTH // 3 - score_text.get_width() // 2, 20))
-    surface.blit(high_score_text, (WIDTH - high_score_text.get_width() - 20, 20))
-
-def draw_scores(surface, score, high_score):
-    score_text = font.render(f"Score: {score}", True, WHITE)
-    high_score_text = font.render(f"High Score: {high_score}", True, WHITE)
-    surface.blit(score_text, (WIDTH // 2 - score_text.get_width() // 2, 20))
-    surface.blit(high_score_text, (WIDTH - high_score_text.get_width() - 20, 20))
-
-
-
-class Snake:
-    def __init__(self):
-        self.body = [[100, 100], [80, 100], [60, 100]]
-        self.direction = "RIGHT"
-        self.next_direction = "RIGHT"
-
-    def move(self, easy_mode, score):
-        if self.next_direction:
-            opposite = {"UP": "DOWN", "DOWN": "UP", "LEFT": "RIGHT", "RIGHT": "LEFT"}
-            if self.next_direction != opposite[self.direction]:
-                self.direction = self.next_direction
-
-        head = self.body[0][:]
-        if self.direction == "UP":
-            head[1] -= GRID_SIZE
-        elif self.direction == "DOWN":
-            head[1] += GRID_SIZE
-        elif self.direction == "LEFT":
-            head[0] -= GRID_SIZE
-        elif self.direction == "RIGHT":
-            head[0] += GRID_SIZE
-
-        # Gestion de la téléportation et réduction du score
-        teleported = False
-        if easy_mode:
-            if head[0] < 0:
-                head[0] = WIDTH - GRID_SIZE
-                teleported = True
-            elif head[0] >= WIDTH:
-                head[0] = 0
-                teleported = True
-            if head[1] < 0:
-                head[1] = HEIGHT - GRID_SIZE
-                teleported = True
-            elif head[1] >= HEIGHT:
-                head[1] = 0
-                teleported = True
-        else:  # Mode medium et hard -> Game over si on touche le bord
-            if head[0] < 0 or head[0] >= WIDTH or head[1] < 0 or head[1] >= HEIGHT:
-                game_state="game_over"
-                return game_state, score
-        if teleported:
-            pygame.mixer.Sound.play(teleport_sound)  # Joue le son
-            score -= 10  # Réduction du score
-            if score < 0:
-                score = 0
-            if score <= 0:
-                game_state = "game_over"
-                return game_state, score  # Fin du jeu si le score atteint 0
-
-        self.body.insert(0, head)
-        self.body.pop()
-        return "continue", score
-
-    def grow(self):
-        self.body.append(self.body[-1])
-
-    def check_collision(self, obstacles):
-        head = self.body[0]
-        return head in self.body[1:] or head in obstacles
-
-    def draw(self, surface):
-        for segment in self.body:
-            pygame.draw.rect(surface, GREEN, pygame.Rect(segment[0], segment[1], GRID_SIZE, GRID_SIZE))
-
-def generate_obstacles(level, snake):
-    obstacles = []
-
-    # Ajouter des murs sur les bords du jeu
-    if level in ["medium", "hard"]:
-        for x in range(0, WIDTH, GRID_SIZE):
-            obstacles.append([x, 0])
-            obstacles.append([x, HEIGHT - GRID_SIZE])
-        for y in range(0, HEIGHT, GRID_SIZE):
-            obstacles.append([0, y])
-            obstacles.append([WIDTH - GRID_SIZE, y])
-
-    # Ajouter des obstacles aléatoires en plus des murs si niveau "hard"
-    if level == "hard":
-        for _ in range(10):
-            while True:
-                # Générer une position aléatoire
-                new_obstacle = [random.randrange(1, (WIDTH // GRID_SIZE) - 1) * GRID_SIZE,
-                                random.randrange(2, (HEIGHT // GRID_SIZE) - 1) * GRID_SIZE]
-
-                # Vérifier si l'obstacle ne chevauche pas la tête du serpent ou d'autres obstacles
-                if new_obstacle not in snake.body and new_obstacle not in obstacles:
-                    obstacles.append(new_obstacle)
-                    break  # Si l'obstacle est valide, on sort de la boucle while
-
-    return obstacles
-
-class Apple:
-    def __init__(self, snake, obstacles, special=False):
-        self.special = special
-        self.color = ORANGE if special else RED
-        self.position = self.get_valid_position(snake, obstacles)
-        self.time_limit = 10  # Durée de vie de la pomme spéciale en secondes
-        self.start_time = pygame.time.get_ticks()  # Temps initial de la pomme spéciale
-        self.progress_bar_width = 100  # Largeur de la barre de progression
-        self.progress_bar_height = 10  # Hauteur de la barre de progression
-
-    def get_valid_position(self, snake, obstacles):
-        available_positions = [
-            [x, y]
-            for x in range(0, WIDTH, GRID_SIZE)
-            for y in range(0, HEIGHT, GRID_SIZE)
-            if [x, y] not in snake.body and [x, y] not in obstacles  # Vérification des obstacles
-        ]
-
-        # Retourner une position valide ou None si aucune position n'est disponible
-        return random.choice(available_positions) if available_positions else None
-
-    def respawn(self, snake, obstacles):
-        new_position = self.get_valid_position(snake, obstacles)
-        if new_position:
-            self.position = new_position
-
-    def draw(self, surface):
-        if self.special:
-            pygame.draw.polygon(surface, self.color, [(self.position[0] + GRID_SIZE // 2, self.position[1]),
-                                                       (self.position[0], self.position[1] + GRID_SIZE),
-                                                       (self.position[0] + GRID_SIZE, self.position[1] + GRID_SIZE)])
-        else:
-            pygame.draw.circle(surface, self.color, (self.position[0] + GRID_SIZE // 2, self.position[1] + GRID_SIZE // 2), GRID_SIZE // 2)
+    return score_store().add(mode, difficulty, score)
+
+
+def draw_score(renderer, score, high_score, difficulty):
+    renderer.set_text("score", f"Score: {score}", font, WHITE, lambda width: (WIDTH // 3 - width // 2, 20))
+    renderer.set_text("high_score", f"High Score ({difficulty}): {high_score}", font, WHITE,
+                      lambda width: (WIDTH - width - 20, 20))
+
+def draw_scores(renderer, score, high_score):
+    renderer.set_text("score", f"Score: {score}", font, WHITE, lambda width: (WIDTH // 2 - width // 2, 20))
+    renderer.set_text("high_score", f"High Score: {high_score}", font, WHITE,
+                      lambda width: (WIDTH - width - 20, 20))
+
+
+def play_event_sounds(events):
+    """ Joue les sons correspondant aux événements d'un tour du moteur. """
+    if "teleport" in events:
+        assets.play_sound("teleport")
+    if "apple" in events or "special_apple" in events:
+        assets.play_sound("apple")
 
 def draw_button(text, x, y, width, height, color, hover_color):
     """ Dessine un bouton et détecte si la souris est dessus. """
@@ -205,32 +100,24 @@ def draw_button(text, x, y, width, height, color, hover_color):
     button_color = hover_color if x <= mouse_x <= x + width and y <= mouse_y <= y + height else color
 
     pygame.draw.rect(display, button_color, (x, y, width, height))
-    text_surf = font.render(text, True, BLACK)
+    text_surf = assets.render_text(font, text, BLACK)
     text_rect = text_surf.get_rect(center=(x + width // 2, y + height // 2))
     display.blit(text_surf, text_rect)
 
     return (x <= mouse_x <= x + width) and (y <= mouse_y <= y + height)
 
 
+def draw_main_menu_layer(surface):
+    # Titre centré
+    assets.draw_shadowed_text(surface, assets.font("title"), "Jeu Snake",
+                              (WIDTH // 2, HEIGHT // 4), 5)  # Ombre du texte
+
+
 def main_menu():
     """ Affiche le menu principal """
     while True:
-        # Fond dégradé amélioré
-        for i in range(HEIGHT):
-            color = (
-                int(0 + (0 - 0) * i / HEIGHT),  # Bleu amélioré
-                int(0 + (50 - 0) * i / HEIGHT),
-                int(100 + (255 - 100) * i / HEIGHT)  # Bleu plus visible
-            )
-            pygame.draw.line(display, color, (0, i), (WIDTH, i))
-
-        # Titre centré
-        title_font = pygame.font.SysFont("Arial", 60, bold=True)
-        title_surf = title_font.render("Jeu Snake", True, WHITE)
-        title_shadow = title_font.render("Jeu Snake", True, (50, 50, 50))
-        title_rect = title_surf.get_rect(center=(WIDTH // 2, HEIGHT // 4))
-        display.blit(title_shadow, (title_rect.x + 5, title_rect.y + 5))  # Ombre du texte
-        display.blit(title_surf, title_rect)
+        # Fond dégradé et titre, construits une seule fois
+        display.blit(assets.static_layer("main_menu", draw_main_menu_layer), (0, 0))
 
         # Boutons centrés dynamiquement
         button_width, button_height = 200, 60
@@ -241,6 +128,7 @@ def main_menu():
         credits_hover = draw_button("Crédits", WIDTH // 2 - button_width // 2, HEIGHT // 2 + 120, button_width,
                                     button_height, YELLOW, DARK_YELLOW)
         pygame.display.update()
+        assets.report_first_frame(SHOW_STARTUP_TIME)  # Temps de démarrage, mesuré au premier menu affiché
 
         # Gestion des événements
         for event in pygame.event.get():
@@ -249,34 +137,24 @@ def main_menu():
                 sys.exit()
             if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                 if play_hover:
-                    return mode_menu()  # Lancer le menu des difficultés
+                    return mode_menu  # Lancer le menu des difficultés
                 if credits_hover:
-                    return credits_page()
+                    return credits_page
                 if quit_hover:
                     pygame.quit()
                     sys.exit()
+        clock.tick(assets.MENU_FPS)
+
+def draw_difficulty_menu_layer(surface):
+    # Titre du menu
+    assets.draw_shadowed_text(surface, assets.font("title"), "Choisissez la difficulté",
+                              (WIDTH // 2, HEIGHT // 4 - 100), 5)  # Ombre du texte
+
 
 def difficulty_menu():
     """ Affiche le menu de sélection de difficulté """
     while True:
-        display.fill(BLACK)
-
-        # Fond dégradé amélioré
-        for i in range(HEIGHT):
-            color = (
-                int(0 + (0 - 0) * i / HEIGHT),  # Bleu amélioré
-                int(0 + (50 - 0) * i / HEIGHT),
-                int(100 + (255 - 100) * i / HEIGHT)  # Bleu plus visible
-            )
-            pygame.draw.line(display, color, (0, i), (WIDTH, i))
-
-        # Titre du menu
-        title_font = pygame.font.SysFont("Arial", 60, bold=True)
-        title_surf = title_font.render("Choisissez la difficulté", True, WHITE)
-        title_shadow = title_font.render("Choisissez la difficulté", True, (50, 50, 50))
-        title_rect = title_surf.get_rect(center=(WIDTH // 2, HEIGHT // 4-100))
-        display.blit(title_shadow, (title_rect.x + 5, title_rect.y + 5))  # Ombre du texte
-        display.blit(title_surf, title_rect)
+        display.blit(assets.static_layer("difficulty_menu", draw_difficulty_menu_layer), (0, 0))
 
         # Boutons de difficulté avec animation au survol
         easy_hover = draw_button("Facile", 300, 150, 200, 60, GREEN, (0, 200, 0))
@@ -291,62 +169,81 @@ def difficulty_menu():
                 sys.exit()
             if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:  # Clic gauche
                 if easy_hover:
-                    return main("easy")  # Lancer le jeu en mode facile
+                    return partial(main, "easy")  # Lancer le jeu en mode facile
                 if medium_hover:
-                    return main("medium")  # Lancer le jeu en mode moyen
+                    return partial(main, "medium")  # Lancer le jeu en mode moyen
                 if hard_hover:
-                    return main("hard")  # Lancer le jeu en mode difficile
+                    return partial(main, "hard")  # Lancer le jeu en mode difficile
                 if back_hover:
-                    return mode_menu()  # Retour au menu principal
+                    return mode_menu  # Retour au menu principal
 
         pygame.display.flip()
+        clock.tick(assets.MENU_FPS)
 
 
 # Fonction d'affichage du compte à rebours
 def show_pause_screen():
-    font = pygame.font.SysFont('Arial', 48)
-    message = font.render("PAUSE", True, (255, 255, 255))
+    """ Affiche "PAUSE" et attend, sans occuper le processeur, un nouvel appui sur Espace. """
+    message = assets.render_text(assets.font("pause"), "PAUSE", (255, 255, 255))
     (display.fill((0, 0, 0)))  # Fond noir
     display.blit(message, (WIDTH // 2 - message.get_width() // 2, HEIGHT // 2 - 50))
     pygame.display.update()
+    while True:
+        event = pygame.event.wait()  # Le processus dort jusqu'au prochain événement
+        if event.type == pygame.QUIT:
+            pygame.quit()
+            sys.exit()
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
+            return
+        if event.type == pygame.VIDEOEXPOSE:
+            pygame.display.update()
+
+
+def pause_game(game_clock, renderer):
+    """ Met la partie en pause : le temps de jeu (chrono, pommes spéciales) est arrêté. """
+    game_clock.pause()
+    PROFILER.skip()  # L'image de la pause n'a pas de sens dans la trace
+    show_pause_screen()
+    game_clock.resume()
+    renderer.invalidate()  # L'écran de pause a recouvert le plateau
+
+
+def end_screen_layer(message, score, high_score):
+    """ Fond des écrans de fin : dégradé, message, score et high score.
+
+    Le score ne change pas tant que l'écran est affiché : la couche est
+    construite une fois à l'ouverture de l'écran.
+    """
+    surface = assets.gradient(*assets.MENU_GRADIENT).copy()
+
+    # Affichage du message de fin
+    message_text = assets.render_text(font, message, WHITE)
+    message_rect = message_text.get_rect(center=(WIDTH // 2, HEIGHT // 4))
+    surface.blit(message_text, message_rect)
+
+    # Affichage du score et high score avec animation légère
+    score_text = assets.render_text(font, f"Score: {score}", WHITE)
+    high_score_text = assets.render_text(font, f"High Score: {high_score}", WHITE)
+
+    # Positionnement centré
+    score_rect = score_text.get_rect(center=(WIDTH // 2, HEIGHT // 2))
+    high_score_rect = high_score_text.get_rect(center=(WIDTH // 2, HEIGHT // 2 + 50))
+
+    # Affichage des textes avec fond
+    pygame.draw.rect(surface, (50, 50, 50), score_rect.inflate(20, 20), border_radius=10)
+    pygame.draw.rect(surface, (50, 50, 50), high_score_rect.inflate(20, 20), border_radius=10)
+    surface.blit(score_text, score_rect)
+    surface.blit(high_score_text, high_score_rect)
+    return surface
 
 
 def game_over_screen(score, high_score, difficulty):
     """ Affiche l'écran de fin de jeu avec score, high score et difficulté """
-    pygame.mixer.music.stop()  # Arrêter la musique de fond
-    son_game_over.play(0)
+    assets.stop_music()  # Arrêter la musique de fond
+    assets.play_sound("game_over")
+    background = end_screen_layer("GAME OVER", score, high_score)
     while True:
-        display.fill(BLACK)
-
-        # Fond dégradé amélioré
-        for i in range(HEIGHT):
-            color = (
-                int(0 + (0 - 0) * i / HEIGHT),  # Bleu amélioré
-                int(0 + (50 - 0) * i / HEIGHT),
-                int(100 + (255 - 100) * i / HEIGHT)  # Bleu plus visible
-            )
-            pygame.draw.line(display, color, (0, i), (WIDTH, i))
-
-        # Affichage du message de Game Over
-        game_over_text = font.render("GAME OVER", True, WHITE)
-        game_over_rect = game_over_text.get_rect(center=(WIDTH // 2, HEIGHT // 4))
-        display.blit(game_over_text, game_over_rect)
-
-        # Affichage du score et high score avec animation légère
-        score_text = font.render(f"Score: {score}", True, WHITE)
-        high_score_text = font.render(f"High Score: {high_score}", True, WHITE)
-
-        # Positionnement centré
-        score_rect = score_text.get_rect(center=(WIDTH // 2, HEIGHT // 2))
-        high_score_rect = high_score_text.get_rect(center=(WIDTH // 2, HEIGHT // 2 + 50))
-
-        # Affichage des textes
-        pygame.draw.rect(display, (50, 50, 50), score_rect.inflate(20, 20), border_radius=10)
-        pygame.draw.rect(display, (50, 50, 50), high_score_rect.inflate(20, 20), border_radius=10)
-
-        # Affichage des textes au-dessus des rectangles
-        display.blit(score_text, score_rect)
-        display.blit(high_score_text, high_score_rect)
+        display.blit(background, (0, 0))
 
         # Création des boutons avec un effet visuel
         replay_hover = draw_button("Rejouer", 300, 400, 200, 60, GREEN, (0, 200, 0))
@@ -359,49 +256,24 @@ def game_over_screen(score, high_score, difficulty):
                 sys.exit()
             if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:  # Clic gauche
                 if replay_hover:
-                    return main(difficulty)  # Relancer la partie avec la même difficulté
+                    return partial(main, difficulty)  # Relancer la partie avec la même difficulté
                 if difficulty_hover:
-                    return difficulty_menu()  # Retour au menu de sélection de difficulté
+                    return difficulty_menu  # Retour au menu de sélection de difficulté
 
 
         pygame.display.flip()
+        clock.tick(assets.MENU_FPS)
 
-def game_over_screen2(score, high_score, difficulty):
-    """ Affiche l'écran de fin de jeu avec score, high score et difficulté """
-    pygame.mixer.music.stop()  # Arrêter la musique de fond
-    son_game_over.play(0)
+def game_over_screen2(score, high_score, difficulty, again=None):
+    """ Affiche l'écran de fin de jeu avec score, high score et difficulté
+
+    again est l'écran lancé par "Rejouer" (par défaut le mode Classic).
+    """
+    assets.stop_music()  # Arrêter la musique de fond
+    assets.play_sound("game_over")
+    background = end_screen_layer("GAME OVER", score, high_score)
     while True:
-        display.fill(BLACK)
-
-        # Fond dégradé amélioré
-        for i in range(HEIGHT):
-            color = (
-                int(0 + (0 - 0) * i / HEIGHT),  # Bleu amélioré
-                int(0 + (50 - 0) * i / HEIGHT),
-                int(100 + (255 - 100) * i / HEIGHT)  # Bleu plus visible
-            )
-            pygame.draw.line(display, color, (0, i), (WIDTH, i))
-
-        # Affichage du message de Game Over
-        game_over_text = font.render("GAME OVER", True, WHITE)
-        game_over_rect = game_over_text.get_rect(center=(WIDTH // 2, HEIGHT // 4))
-        display.blit(game_over_text, game_over_rect)
-
-        # Affichage du score et high score avec animation légère
-        score_text = font.render(f"Score: {score}", True, WHITE)
-        high_score_text = font.render(f"High Score: {high_score}", True, WHITE)
-
-        # Positionnement centré
-        score_rect = score_text.get_rect(center=(WIDTH // 2, HEIGHT // 2))
-        high_score_rect = high_score_text.get_rect(center=(WIDTH // 2, HEIGHT // 2 + 50))
-
-        # Affichage des textes
-        pygame.draw.rect(display, (50, 50, 50), score_rect.inflate(20, 20), border_radius=10)
-        pygame.draw.rect(display, (50, 50, 50), high_score_rect.inflate(20, 20), border_radius=10)
-
-        # Affichage des textes au-dessus des rectangles
-        display.blit(score_text, score_rect)
-        display.blit(high_score_text, high_score_rect)
+        display.blit(background, (0, 0))
 
         # Création des boutons avec un effet visuel
         replay_hover = draw_button("Rejouer", 300, 400, 200, 60, GREEN, (0, 200, 0))
@@ -414,47 +286,21 @@ def game_over_screen2(score, high_score, difficulty):
                 sys.exit()
             if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:  # Clic gauche
                 if replay_hover:
-                    return classic_mode("easy")  # Relancer la partie avec la même difficulté
+                    return again or partial(classic_mode, "easy")  # Relancer la partie avec la même difficulté
                 if difficulty_hover:
-                    return mode_menu()  # Retour au menu de sélection de difficulté
+                    return mode_menu  # Retour au menu de sélection de difficulté
 
 
         pygame.display.flip()
+        clock.tick(assets.MENU_FPS)
 
 def victory_screen(score, high_score, difficulty):
-    pygame.mixer.music.stop()  # Arrêter la musique de fond
-    son_victoire.play(0)
     """ Affiche l'écran de victoire avec score, high score et difficulté """
+    assets.stop_music()  # Arrêter la musique de fond
+    assets.play_sound("victory")
+    background = end_screen_layer("Bravo ! Tu as mangé ton chemin jusqu'à la gloire !", score, high_score)
     while True:
-        display.fill(BLACK)
-
-        # Fond dégradé amélioré
-        for i in range(HEIGHT):
-            color = (
-                int(0 + (0 - 0) * i / HEIGHT),  # Bleu amélioré
-                int(0 + (50 - 0) * i / HEIGHT),
-                int(100 + (255 - 100) * i / HEIGHT)  # Bleu plus visible
-            )
-            pygame.draw.line(display, color, (0, i), (WIDTH, i))
-
-        # Affichage du message de victoire
-        victory_text = font.render("Bravo ! Tu as mangé ton chemin jusqu'à la gloire !", True, WHITE)
-        victory_rect = victory_text.get_rect(center=(WIDTH // 2, HEIGHT // 4))
-        display.blit(victory_text, victory_rect)
-
-        # Affichage du score et high score avec animation légère
-        score_text = font.render(f"Score: {score}", True, WHITE)
-        high_score_text = font.render(f"High Score: {high_score}", True, WHITE)
-
-        # Positionnement centré
-        score_rect = score_text.get_rect(center=(WIDTH // 2, HEIGHT // 2))
-        high_score_rect = high_score_text.get_rect(center=(WIDTH // 2, HEIGHT // 2 + 50))
-
-        # Affichage des textes avec fond
-        pygame.draw.rect(display, (50, 50, 50), score_rect.inflate(20, 20), border_radius=10)
-        pygame.draw.rect(display, (50, 50, 50), high_score_rect.inflate(20, 20), border_radius=10)
-        display.blit(score_text, score_rect)
-        display.blit(high_score_text, high_score_rect)
+        display.blit(background, (0, 0))
 
         # Création des boutons avec un effet visuel
         replay_hover = draw_button("Rejouer", 300, 400, 200, 60, GREEN, (0, 200, 0))
@@ -467,11 +313,34 @@ def victory_screen(score, high_score, difficulty):
                 sys.exit()
             if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:  # Clic gauche
                 if replay_hover:
-                    return main(difficulty)  # Relancer la partie avec la même difficulté
+                    return partial(main, difficulty)  # Relancer la partie avec la même difficulté
                 if difficulty_hover:
-                    return difficulty_menu()  # Retour au menu de sélection de difficulté
+                    return difficulty_menu  # Retour au menu de sélection de difficulté
 
         pygame.display.flip()
+        clock.tick(assets.MENU_FPS)
+
+
+CREDITS_TEXTS = [
+    "Université de Djibouti - Faculté de Science",
+    "Filière: Informatique - Projet tutoré 2024/2025",
+    "Groupe 33: Affi Hassan, Arafo Elmi, Souhaib Ahmed,",
+    "Izoudine Bobekir, Med Moumine",
+    "Prof encadreur: Issa Ali Isse"
+]
+
+
+def draw_credits_layer(surface):
+    # Titre stylisé avec ombre accentuée
+    assets.draw_shadowed_text(surface, assets.font("credits_title"), "Crédits du Projet",
+                              (WIDTH // 2, HEIGHT // 6), 6)
+
+    # Informations Universitaires stylisées
+    info_font = assets.font("credits")  # Texte plus grand
+    y_offset = 200
+    for text in CREDITS_TEXTS:
+        assets.draw_shadowed_text(surface, info_font, text, (WIDTH // 2, y_offset), 4, shadow_color=(30, 30, 30))
+        y_offset += 50  # Plus d'espacement pour la lisibilité
 
 
 # Fonction pour afficher les crédits
@@ -479,45 +348,7 @@ def credits_page():
     """ Affiche les informations universitaires avec un meilleur design """
     running = True
     while running:
-        display.fill((0, 0, 0))  # Fond noir avant d'appliquer le dégradé
-
-        # Dégradé de fond amélioré
-        for i in range(HEIGHT):
-            color = (
-                int(0 + (30 - 0) * i / HEIGHT),
-                int(0 + (80 - 0) * i / HEIGHT),
-                int(120 + (255 - 120) * i / HEIGHT)
-            )
-            pygame.draw.line(display, color, (0, i), (WIDTH, i))
-
-        # Titre stylisé avec ombre
-        title_font = pygame.font.SysFont("Arial", 70, bold=True)
-        title_surf = title_font.render("Crédits du Projet", True, WHITE)
-        title_shadow = title_font.render("Crédits du Projet", True, (50, 50, 50))
-
-        title_rect = title_surf.get_rect(center=(WIDTH // 2, HEIGHT // 6))
-        display.blit(title_shadow, (title_rect.x + 6, title_rect.y + 6))  # Ombre accentuée
-        display.blit(title_surf, title_rect)
-
-        # Informations Universitaires stylisées
-        info_font = pygame.font.SysFont("Arial", 35)  # Texte plus grand
-        info_texts = [
-            "Université de Djibouti - Faculté de Science",
-            "Filière: Informatique - Projet tutoré 2024/2025",
-            "Groupe 33: Affi Hassan, Arafo Elmi, Souhaib Ahmed,",
-            "Izoudine Bobekir, Med Moumine",
-            "Prof encadreur: Issa Ali Isse"
-        ]
-
-        y_offset = 200
-        for text in info_texts:
-            info_surf = info_font.render(text, True, WHITE)
-            info_shadow = info_font.render(text, True, (30, 30, 30))
-            info_rect = info_surf.get_rect(center=(WIDTH // 2, y_offset))
-
-            display.blit(info_shadow, (info_rect.x + 4, info_rect.y + 4))  # Ombre
-            display.blit(info_surf, info_rect)
-            y_offset += 50  # Plus d'espacement pour la lisibilité
+        display.blit(assets.static_layer("credits", draw_credits_layer, assets.CREDITS_GRADIENT), (0, 0))
 
         # Bouton stylisé pour "Retour"
         back_button_hover = draw_button("Retour", WIDTH // 2 - 120, HEIGHT - 100, 240, 70, (50, 200, 50), (20, 150, 20))
@@ -531,34 +362,27 @@ def credits_page():
                 sys.exit()
             if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                 if back_button_hover:
-                    return main_menu()  # Retour au menu principal
+                    return main_menu  # Retour au menu principal
+        clock.tick(assets.MENU_FPS)
+
+
+def draw_mode_menu_layer(surface):
+    # Titre centré
+    assets.draw_shadowed_text(surface, assets.font("title"), "Choisissez le Mode de Jeu",
+                              (WIDTH // 2, HEIGHT // 4), 5)  # Ombre du texte
 
 
 def mode_menu():
     """ Affiche le menu des modes de jeu """
     while True:
-        # Fond dégradé amélioré
-        for i in range(HEIGHT):
-            color = (
-                int(0 + (0 - 0) * i / HEIGHT),
-                int(0 + (50 - 0) * i / HEIGHT),
-                int(100 + (255 - 100) * i / HEIGHT)
-            )
-            pygame.draw.line(display, color, (0, i), (WIDTH, i))
-
-        # Titre centré
-        title_font = pygame.font.SysFont("Arial", 60, bold=True)
-        title_surf = title_font.render("Choisissez le Mode de Jeu", True, WHITE)
-        title_shadow = title_font.render("Choisissez le Mode de Jeu", True, (50, 50, 50))
-        title_rect = title_surf.get_rect(center=(WIDTH // 2, HEIGHT // 4))
-        display.blit(title_shadow, (title_rect.x + 5, title_rect.y + 5))  # Ombre du texte
-        display.blit(title_surf, title_rect)
+        display.blit(assets.static_layer("mode_menu", draw_mode_menu_layer), (0, 0))
 
         # Boutons centrés pour les modes de jeu
         button_width, button_height = 250, 60
         classic_hover = draw_button("Mode Classic", WIDTH // 2 - button_width // 2, HEIGHT // 2 - 40, button_width, button_height, GREEN, DARK_GREEN)
         chrono_hover = draw_button("Mode Chrono", WIDTH // 2 - button_width // 2, HEIGHT // 2 + 40, button_width, button_height, RED, DARK_RED)
-        back_hover = draw_button("Retour", WIDTH // 2 - button_width // 2, HEIGHT // 2 + 120, button_width, button_height, YELLOW, DARK_YELLOW)
+        arena_hover = draw_button("Mode Arène", WIDTH // 2 - button_width // 2, HEIGHT // 2 + 120, button_width, button_height, ORANGE, DARK_ORANGE)
+        back_hover = draw_button("Retour", WIDTH // 2 - button_width // 2, HEIGHT // 2 + 200, button_width, button_height, YELLOW, DARK_YELLOW)
         pygame.display.update()
 
         # Gestion des événements
@@ -568,146 +392,186 @@ def mode_menu():
                 sys.exit()
             if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                 if classic_hover:
-                    return classic_mode("easy") # Lancer le mode Classic
+                    return partial(classic_mode, "easy") # Lancer le mode Classic
                 if chrono_hover:
-                    return difficulty_menu()  # Lancer le mode Chrono
+                    return difficulty_menu  # Lancer le mode Chrono
+                if arena_hover:
+                    return arena_mode
                 if back_hover:
-                    return main_menu()
+                    return main_menu
+        clock.tick(assets.MENU_FPS)
+
+
+DIRECTION_KEYS = {
+    pygame.K_UP: "UP",
+    pygame.K_DOWN: "DOWN",
+    pygame.K_LEFT: "LEFT",
+    pygame.K_RIGHT: "RIGHT"
+}
+
+
+def draw_special_apple_bar(renderer, game, now=None):
+    """ Met à jour la barre de progression de la pomme spéciale en haut de l'écran.
+
+    now est le temps de jeu à afficher (par défaut celui du dernier tour).
+    """
+    special_apple = game.special_apple
+    if special_apple is None or special_apple.time_limit <= 0:
+        renderer.remove_item("special_apple_bar")
+        return
+    remaining_time = max(special_apple.remaining(game.elapsed if now is None else now), 0)
+    progress_width = int(special_apple.progress_bar_width * (remaining_time / special_apple.time_limit))
+    bar_x = WIDTH // 2 - special_apple.progress_bar_width // 2
+    renderer.set_item("special_apple_bar", ProgressBar(
+        (bar_x, 50, special_apple.progress_bar_width, special_apple.progress_bar_height), progress_width, ORANGE))
+
+
+AUTOPILOT_KEY = pygame.K_a
+PROFILER_KEY = pygame.K_F3  # Mesures des images affichées à l'écran
+TRACE_KEY = pygame.K_F4  # Enregistre la trace des dernières images (JSON et CSV)
+PROFILER = FrameProfiler()  # Un seul profileur : il reste activé d'une partie à l'autre
+
+
+def attach_profiler(game, renderer):
+    """ Branche le profileur sur la partie et le renderer s'il est activé. """
+    profiler = PROFILER if PROFILER.enabled else None
+    game.profiler = renderer.profiler = profiler
+    if profiler is None:
+        PROFILER.hide(renderer)
+
+
+def toggle_profiler(game, renderer):
+    if PROFILER.enabled:
+        PROFILER.disable()
+    else:
+        PROFILER.enable()
+    attach_profiler(game, renderer)
+
+
+def dump_trace():
+    """ Enregistre la trace du profileur dans le dossier de l'utilisateur (en JSON et en CSV). """
+    if not PROFILER.frames:
+        return
+    name = os.path.join(trace_dir(), f"trace-{time.strftime('%Y%m%d-%H%M%S')}")
+    try:
+        os.makedirs(trace_dir(), exist_ok=True)
+        for extension in (".json", ".csv"):
+            PROFILER.dump(name + extension)
+    except OSError as error:
+        print(f"Trace non enregistrée : {error}", file=sys.stderr)
+        return
+    print(f"Trace enregistrée : {name}.json, {name}.csv", file=sys.stderr)
+
+
+def toggle_autopilot(pilot, renderer):
+    """ Active ou coupe le pilote automatique ; renvoie le nouveau pilote (ou None). """
+    if pilot is not None:
+        renderer.remove_item("autopilot")
+        return None
+    renderer.set_text("autopilot", "AUTO", font, YELLOW, lambda width: (20, HEIGHT - 40))
+    return Autopilot()
+
+
+def simulate(game, lag, replay=None, pilot=None):
+    """ Joue les tours dus après lag secondes, à la cadence du jeu (pas de temps fixe).
+
+    Avec un pilote, c'est lui qui choisit la direction à chaque tour.
+    Chaque tour est ajouté au replay s'il y en a un. Renvoie le temps restant,
+    inférieur à la durée d'un tour ; lag * game.speed donne alors l'avancement
+    du tour en cours pour l'affichage.
+    """
+    for _ in range(MAX_TICKS_PER_FRAME):
+        if lag < 1 / game.speed or game.state != "continue":
+            break
+        lag -= 1 / game.speed
+        action = None
+        if pilot is not None:
+            game.snake.turns.clear()  # Les touches du joueur sont ignorées
+            action = pilot.act(game)
+        if game.profiler is not None:
+            game.profiler.mark("simulation")  # Pilote, et replay et sons du tour précédent
+        game.step(action)
+        if replay is not None:
+            replay.record(game)
+        play_event_sounds(game.events)
+    if game.profiler is not None:
+        game.profiler.mark("simulation")
+    return min(lag, 1 / game.speed)
 
 
 def classic_mode(difficulty="easy"):
-    easy_mode = (difficulty == "easy")
-    snake = Snake()
-    obstacles = generate_obstacles(difficulty, snake)
-    apple = Apple(snake, obstacles)
-    special_apple = None
-    score = 0
-    speed = 10
+    game = Game("classic", difficulty, cols=BOARD_SIZE[0], rows=BOARD_SIZE[1], level=LEVEL)
     high_score = get_high_score(difficulty, mode="classic")
-    pause = False
     game_running = True
 
-    pygame.mixer.music.load(resource_path("sons/battleThemeA.mp3"))
-    pygame.mixer.music.set_volume(0.5)
-    pygame.mixer.music.play(-1)
+    assets.play_music("sons/battleThemeA.mp3", volume=0.5)  # Lue sur le disque une seule fois
 
+    renderer = RENDERER(display, game)
+    game_clock = GameClock()  # Temps de jeu, arrêté pendant la pause
+    replay = Replay.for_game(game)  # Graine et directions : de quoi rejouer la partie
+    pilot = None
+    assisted = False  # Une partie jouée (même en partie) par le pilote ne compte pas pour le high score
+    lag = 0.0  # Temps de jeu pas encore simulé
+    attach_profiler(game, renderer)
     while game_running:
-        display.fill(BLACK)
-
+        PROFILER.begin()
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_SPACE:
-                    pause = not pause
+                    pause_game(game_clock, renderer)
                 if event.key == pygame.K_ESCAPE:
                     game_running = False
-                directions = {
-                    pygame.K_UP: "UP",
-                    pygame.K_DOWN: "DOWN",
-                    pygame.K_LEFT: "LEFT",
-                    pygame.K_RIGHT: "RIGHT"
-                }
-                if event.key in directions:
-                    snake.next_direction = directions[event.key]
-
-        if pause:
-            show_pause_screen()
-            continue
-
-        game_state, score = snake.move(easy_mode, score)
-        if game_state == "game_over":
-            save_high_score(score, difficulty, mode="classic")
-            game_over_screen2(score, high_score, difficulty)
-            break
-
-        if special_apple:
-            elapsed = (pygame.time.get_ticks() - special_apple.start_time) / 1000
-            remaining = special_apple.time_limit - elapsed
-            if remaining <= 0:
-                special_apple = None
-            else:
-                progress_width = int(special_apple.progress_bar_width * (remaining / special_apple.time_limit))
-                pygame.draw.rect(display, GRAY, (WIDTH//2 - 50, 50, 100, 10))
-                pygame.draw.rect(display, ORANGE, (WIDTH//2 - 50, 50, progress_width, 10))
-
-        if snake.body[0] == apple.position:
-            son_pomme.play()
-            snake.grow()
-            score += 10
-            apple.respawn(snake, obstacles)
-            if score % 100 == 0 or (special_apple is None and random.random() < 0.1):
-                special_apple = Apple(snake, obstacles, special=True)
-
-        if special_apple and snake.body[0] == special_apple.position:
-            son_pomme.play()
-            snake.grow()
-            snake.grow()
-            score += 20
-            special_apple = None
-
-        if snake.check_collision(obstacles):
-            save_high_score(score, difficulty, mode="classic")
-            game_over_screen2(score, high_score, difficulty)
-            pygame.mixer.music.stop()
-            son_game_over.play()
-            break
-
-        snake.draw(display)
-        apple.draw(display)
-        draw_scores(display, score, high_score)
-
-        if special_apple:
-            special_apple.draw(display)
-
-        for obs in obstacles:
-            pygame.draw.rect(display, GRAY, pygame.Rect(obs[0], obs[1], GRID_SIZE, GRID_SIZE))
-
-        pygame.draw.rect(display, WHITE, pygame.Rect(0, 0, WIDTH, HEIGHT), 2)
-
-        pygame.display.flip()
-        clock.tick(speed)
+                if event.key == AUTOPILOT_KEY:
+                    pilot = toggle_autopilot(pilot, renderer)
+                    if pilot is not None:
+                        assisted = True
+                if event.key == PROFILER_KEY:
+                    toggle_profiler(game, renderer)
+                if event.key == TRACE_KEY:
+                    dump_trace()
+                if event.key in DIRECTION_KEYS:
+                    game.snake.queue_turn(DIRECTION_KEYS[event.key])  # Consommé au prochain tour
+
+        PROFILER.mark("events")
+        lag = simulate(game, lag + game_clock.tick(), replay, pilot)
+
+        if game.state == "game_over":
+            if not assisted:
+                save_high_score(game.score, difficulty, mode="classic")
+            save_recent(replay)
+            return partial(game_over_screen2, game.score, high_score, difficulty)
+
+        draw_special_apple_bar(renderer, game, game.elapsed + lag)
+        draw_scores(renderer, game.score, high_score)
+        PROFILER.draw(renderer)
+        renderer.render(lag * game.speed)  # Seules les zones modifiées sont redessinées
+        clock.tick(FPS)
+        PROFILER.mark("wait")
+        PROFILER.end(game)
+    save_recent(replay)  # Partie abandonnée avec Échap
 
 
 
 def main(level):
-    easy_mode = (level == "easy")  # La téléportation est activée uniquement en mode easy
-    snake = Snake()
-    obstacles = generate_obstacles(level, snake)  # Générer les obstacles selon la difficulté
-    apple = Apple(snake, obstacles)
-    special_apple = None
-    score = 0
-    speed = 10
+    game = Game("chrono", level, cols=BOARD_SIZE[0], rows=BOARD_SIZE[1], level=LEVEL)  # Les obstacles et la durée dépendent de la difficulté
     high_score = get_high_score(level, mode="chrono")
-    pause = False
     game_running = True  # Pour indiquer si le jeu est en cours
 
-    pygame.mixer.music.load(resource_path("sons/battleThemeA.mp3"))  # Remplace par ton fichier
-    pygame.mixer.music.set_volume(0.5)  # Ajuste le volume (0.0 à 1.0)
-    pygame.mixer.music.play(-1)  # -1 pour répéter la musique en boucle
-
-
-    # Paramètres en fonction du mode de jeu
-    if level == "easy":
-        time_limit = 180  # 3 minutes
-        victory_score = 500  # Score requis pour gagner
-    elif level == "medium":
-        time_limit = 120  # 2 minutes
-        victory_score = 300  # Score requis pour gagner
-    else:
-        time_limit = 60  # 1 minute
-        victory_score = 200  # Score requis pour gagner
-
-    start_time = time.time()
-    game_state = "continue"
-
-    if score % 100 == 0:
-        speed = speed + 1
+    assets.play_music("sons/battleThemeA.mp3", volume=0.5)  # En boucle, lue sur le disque une seule fois
 
+    renderer = RENDERER(display, game)
+    temps_font = assets.font("timer")
+    game_clock = GameClock()  # Temps de jeu : le chrono s'arrête pendant la pause
+    replay = Replay.for_game(game)  # Graine et directions : de quoi rejouer la partie
+    pilot = None
+    assisted = False  # Une partie jouée (même en partie) par le pilote ne compte pas pour le high score
+    lag = 0.0  # Temps de jeu pas encore simulé
+    attach_profiler(game, renderer)
     while game_running:
-        display.fill(BLACK)
-
+        PROFILER.begin()
         # Gérer les événements
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -717,105 +581,140 @@ def main(level):
 
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_SPACE:  # Appuie sur "Espace" pour mettre en pause/reprendre
-                    pause = not pause  # Inverse l'état de pause (si c'est en pause, on reprend, sinon on met en pause)
-
-
-                if event.type == pygame.KEYDOWN:
-                    directions = {pygame.K_UP: "UP", pygame.K_DOWN: "DOWN", pygame.K_LEFT: "LEFT",
-                                  pygame.K_RIGHT: "RIGHT"}
-                    if event.key in directions:
-                        snake.next_direction = directions[event.key]
-
-        # Si le jeu est en pause, on affiche l'écran de pause
-        if pause:
-            show_pause_screen()  # Affiche "PAUSE"
-            continue  # Ne pas exécuter le reste du code pour suspendre le jeu
-
-        # Vérification du temps écoulé
-        temps_ecoule = time.time() - start_time
-        temps_restant = time_limit - int(temps_ecoule)
-
-        # Afficher le score et le temps restant
-        temps_font = pygame.font.SysFont("Arial", 24)
-        temps_text = temps_font.render(f"Temps restant: {temps_restant}s", True, WHITE)
-        display.blit(temps_text, (WIDTH // 2 - temps_text.get_width() // 2-300, 15))
-
-        # Vérifier si le temps est écoulé
-        if temps_restant <= 0:
-            if score >= victory_score:
-                save_high_score(score, level, mode="chrono")
-                victory_screen(score, high_score, level)  # Afficher l'écran de victoire
-                pygame.mixer.music.stop()  # Arrêter la musique de fond
-                son_victoire.play()
-            else:
-                game_over_screen(score, high_score, level)  # Afficher l'écran de défaite
-                pygame.mixer.music.stop()  # Arrêter la musique de fond
-                son_game_over.play()
-            break  # Quitter la boucle
-
-        game_state, score = snake.move(easy_mode, score)
-        if game_state == "game_over":
-            save_high_score(score, level, mode="chrono")
-            # Exemple d'appel de la fonction game_over_screen
-            game_over_screen(score, high_score, level)
-            break
-
-        if special_apple is not None:
-            # Calculer le temps écoulé
-            elapsed_time = (pygame.time.get_ticks() - special_apple.start_time) / 1000  # En secondes
-            remaining_time = special_apple.time_limit - elapsed_time
-
-            if remaining_time <= 0:
-                special_apple = None  # La pomme spéciale disparaît
-
-            if special_apple is not None and special_apple.time_limit > 0:
-                # Calculer la largeur de la barre de progression
-                progress_width = int(special_apple.progress_bar_width * (remaining_time / special_apple.time_limit))
-
-                # Dessiner la barre de progression en haut de l'écran
-                pygame.draw.rect(display, GRAY, (
-                WIDTH // 2 - special_apple.progress_bar_width // 2, 50, special_apple.progress_bar_width,
-                special_apple.progress_bar_height))
-                pygame.draw.rect(display, ORANGE, (
-                WIDTH // 2 - special_apple.progress_bar_width // 2, 50, progress_width,
-                special_apple.progress_bar_height))
-
-        if snake.body[0] == apple.position:
-            son_pomme.play()
-            snake.grow()
-            score += 10
-            apple.respawn(snake, obstacles)
-            if score % 100 == 0 or (special_apple is None and random.random() < 0.1):
-                special_apple = Apple(snake, obstacles, special=True)
-
-        if special_apple and snake.body[0] == special_apple.position:
-            son_pomme.play()
-            snake.grow()
-            snake.grow()
-            score += 20
-            special_apple = None
-
-        if snake.check_collision(obstacles):
-            save_high_score(score, level, mode="chrono")
-            game_over_screen(score, high_score, level)
-            pygame.mixer.music.stop()  # Arrêter la musique de fond
-            son_game_over.play()
-
-        snake.draw(display)
-        apple.draw(display)
-        draw_score(display, score, high_score, level)
-
-        if special_apple:
-            special_apple.draw(display)
-
-        for obs in obstacles:
-            pygame.draw.rect(display, GRAY, pygame.Rect(obs[0], obs[1], GRID_SIZE, GRID_SIZE))
-
-        pygame.draw.rect(display, WHITE, pygame.Rect(0, 0, WIDTH, HEIGHT), 2)
+                    pause_game(game_clock, renderer)  # Attend le prochain appui sur Espace
+                if event.key == AUTOPILOT_KEY:  # "A" : pilote automatique
+                    pilot = toggle_autopilot(pilot, renderer)
+                    if pilot is not None:
+                        assisted = True
+                if event.key == PROFILER_KEY:  # F3 : mesures des images
+                    toggle_profiler(game, renderer)
+                if event.key == TRACE_KEY:  # F4 : enregistrement de la trace
+                    dump_trace()
+                if event.key in DIRECTION_KEYS:
+                    game.snake.queue_turn(DIRECTION_KEYS[event.key])  # Consommé au prochain tour
+
+        # Le moteur gère le chrono, le déplacement, les pommes et les collisions
+        # (tours à pas fixe, à la vitesse du jeu)
+        PROFILER.mark("events")
+        lag = simulate(game, lag + game_clock.tick(), replay, pilot)
+
+        if game.state != "continue":
+            save_recent(replay)
+        if game.state == "victory":
+            if not assisted:
+                save_high_score(game.score, level, mode="chrono")
+            return partial(victory_screen, game.score, high_score, level)  # Afficher l'écran de victoire
+        if game.state == "game_over":
+            # Le score n'est pas enregistré si le temps est écoulé
+            if game.end_reason != "time_up" and not assisted:
+                save_high_score(game.score, level, mode="chrono")
+            return partial(game_over_screen, game.score, high_score, level)  # Afficher l'écran de défaite
+
+        # Afficher le temps restant
+        renderer.set_text("temps", f"Temps restant: {game.time_remaining()}s", temps_font, WHITE,
+                          lambda width: (WIDTH // 2 - width // 2 - 300, 15))
+        draw_special_apple_bar(renderer, game, game.elapsed + lag)
+        draw_score(renderer, game.score, high_score, level)
+        PROFILER.draw(renderer)
+        renderer.render(lag * game.speed)  # Seules les zones modifiées sont redessinées
+        clock.tick(FPS)
+        PROFILER.mark("wait")
+        PROFILER.end(game)
+
+ARENA_SIZE = (160, 120)  # Plateau de l'arène, en cases (la caméra suit le serpent du joueur)
+ARENA_BOTS = 200  # Serpents automatiques
+ARENA_APPLES = 250
+ARENA_OBSTACLES = 150
+
+
+def arena_mode():
+    """ Le joueur contre des centaines de serpents automatiques ; la partie s'arrête à sa mort. """
+    arena = Arena(*ARENA_SIZE, apples=ARENA_APPLES, obstacles=ARENA_OBSTACLES)
+    player = arena.add_snake()
+    bots = ArenaBots(arena, ARENA_BOTS)
+    high_score = get_high_score("medium", mode="arena")
+
+    assets.play_music("sons/battleThemeA.mp3", volume=0.5)
+
+    renderer = ArenaRenderer(display, arena, focus=player)
+    game_clock = GameClock()
+    lag = 0.0
+    score = 0
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                sys.exit()
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    pause_game(game_clock, renderer)
+                if event.key == pygame.K_ESCAPE:
+                    return mode_menu
+                if event.key in DIRECTION_KEYS:
+                    arena.turn(player, DIRECTION_KEYS[event.key])
+
+        # Tours à pas fixe, comme simulate() pour une partie seule
+        lag += game_clock.tick()
+        for _ in range(MAX_TICKS_PER_FRAME):
+            if lag < 1 / BASE_SPEED:
+                break
+            lag -= 1 / BASE_SPEED
+            bots.act()
+            dead = arena.step()
+            bots.update(dead)
+            if player in dead:
+                save_high_score(score, "medium", mode="arena")
+                return partial(game_over_screen2, score, high_score, "medium", again=arena_mode)
+            if arena.scores[player] > score:
+                assets.play_sound("apple")
+                score = arena.scores[player]
+        lag = min(lag, 1 / BASE_SPEED)
+
+        rank = 1 + sum(1 for other in arena.scores.values() if other > score)
+        renderer.set_text("score", f"Score: {score}", font, WHITE, lambda width: (WIDTH // 2 - width // 2, 20))
+        renderer.set_text("rank", f"Rang: {rank}/{len(arena.snakes)}", font, WHITE,
+                          lambda width: (WIDTH - width - 20, 20))
+        renderer.render()
+        clock.tick(FPS)
+
+
+def run(screen=main_menu):
+    """ Enchaîne les écrans sans récursion.
+
+    Chaque écran renvoie l'écran suivant (une fonction sans argument, ou
+    functools.partial pour lui passer des arguments) au lieu de l'appeler :
+    la pile d'appels ne grandit pas d'une partie à l'autre. None quitte le jeu.
+    """
+    while screen is not None:
+        screen = screen()
+
+
+def board_size(text):
+    """ Taille de plateau "COLONNESxLIGNES" (option --board). """
+    try:
+        cols, rows = (int(value) for value in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"taille de plateau invalide : {text!r} (exemple : 1000x1000)")
+    if not (10 <= cols <= 65535 and 10 <= rows <= 65535):  # Limite du format des replays
+        raise argparse.ArgumentTypeError("le plateau doit faire entre 10 et 65535 cases de côté")
+    return cols, rows
 
-        pygame.display.flip()
-        clock.tick(speed)
 
 if __name__ == "__main__":
-    main_menu()  # Démarre le jeu par le menu
+    parser = argparse.ArgumentParser(description="Jeu Snake")
+    parser.add_argument("--board", type=board_size, default=BOARD_SIZE,
+                        help=f"taille du plateau en cases (par défaut {COLS}x{ROWS})")
+    parser.add_argument("--level", choices=PRESETS, help="niveau généré à la place des obstacles de la difficulté")
+    parser.add_argument("--renderer", choices=("cells", "array"), default="cells",
+                        help="affichage case par case (par défaut) ou de tout le plateau avec NumPy")
+    parser.add_argument("--startup-time", action="store_true",
+                        help="affiche sur stderr le temps de démarrage jusqu'au premier menu")
+    args = parser.parse_args()
+    BOARD_SIZE, LEVEL, SHOW_STARTUP_TIME = args.board, args.level, args.startup_time
+    if args.renderer == "array":
+        from array_renderer import ArrayRenderer  # NumPy n'est nécessaire que pour cet affichage
+
+        RENDERER = ArrayRenderer
+    assets.preload_sounds()  # Les sons sont décodés pendant que le menu s'affiche
+    run(main_menu)  # Démarre le jeu par le menu
 
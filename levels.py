@@ -0,0 +1,346 @@
+"""Génération procédurale de niveaux, avec connexité garantie et cache sur disque.
+
+Un niveau est un masque d'obstacles : un octet par case du plateau
+(1 : obstacle, 0 : case libre), ligne par ligne comme Board.cells. Il se
+déduit entièrement de la graine, du preset et de ses paramètres :
+    density   obstacles isolés tirés au hasard (proportion density)
+    maze      labyrinthe à couloirs de largeur corridor, avec quelques boucles
+    rooms     salles de room cases de côté reliées par des portes
+
+Après la génération, un remplissage par diffusion part de la case de
+départ du serpent : les poches qu'il n'atteint pas sont murées (sinon une
+pomme pourrait y apparaître) et, si le départ est enfermé, un passage est
+creusé vers le reste du plateau. Toute case libre du niveau est donc
+accessible depuis le départ, sans passer par les bords.
+
+Le remplissage travaille par segments de ligne (bytearray.find et
+affectation de tranches) : un plateau de 1000 x 1000 se génère en moins
+d'une seconde, et le masque est gardé dans un cache sur disque
+pour les parties et les replays suivants.
+
+Exemples :
+    python levels.py maze --cols 80 --rows 60 --seed 3    # aperçu en texte
+    python levels.py rooms --cols 1000 --rows 1000 --seed 1 --no-cache
+"""
+import argparse
+import hashlib
+import os
+import random
+import struct
+import time
+import zlib
+from collections import deque
+from itertools import compress
+
+# Paramètres par défaut de chaque preset
+PRESETS = {
+    "density": {"density": 0.15},
+    "maze": {"corridor": 2, "loops": 0.05},
+    "rooms": {"room": 12, "door": 3, "loops": 0.3},
+}
+GENERATOR_VERSION = 1  # À incrémenter quand un générateur change : les anciens niveaux du cache sont ignorés
+MAGIC = b"SNKL"
+# magic, version du générateur, colonnes, lignes ; suivi du masque compressé avec zlib
+_HEADER = struct.Struct("<4sBHH")
+
+
+def _blank(cols, rows, value=0):
+    return bytearray([value]) * (cols * rows)
+
+
+def _clear(mask, cols, x, y, width, height):
+    """ Libère le rectangle de width x height cases dont le coin haut gauche est (x, y). """
+    empty = bytes(width)
+    for row in range(y, y + height):
+        start = row * cols + x
+        mask[start:start + width] = empty
+
+
+def _carve(rng, width, height, open_passage, loops):
+    """ Relie les width x height cellules d'une grille par un arbre couvrant aléatoire.
+
+    Parcours en profondeur aléatoire depuis la cellule 0 : open_passage(a, b)
+    ouvre le passage entre deux cellules voisines (a < b). Chaque passage
+    qui ne fait pas partie de l'arbre est ensuite ouvert avec la probabilité
+    loops.
+    """
+    visited = bytearray(width * height)
+    visited[0] = 1
+    stack = [0]
+    while stack:
+        cell = stack[-1]
+        x, y = cell % width, cell // width
+        choices = [other for other, inside in ((cell - 1, x > 0), (cell + 1, x < width - 1),
+                                               (cell - width, y > 0), (cell + width, y < height - 1))
+                   if inside and not visited[other]]
+        if not choices:
+            stack.pop()
+            continue
+        other = rng.choice(choices)
+        open_passage(min(cell, other), max(cell, other))
+        visited[other] = 1
+        stack.append(other)
+    for cell in range(width * height):
+        if cell % width < width - 1 and rng.random() < loops:
+            open_passage(cell, cell + 1)
+        if cell // width < height - 1 and rng.random() < loops:
+            open_passage(cell, cell + width)
+
+
+def _density(cols, rows, rng, density):
+    mask = _blank(cols, rows)
+    for index in rng.sample(range(cols * rows), int(cols * rows * density)):
+        mask[index] = 1
+    return mask
+
+
+def _maze(cols, rows, rng, corridor, loops):
+    """ Labyrinthe parfait (parcours en profondeur aléatoire) dont on ouvre ensuite quelques murs. """
+    step = corridor + 1
+    width, height = (cols - 1) // step, (rows - 1) // step  # Carrefours du labyrinthe
+    if width < 1 or height < 1:
+        return _blank(cols, rows)
+    mask = _blank(cols, rows, 1)
+    # Toutes les lignes qui traversent des carrefours sont identiques : on les copie d'un bloc
+    row = _blank(cols, 1, 1)
+    for cell_x in range(width):
+        _clear(row, cols, 1 + cell_x * step, 0, corridor, 1)
+    for cell_y in range(height):
+        for y in range(1 + cell_y * step, 1 + cell_y * step + corridor):
+            mask[y * cols:(y + 1) * cols] = row
+
+    def open_wall(cell, other):
+        x, y = 1 + (cell % width) * step, 1 + (cell // width) * step
+        if other == cell + 1:
+            _clear(mask, cols, x + corridor, y, 1, corridor)
+        else:
+            _clear(mask, cols, x, y + corridor, corridor, 1)
+
+    # Avec des boucles : un serpent qui grandit se piège vite dans un labyrinthe parfait
+    _carve(rng, width, height, open_wall, loops)
+    return mask
+
+
+def _rooms(cols, rows, rng, room, door, loops):
+    """ Salles séparées par des murs d'une case, reliées par un arbre de portes (plus quelques portes en trop). """
+    xs = list(range(0, cols - room - 1, room + 1)) + [cols - 1]  # Colonnes des murs
+    ys = list(range(0, rows - room - 1, room + 1)) + [rows - 1]  # Lignes des murs
+    width, height = len(xs) - 1, len(ys) - 1
+    if width < 1 or height < 1:
+        return _blank(cols, rows)
+    mask = _blank(cols, rows)
+    wall = b"\x01" * cols
+    for y in ys:
+        mask[y * cols:(y + 1) * cols] = wall
+    for y in range(rows):
+        for x in xs:
+            mask[y * cols + x] = 1
+
+    def open_door(cell, other):
+        x, y = cell % width, cell // width
+        if other == cell + 1:  # Porte dans le mur vertical entre les deux salles
+            low, high = ys[y] + 1, ys[y + 1]
+            size = min(door, high - low)
+            start = rng.randrange(low, high - size + 1)
+            _clear(mask, cols, xs[x + 1], start, 1, size)
+        else:
+            low, high = xs[x] + 1, xs[x + 1]
+            size = min(door, high - low)
+            start = rng.randrange(low, high - size + 1)
+            _clear(mask, cols, start, ys[y + 1], size, 1)
+
+    _carve(rng, width, height, open_door, loops)
+    return mask
+
+
+GENERATORS = {"density": _density, "maze": _maze, "rooms": _rooms}
+
+
+def flood_fill(grid, cols, start):
+    """ Remplit de 1 les cases à 0 de grid atteignables depuis start (4 voisins, sans passer par les bords).
+
+    Travaille par segments de ligne : chaque segment est trouvé et rempli
+    avec find/rfind et une affectation de tranche. Renvoie le nombre de
+    cases remplies.
+    """
+    if grid[start]:
+        return 0
+    size = len(grid)
+    filled = 0
+    stack = [start]
+    while stack:
+        index = stack.pop()
+        if grid[index]:
+            continue
+        row_start = index - index % cols
+        row_end = row_start + cols
+        left = grid.rfind(1, row_start, index) + 1 or row_start
+        right = grid.find(1, index, row_end)
+        if right < 0:
+            right = row_end
+        grid[left:right] = b"\x01" * (right - left)
+        filled += right - left
+        for offset in (-cols, cols):
+            low, high = left + offset, right + offset
+            if low < 0 or high > size:
+                continue
+            # Une graine par segment libre de la ligne voisine
+            position = grid.find(0, low, high)
+            while position >= 0:
+                stack.append(position)
+                end = grid.find(1, position, high)
+                if end < 0:
+                    break
+                position = grid.find(0, end, high)
+    return filled
+
+
+def _dig(mask, cols, start, reached):
+    """ Creuse le plus court passage de start vers une case libre que le remplissage n'a pas atteinte.
+
+    reached : le masque après remplissage depuis start (0 : case libre non
+    atteinte). Renvoie False s'il n'y a plus rien à relier.
+    """
+    size = len(mask)
+    parents = {start: None}
+    queue = deque([start])
+    while queue:
+        index = queue.popleft()
+        if not reached[index]:
+            while index is not None:
+                mask[index] = 0
+                index = parents[index]
+            return True
+        x = index % cols
+        for other, inside in ((index - 1, x > 0), (index + 1, x < cols - 1),
+                              (index - cols, index >= cols), (index + cols, index + cols < size)):
+            if inside and other not in parents:
+                parents[other] = index
+                queue.append(other)
+    return False
+
+
+def connect(mask, cols, start):
+    """ Rend toutes les cases libres de mask accessibles depuis start (mask est modifié).
+
+    Si la zone du départ contient moins de la moitié des cases libres, on
+    creuse vers la zone la plus proche et on recommence ; les poches qui
+    restent hors d'atteinte deviennent des obstacles.
+    """
+    mask[start] = 0
+    free = mask.count(0)
+    while True:
+        reached = bytearray(mask)
+        if 2 * flood_fill(reached, cols, start) >= free or not _dig(mask, cols, start, reached):
+            break
+        free = mask.count(0)
+    # Obstacle là où la case était déjà un obstacle ou n'a pas été atteinte (reached à 0)
+    size = len(mask)
+    unreachable = int.from_bytes(reached, "big") ^ int.from_bytes(b"\x01" * size, "big")
+    mask[:] = (int.from_bytes(mask, "big") | unreachable).to_bytes(size, "big")
+    return mask
+
+
+def _options(preset, params):
+    if preset not in PRESETS:
+        raise ValueError(f"preset de niveau inconnu : {preset!r} ({', '.join(PRESETS)})")
+    options = dict(PRESETS[preset])
+    unknown = set(params) - set(options)
+    if unknown:
+        raise ValueError(f"paramètres inconnus pour le preset {preset} : {', '.join(sorted(unknown))}")
+    options.update(params)
+    return options
+
+
+def generate_level(cols, rows, preset, seed, start, keep=(), **params):
+    """ Masque d'obstacles (bytes, 1 par obstacle) d'un niveau, toujours le même pour les mêmes arguments.
+
+    start : indice de la case de départ du serpent ; keep : cases à laisser
+    libres (le corps du serpent et la case devant lui, par exemple).
+    """
+    options = _options(preset, params)
+    rng = random.Random(f"{preset}:{seed}")
+    mask = GENERATORS[preset](cols, rows, rng, **options)
+    for index in keep:
+        mask[index] = 0
+    return bytes(connect(mask, cols, start))
+
+
+def level_dir():
+    from scores import user_data_dir
+
+    return os.path.join(user_data_dir(), "levels")
+
+
+def cache_path(cols, rows, preset, seed, start, keep=(), directory=None, **params):
+    """ Fichier du cache pour ce niveau : le nom contient une empreinte de tous les paramètres. """
+    key = repr((GENERATOR_VERSION, cols, rows, preset, seed, sorted(_options(preset, params).items()),
+                start, sorted(keep)))
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+    return os.path.join(directory or level_dir(), f"{preset}_{cols}x{rows}_{seed}_{digest}.lvl")
+
+
+def _read(path, cols, rows):
+    try:
+        with open(path, "rb") as file:
+            data = file.read()
+        magic, version, file_cols, file_rows = _HEADER.unpack_from(data)
+        mask = zlib.decompress(data[_HEADER.size:])
+    except (OSError, struct.error, zlib.error):
+        return None
+    if (magic, version, file_cols, file_rows) != (MAGIC, GENERATOR_VERSION, cols, rows) or len(mask) != cols * rows:
+        return None
+    return mask
+
+
+def load_level(cols, rows, preset, seed, start, keep=(), directory=None, cache=True, **params):
+    """ Comme generate_level, en passant par le cache sur disque (un cache illisible est ignoré). """
+    if not cache:
+        return generate_level(cols, rows, preset, seed, start, keep, **params)
+    path = cache_path(cols, rows, preset, seed, start, keep, directory, **params)
+    mask = _read(path, cols, rows)
+    if mask is None:
+        mask = generate_level(cols, rows, preset, seed, start, keep, **params)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temporary = path + ".tmp"
+            with open(temporary, "wb") as file:
+                file.write(_HEADER.pack(MAGIC, GENERATOR_VERSION, cols, rows) + zlib.compress(mask))
+            os.replace(temporary, path)
+        except OSError:
+            pass  # Pas de cache : le niveau sera regénéré la prochaine fois
+    return mask
+
+
+def obstacle_cells(mask):
+    """ Indices des obstacles d'un masque, dans l'ordre. """
+    return list(compress(range(len(mask)), mask))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Génération de niveaux du jeu Snake")
+    parser.add_argument("preset", choices=PRESETS)
+    parser.add_argument("--cols", type=int, default=40)
+    parser.add_argument("--rows", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-cache", action="store_true", help="génère le niveau sans lire ni écrire le cache")
+    args = parser.parse_args(argv)
+
+    from engine import Board, Snake, level_obstacles
+
+    cols, rows = args.cols, args.rows
+    snake = Snake(Board(cols, rows))  # Départ du serpent en solo, comme dans Game
+    start = time.perf_counter()
+    cells = level_obstacles(args.preset, snake, args.seed, cache=not args.no_cache)
+    elapsed = time.perf_counter() - start
+    mask = bytearray(cols * rows)
+    for index in cells:
+        mask[index] = 1
+    if cols <= 200:
+        for y in range(rows):
+            print("".join("#" if value else "." for value in mask[y * cols:(y + 1) * cols]))
+    print(f"{cols}x{rows}, {mask.count(1)} obstacles ({mask.count(1) / len(mask):.0%}), {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
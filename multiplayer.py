@@ -0,0 +1,399 @@
+"""Partie en réseau : plusieurs joueurs sur le même plateau.
+
+Le serveur (asyncio) fait autorité : il joue les tours de l'arène
+(arena.Arena) à la vitesse choisie, et c'est lui qui décide des
+collisions, des pommes et des scores. Les clients n'envoient que leurs
+changements de direction (un octet chacun) et reçoivent, à chaque tour,
+les changements de l'arène (arena.ArenaDelta : têtes déplacées, cases
+libérées par les queues, serpents apparus ou morts, pommes, obstacles et
+scores modifiés) plutôt que tout le plateau. L'arène complète n'est
+envoyée qu'une fois, à l'arrivée du client.
+
+Le tour est encodé une seule fois et le même message est écrit pour tous
+les clients : le coût d'un tour est proportionnel au nombre de serpents
+et de clients, pas à la taille du plateau. Un client qui ne lit plus ses
+messages est déconnecté au lieu de faire grossir la mémoire du serveur.
+
+Protocole (entiers little-endian) :
+    client -> serveur : un octet par virage, indice dans engine.DIRECTIONS
+    serveur -> client : messages préfixés par leur longueur (4 octets),
+        WELCOME (id du joueur, taille du plateau, tours par seconde)
+        puis un message DELTA par tour (le premier contient toute l'arène)
+
+Exemples :
+    python multiplayer.py serve --port 5555 --cols 80 --rows 60
+    python multiplayer.py serve --cols 200 --rows 150 --ai 200   # avec 200 serpents du serveur
+    python multiplayer.py play --host 127.0.0.1 --port 5555
+    python multiplayer.py bots 30 --port 5555        # 30 clients automatiques
+"""
+import argparse
+import asyncio
+import random
+import struct
+import sys
+import time
+from array import array
+from collections import deque
+
+from arena import RESPAWN_TICKS, Arena, ArenaAgent, ArenaBots, ArenaDelta
+from engine import BASE_SPEED, COLS, DIRECTIONS, ROWS
+
+HOST = "127.0.0.1"
+PORT = 5555
+MAX_CLIENT_BUFFER = 1 << 20  # Octets en attente d'envoi au-delà desquels un client est déconnecté
+STATS_INTERVAL = 5.0  # Secondes entre deux résumés du serveur
+
+WELCOME = 0
+DELTA = 1
+
+_LENGTH = struct.Struct("<I")
+_WELCOME = struct.Struct("<BHHHf")  # type, joueur, colonnes, lignes, tours par seconde
+# type, tour, puis le nombre d'éléments de chaque liste du delta
+_DELTA = struct.Struct("<BIHHHHIIII")
+_ADDED = struct.Struct("<HBI")  # id, direction, longueur (suivi des cases)
+_MOVE = struct.Struct("<HIIB")  # id, tête, queue libérée, segments ajoutés
+_SCORE = struct.Struct("<HI")
+
+
+class ProtocolError(Exception):
+    """ Message du serveur illisible. """
+
+
+def _cells(values, typecode="I"):
+    cells = array(typecode, values)
+    if sys.byteorder == "big":
+        cells.byteswap()
+    return cells.tobytes()
+
+
+def _read_cells(data, offset, count, typecode="I"):
+    cells = array(typecode)
+    cells.frombytes(data[offset:offset + count * cells.itemsize])
+    if len(cells) != count:
+        raise ProtocolError("message tronqué")
+    if sys.byteorder == "big":
+        cells.byteswap()
+    return cells, offset + count * cells.itemsize
+
+
+def frame(payload):
+    """ Message prêt à être écrit sur la connexion (longueur puis contenu). """
+    return _LENGTH.pack(len(payload)) + payload
+
+
+def encode_welcome(player, arena, tick_rate):
+    return _WELCOME.pack(WELCOME, player, arena.board.cols, arena.board.rows, tick_rate)
+
+
+def encode_delta(delta):
+    parts = [_DELTA.pack(DELTA, delta.tick, len(delta.added), len(delta.moves), len(delta.removed),
+                         len(delta.scores), len(delta.apples_removed), len(delta.apples_added),
+                         len(delta.obstacles_removed), len(delta.obstacles_added))]
+    for snake_id, cells, direction in delta.added:
+        parts.append(_ADDED.pack(snake_id, DIRECTIONS.index(direction), len(cells)))
+        parts.append(_cells(cells))
+    parts.extend(_MOVE.pack(*move) for move in delta.moves)
+    parts.append(_cells(delta.removed, "H"))
+    parts.extend(_SCORE.pack(snake_id, score) for snake_id, score in delta.scores.items())
+    for cells in (delta.apples_removed, delta.apples_added, delta.obstacles_removed, delta.obstacles_added):
+        parts.append(_cells(cells))
+    return b"".join(parts)
+
+
+def decode_delta(data):
+    try:
+        (_, tick, added, moves, removed, scores, apples_removed, apples_added, obstacles_removed,
+         obstacles_added) = _DELTA.unpack_from(data)
+        delta = ArenaDelta(tick)
+        offset = _DELTA.size
+        for _ in range(added):
+            snake_id, direction, length = _ADDED.unpack_from(data, offset)
+            cells, offset = _read_cells(data, offset + _ADDED.size, length)
+            delta.added.append((snake_id, tuple(cells), DIRECTIONS[direction]))
+        end = offset + moves * _MOVE.size
+        delta.moves = list(_MOVE.iter_unpack(data[offset:end]))
+        delta.removed, offset = _read_cells(data, end, removed, "H")
+        end = offset + scores * _SCORE.size
+        delta.scores = dict(_SCORE.iter_unpack(data[offset:end]))
+        offset = end
+        delta.apples_removed, offset = _read_cells(data, offset, apples_removed)
+        delta.apples_added, offset = _read_cells(data, offset, apples_added)
+        delta.obstacles_removed, offset = _read_cells(data, offset, obstacles_removed)
+        delta.obstacles_added, offset = _read_cells(data, offset, obstacles_added)
+    except (struct.error, IndexError) as error:
+        raise ProtocolError(f"message de tour invalide : {error}")
+    return delta
+
+
+class Server:
+    """ Serveur de jeu : une arène, jouée à tick_rate tours par seconde pour tous les clients. """
+
+    def __init__(self, arena, tick_rate=BASE_SPEED, respawn_ticks=RESPAWN_TICKS, bots=0):
+        self.arena = arena
+        self.bots = ArenaBots(arena, bots, seed=arena.seed, respawn_ticks=respawn_ticks)  # Serpents du serveur
+        self.tick_rate = tick_rate
+        self.respawn_ticks = respawn_ticks
+        self.clients = {}  # joueur -> StreamWriter
+        self.joining = []  # (StreamWriter, future du numéro de joueur), traités au tour suivant
+        self.leaving = []
+        self.respawns = deque()  # (tour de réapparition, joueur), dans l'ordre des tours
+        self.next_player = 0
+        self.tick_times = deque(maxlen=1000)  # Durée des derniers tours (secondes)
+        self.sent_bytes = 0
+
+    def _new_player(self):
+        """ Numéro libre (sur 16 bits, comme dans les messages). """
+        while True:
+            player = self.next_player
+            self.next_player = (self.next_player + 1) % 65536
+            if player not in self.clients and player not in self.arena.snakes and player not in self.bots.agents:
+                return player
+
+    async def handle(self, reader, writer):
+        """ Une connexion : le joueur entre au prochain tour, puis ses virages sont lus jusqu'à la déconnexion. """
+        joined = asyncio.get_running_loop().create_future()
+        self.joining.append((writer, joined))
+        player = await joined
+        try:
+            while True:
+                data = await reader.read(64)
+                if not data:
+                    break
+                for code in data:
+                    if code < len(DIRECTIONS):
+                        self.arena.turn(player, DIRECTIONS[code])
+        except ConnectionError:
+            pass
+        finally:
+            self.leaving.append(player)
+            writer.close()
+
+    def tick(self):
+        """ Un tour : départs, arrivées, réapparitions, déplacements, puis envoi des changements. """
+        arena = self.arena
+        for player in self.leaving:
+            arena.remove_snake(player)
+            self.clients.pop(player, None)
+        self.leaving = []
+        while self.respawns and self.respawns[0][0] <= arena.ticks:
+            _, player = self.respawns.popleft()
+            if player in self.clients and arena.add_snake(player) is None:
+                self.respawns.append((arena.ticks + self.respawn_ticks, player))  # Plateau plein
+        # Les nouveaux serpents font partie des changements envoyés aux clients déjà là
+        joining, self.joining = self.joining, []
+        for _, joined in joining:
+            player = self._new_player()
+            if arena.add_snake(player) is None:
+                self.respawns.append((arena.ticks + self.respawn_ticks, player))
+            joined.set_result(player)
+
+        self.bots.act()
+        dead = arena.step()
+        self.bots.update(dead)
+        for player in dead:
+            if player not in self.bots.agents:
+                self.respawns.append((arena.ticks + self.respawn_ticks, player))
+
+        message = frame(encode_delta(arena.take_delta()))
+        for player, writer in list(self.clients.items()):
+            if writer.transport.get_write_buffer_size() > MAX_CLIENT_BUFFER:
+                writer.close()  # Client trop lent : il n'aura plus de messages
+                self.clients.pop(player)
+                self.leaving.append(player)
+                continue
+            writer.write(message)
+            self.sent_bytes += len(message)
+        # Les nouveaux clients reçoivent l'arène telle qu'elle est après ce tour
+        for writer, joined in joining:
+            player = joined.result()
+            writer.write(frame(encode_welcome(player, arena, self.tick_rate)))
+            writer.write(frame(encode_delta(arena.full_state())))
+            self.clients[player] = writer
+
+    async def run_ticks(self):
+        loop = asyncio.get_running_loop()
+        period = 1 / self.tick_rate
+        deadline = loop.time()
+        while True:
+            deadline += period
+            delay = deadline - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                deadline = loop.time()  # En retard : on ne rattrape pas les tours manqués d'un coup
+                await asyncio.sleep(0)  # Laisse lire les virages des clients
+            start = time.perf_counter()
+            self.tick()
+            self.tick_times.append(time.perf_counter() - start)
+
+    async def report(self, interval=STATS_INTERVAL):
+        while True:
+            await asyncio.sleep(interval)
+            if self.tick_times:
+                times = sorted(self.tick_times)
+                print(f"{len(self.clients)} joueurs, {len(self.arena.snakes)} serpents - tour : moyenne "
+                      f"{sum(times) / len(times) * 1000:.2f} ms, p99 {times[int(0.99 * len(times))] * 1000:.2f} ms"
+                      f" - {self.sent_bytes / interval / 1024:.1f} Kio/s envoyés", file=sys.stderr)
+                self.sent_bytes = 0
+
+    async def serve(self, host=HOST, port=PORT, stats=True, sock=None):
+        if sock is not None:
+            server = await asyncio.start_server(self.handle, sock=sock)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+        tasks = [asyncio.create_task(self.run_ticks())]
+        if stats:
+            tasks.append(asyncio.create_task(self.report()))
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+class Client:
+    """ Connexion au serveur : copie locale de l'arène, tenue à jour tour par tour. """
+
+    def __init__(self, reader, writer, player, arena, tick_rate):
+        self.reader = reader
+        self.writer = writer
+        self.player = player
+        self.arena = arena
+        self.tick_rate = tick_rate
+        self.last_turn = None
+
+    @classmethod
+    async def connect(cls, host=HOST, port=PORT):
+        reader, writer = await asyncio.open_connection(host, port)
+        data = await cls._read_message(reader)
+        if len(data) != _WELCOME.size or data[0] != WELCOME:
+            raise ProtocolError("ce serveur n'est pas un serveur Snake")
+        _, player, cols, rows, tick_rate = _WELCOME.unpack(data)
+        return cls(reader, writer, player, Arena(cols, rows, apples=0), tick_rate)
+
+    @staticmethod
+    async def _read_message(reader):
+        (length,) = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+        return await reader.readexactly(length)
+
+    async def receive(self, on_tick=None):
+        """ Applique les tours reçus jusqu'à la déconnexion ; on_tick(client) est appelé après chacun. """
+        try:
+            while True:
+                data = await self._read_message(self.reader)
+                if not data or data[0] != DELTA:
+                    raise ProtocolError("message inattendu")
+                self.arena.apply(decode_delta(data))
+                if self.snake is None:
+                    self.last_turn = None  # Mort : le prochain serpent repart de zéro
+                if on_tick is not None:
+                    on_tick(self)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+    @property
+    def snake(self):
+        return self.arena.snakes.get(self.player)
+
+    def turn(self, direction):
+        """ Envoie un virage (seulement s'il change la direction demandée). """
+        if direction != self.last_turn:
+            self.last_turn = direction
+            self.writer.write(bytes((DIRECTIONS.index(direction),)))
+
+    def close(self):
+        self.writer.close()
+
+
+async def run_bot(host, port, seed=None):
+    """ Client automatique (arena.ArenaAgent), pour les tests de charge. """
+    client = await Client.connect(host, port)
+    agent = ArenaAgent(seed)
+
+    def on_tick(client):
+        direction = agent.act(client.arena, client.player)
+        if direction is not None and direction != client.snake.direction:
+            client.turn(direction)
+
+    await client.receive(on_tick)
+    client.close()
+
+
+async def run_bots(count, host=HOST, port=PORT, seed=None):
+    rng = random.Random(seed)
+    await asyncio.gather(*(run_bot(host, port, rng.getrandbits(32)) for _ in range(count)))
+
+
+async def play(host=HOST, port=PORT):
+    """ Client avec fenêtre : le serpent du joueur se dirige avec les flèches. """
+    import pygame
+
+    import assets
+    from engine import HEIGHT, WIDTH
+    from renderer import ArenaRenderer
+
+    client = await Client.connect(host, port)
+    pygame.init()
+    display = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption(f"Snake en réseau - joueur {client.player}")
+    renderer = ArenaRenderer(display, client.arena, focus=client.player)
+    font = assets.font("hud")
+    keys = {pygame.K_UP: "UP", pygame.K_DOWN: "DOWN", pygame.K_LEFT: "LEFT", pygame.K_RIGHT: "RIGHT"}
+    receiver = asyncio.create_task(client.receive())
+    running = True
+    while running and not receiver.done():
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                running = False
+            elif event.type == pygame.KEYDOWN and event.key in keys:
+                client.turn(keys[event.key])
+        score = client.arena.scores.get(client.player)
+        status = f"Score: {score}" if score is not None else "Réapparition..."
+        renderer.set_text("score", f"{status}   Joueurs: {len(client.arena.snakes)}", font, (255, 255, 255),
+                          lambda width: (WIDTH // 2 - width // 2, 20))
+        renderer.render()
+        await asyncio.sleep(1 / 60)
+    receiver.cancel()
+    client.close()
+    pygame.quit()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Snake en réseau")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="lancer un serveur")
+    serve.add_argument("--cols", type=int, default=COLS)
+    serve.add_argument("--rows", type=int, default=ROWS)
+    serve.add_argument("--tick-rate", type=float, default=BASE_SPEED, help="tours par seconde")
+    serve.add_argument("--apples", type=int, default=5, help="pommes sur le plateau")
+    serve.add_argument("--obstacles", type=int, default=0, help="obstacles placés au hasard")
+    serve.add_argument("--ai", type=int, default=0, help="serpents automatiques joués par le serveur")
+    serve.add_argument("--seed", type=int)
+    play_parser = commands.add_parser("play", help="rejoindre une partie")
+    bots = commands.add_parser("bots", help="lancer des clients automatiques")
+    bots.add_argument("count", type=int)
+    bots.add_argument("--seed", type=int)
+    for command in (serve, play_parser, bots):
+        command.add_argument("--host", default=HOST)
+        command.add_argument("--port", type=int, default=PORT)
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "serve":
+            arena = Arena(args.cols, args.rows, seed=args.seed, apples=args.apples, obstacles=args.obstacles)
+            print(f"Serveur sur {args.host}:{args.port} - plateau {args.cols}x{args.rows}, "
+                  f"{args.tick_rate:g} tours/s", file=sys.stderr)
+            asyncio.run(Server(arena, args.tick_rate, bots=args.ai).serve(args.host, args.port))
+        elif args.command == "play":
+            asyncio.run(play(args.host, args.port))
+        else:
+            asyncio.run(run_bots(args.count, args.host, args.port, args.seed))
+    except KeyboardInterrupt:
+        pass
+    except (ConnectionError, ProtocolError) as error:
+        sys.exit(f"Erreur réseau : {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""Mesure des images de la boucle de jeu (F3 : activer et afficher, F4 : enregistrer la trace).
+
+Chaque image est découpée en phases : lecture des événements, déplacement
+du serpent, pommes, collisions, reste de la simulation (pilote, replay,
+sons), dessin, envoi à l'écran et attente de l'horloge. Le moteur et le
+renderer appellent mark() à la fin de leurs phases quand un profileur leur
+est attaché (game.profiler, renderer.profiler) ; sinon ils ne mesurent rien.
+
+Les allocations sont comptées avec sys.getallocatedblocks() : c'est la
+variation du nombre de blocs alloués par Python pendant l'image
+(allocations moins libérations).
+
+La trace des dernières images s'enregistre en JSON ou en CSV, pour
+chercher les pics (Apple.respawn avec un long serpent...) :
+    python profiler.py trace.json      # résumé d'une trace et pires images
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from itertools import islice
+
+PHASES = ("events", "move", "apples", "collision", "simulation", "draw", "flip", "wait")
+# Colonnes de la trace : temps en millisecondes, "time" en secondes depuis la création du profileur
+FIELDS = ("frame", "time", "total") + PHASES + ("allocations", "ticks", "length")
+TRACE_FRAMES = 36000  # Images gardées pour la trace (10 minutes à 60 images par seconde)
+WINDOW = 240  # Images prises en compte par l'affichage
+OVERLAY_INTERVAL = 0.25  # Secondes entre deux mises à jour de l'affichage
+OVERLAY_COLOR = (255, 255, 0)
+
+
+def percentile(values, fraction):
+    """ Percentile (rang le plus proche) d'une liste de valeurs non vide. """
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def summarize(frames):
+    """ Pour chaque colonne mesurée : (moyenne, p50, p99, max). """
+    summary = {}
+    for position, field in enumerate(FIELDS):
+        if field in ("frame", "time"):
+            continue
+        values = [frame[position] for frame in frames]
+        summary[field] = (sum(values) / len(values), percentile(values, 0.5), percentile(values, 0.99),
+                          max(values))
+    return summary
+
+
+class FrameProfiler:
+    """ Temps de chaque phase des images de la boucle de jeu, et trace des dernières images. """
+
+    def __init__(self, trace_frames=TRACE_FRAMES, clock=time.perf_counter):
+        self.enabled = False
+        self.clock = clock
+        self.origin = clock()
+        self.frames = deque(maxlen=trace_frames)  # Un tuple par image, dans l'ordre de FIELDS
+        self.count = 0
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.start = None  # Début de l'image en cours (None : pas d'image en cours)
+        self.last = None  # Fin de la dernière phase mesurée
+        self.blocks = 0
+        self.skipped = False
+        self.overlay_time = None
+        self.overlay_items = []
+
+    def enable(self):
+        self.enabled = True
+        self.begin()
+        self.skip()  # L'image en cours a commencé avant l'activation
+
+    def disable(self):
+        self.enabled = False
+        self.start = self.last = None
+
+    def begin(self):
+        """ Début d'une image. """
+        if not self.enabled:
+            return
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.skipped = False
+        self.blocks = sys.getallocatedblocks()
+        self.start = self.last = self.clock()
+
+    def mark(self, phase):
+        """ Fin d'une phase : le temps écoulé depuis la phase précédente lui est compté. """
+        if self.start is None:
+            return
+        now = self.clock()
+        self.phases[phase] += now - self.last
+        self.last = now
+
+    def skip(self):
+        """ L'image en cours ne sera pas enregistrée (pause, activation du profileur...). """
+        self.skipped = True
+
+    def end(self, game=None):
+        """ Fin d'une image ; renvoie la ligne ajoutée à la trace (None si rien n'a été mesuré). """
+        if self.start is None or self.skipped:
+            return None
+        now = self.clock()
+        allocations = sys.getallocatedblocks() - self.blocks
+        record = (self.count, round(self.start - self.origin, 6), (now - self.start) * 1000,
+                  *(self.phases[phase] * 1000 for phase in PHASES), allocations,
+                  game.ticks if game is not None else 0, len(game.snake.cells) if game is not None else 0)
+        self.frames.append(record)
+        self.count += 1
+        self.start = None
+        return record
+
+    def recent(self, count=WINDOW):
+        """ Les count dernières images, de la plus ancienne à la plus récente. """
+        return list(islice(reversed(self.frames), count))[::-1]
+
+    def overlay_lines(self):
+        frames = self.recent()
+        if not frames:
+            return ["Profileur : mesure en cours..."]
+        summary = summarize(frames)
+        mean_total = summary["total"][0]
+        lines = [f"FPS {1000 / mean_total if mean_total else 0:.0f}  p50 {summary['total'][1]:.1f} ms  "
+                 f"p99 {summary['total'][2]:.1f} ms  allocs/image {summary['allocations'][0]:+.0f}"]
+        for group in (PHASES[:4], PHASES[4:]):
+            lines.append("  ".join(f"{phase} {summary[phase][0]:.2f}" for phase in group))
+        return lines
+
+    def draw(self, renderer):
+        """ Met à jour l'affichage (quelques fois par seconde seulement : le texte coûte cher à rendre). """
+        if not self.enabled:
+            return
+        now = self.clock()
+        if self.overlay_time is not None and now - self.overlay_time < OVERLAY_INTERVAL \
+                and all(name in renderer.items for name in self.overlay_items):
+            return
+        import assets
+
+        self.overlay_time = now
+        font = assets.font("profiler")
+        self.overlay_items = []
+        for line_number, text in enumerate(self.overlay_lines()):
+            name = f"profiler{line_number}"
+            y = 60 + line_number * font.get_linesize()
+            renderer.set_text(name, text, font, OVERLAY_COLOR, lambda width, y=y: (20, y))
+            self.overlay_items.append(name)
+
+    def hide(self, renderer):
+        for name in self.overlay_items:
+            renderer.remove_item(name)
+        self.overlay_items = []
+        self.overlay_time = None
+
+    def dump(self, path):
+        """ Enregistre la trace en JSON ou en CSV (d'après l'extension de path). """
+        if path.endswith(".csv"):
+            with open(path, "w", newline="") as file:
+                writer = csv.writer(file)
+                writer.writerow(FIELDS)
+                writer.writerows(self.frames)
+        else:
+            with open(path, "w") as file:
+                json.dump({"fields": FIELDS, "frames": list(self.frames)}, file)
+        return path
+
+
+def load_trace(path):
+    """ Relit une trace enregistrée par FrameProfiler.dump : liste de tuples dans l'ordre de FIELDS. """
+    if path.endswith(".csv"):
+        with open(path, newline="") as file:
+            rows = list(csv.reader(file))
+        if not rows or tuple(rows[0]) != FIELDS:
+            raise ValueError("ce fichier n'est pas une trace du profileur")
+        return [tuple(float(value) for value in row) for row in rows[1:]]
+    with open(path) as file:
+        data = json.load(file)
+    if tuple(data.get("fields", ())) != FIELDS:
+        raise ValueError("ce fichier n'est pas une trace du profileur")
+    return [tuple(frame) for frame in data["frames"]]
+
+
+def trace_dir():
+    from scores import user_data_dir
+
+    return os.path.join(user_data_dir(), "traces")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Résumé d'une trace du profileur du jeu Snake")
+    parser.add_argument("trace", help="trace enregistrée avec F4 (.json ou .csv)")
+    parser.add_argument("--worst", type=int, default=10, help="nombre de pires images à afficher")
+    args = parser.parse_args(argv)
+
+    frames = load_trace(args.trace)
+    if not frames:
+        print("Trace vide")
+        return
+    print(f"{len(frames)} images")
+    print(f"{'':12} {'moyenne':>9} {'p50':>9} {'p99':>9} {'max':>9}")
+    for field, values in summarize(frames).items():
+        print(f"{field:12} " + " ".join(f"{value:9.2f}" for value in values))
+    total = FIELDS.index("total")
+    print("Pires images :")
+    for frame in sorted(frames, key=lambda frame: frame[total], reverse=True)[:args.worst]:
+        phases = sorted(zip(PHASES, frame[3:3 + len(PHASES)]), key=lambda item: item[1], reverse=True)
+        slowest = ", ".join(f"{phase} {value:.2f}" for phase, value in phases[:3])
+        print(f"  image {int(frame[0])} : {frame[total]:.2f} ms ({slowest}) - tour {int(frame[-2])}, "
+              f"longueur {int(frame[-1])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,410 @@
+"""Affichage incrémental de la partie (rectangles modifiés uniquement).
+
+À chaque image, seules les cases qui ont changé (nouvelle tête, case
+libérée par la queue, pommes apparues ou disparues) et les éléments du
+HUD dont le contenu a changé sont redessinés, puis envoyés à l'écran avec
+pygame.display.update(rects). Le coût d'une image ne dépend plus de la
+longueur du serpent ni du nombre d'obstacles.
+
+L'affichage tourne plus vite que la simulation : render(alpha) dessine la
+tête qui glisse dans sa nouvelle case et la queue qui quitte l'ancienne,
+alpha étant la fraction du tour en cours déjà écoulée.
+
+Le plateau peut être bien plus grand que la fenêtre (1000 x 1000 cases) :
+une caméra suit la tête du serpent et seules les cases visibles sont
+parcourues et dessinées. La caméra avance par à-coups, quand la tête
+s'approche du bord de la vue ; entre deux déplacements de la caméra,
+l'affichage reste incrémental.
+"""
+import math
+
+import pygame
+
+import assets
+
+BACKGROUND = (0, 0, 0)
+SNAKE_COLOR = (0, 255, 0)
+OTHER_SNAKE_COLOR = (0, 150, 255)  # Serpents des autres joueurs (arène)
+APPLE_COLOR = (255, 0, 0)
+SPECIAL_APPLE_COLOR = (255, 165, 0)  # Pomme spéciale
+OBSTACLE_COLOR = (169, 169, 169)
+BORDER_COLOR = (255, 255, 255)
+BAR_BACKGROUND = (169, 169, 169)
+
+
+def draw_apple(surface, apple, grid_size, offset=(0, 0)):
+    x, y = apple.position[0] - offset[0], apple.position[1] - offset[1]
+    if apple.special:
+        pygame.draw.polygon(surface, SPECIAL_APPLE_COLOR, [(x + grid_size // 2, y),
+                                                           (x, y + grid_size),
+                                                           (x + grid_size, y + grid_size)])
+    else:
+        pygame.draw.circle(surface, APPLE_COLOR, (x + grid_size // 2, y + grid_size // 2), grid_size // 2)
+
+
+def draw_snake_cells(surface, board, rect, offset, skip=(), color_of=None):
+    """ Dessine les segments de serpent des cases du plateau qui touchent rect (sauf les cases de skip).
+
+    rect est en pixels de l'écran, offset la position de l'écran sur le
+    plateau. color_of(case) donne la couleur de chaque segment (SNAKE_COLOR
+    par défaut). Seules les cases couvertes par rect sont parcourues.
+    """
+    grid_size, cells, snake_mask = board.grid_size, board.cells, board.SNAKE_MASK
+    offset_x, offset_y = offset
+    x0 = max((rect.left + offset_x) // grid_size, 0)
+    y0 = max((rect.top + offset_y) // grid_size, 0)
+    x1 = min((rect.right - 1 + offset_x) // grid_size, board.cols - 1)
+    y1 = min((rect.bottom - 1 + offset_y) // grid_size, board.rows - 1)
+    for y in range(y0, y1 + 1):
+        row = y * board.cols
+        for x in range(x0, x1 + 1):
+            if cells[row + x] & snake_mask and row + x not in skip:
+                color = SNAKE_COLOR if color_of is None else color_of(row + x)
+                pygame.draw.rect(surface, color,
+                                 (x * grid_size - offset_x, y * grid_size - offset_y, grid_size, grid_size))
+
+
+class TextItem:
+    """ Texte du HUD ; anchor(largeur) donne la position du coin haut gauche. """
+
+    def __init__(self, text, font, color, anchor):
+        self.key = (text, color)
+        self.surface = assets.render_text(font, text, color)
+        self.rect = self.surface.get_rect(topleft=anchor(self.surface.get_width()))
+
+    def draw(self, surface):
+        surface.blit(self.surface, self.rect)
+
+
+class ProgressBar:
+    """ Barre de progression du HUD (pomme spéciale). """
+
+    def __init__(self, rect, progress_width, color):
+        self.rect = pygame.Rect(rect)
+        self.progress_width = progress_width
+        self.color = color
+        self.key = (tuple(self.rect), progress_width, color)
+
+    def draw(self, surface):
+        pygame.draw.rect(surface, BAR_BACKGROUND, self.rect)
+        pygame.draw.rect(surface, self.color, (self.rect.x, self.rect.y, self.progress_width, self.rect.height))
+
+
+class GameRenderer:
+    """ Dessine une partie (engine.Game) en ne mettant à jour que les zones modifiées. """
+
+    def __init__(self, surface, game):
+        self.surface = surface
+        self.game = game
+        self.board = game.board
+        self.grid_size = game.board.grid_size
+        game.changes = set()  # Le moteur note désormais les cases modifiées
+        self.items = {}
+        self.dirty = []  # Rectangles à redessiner à la prochaine image
+        self.full_redraw = True
+        self.static_layer = None
+        self.static_version = None  # Version des obstacles de la couche statique
+        self.partial = []  # Cases dessinées à moitié (tête et queue en mouvement) à l'image précédente
+        self.profiler = None  # profiler.FrameProfiler : temps du dessin et de l'envoi à l'écran
+        width, height = surface.get_size()
+        # Cases entièrement visibles, et cases touchées par la fenêtre (la dernière à moitié)
+        self.view_cols = min(width // self.grid_size, self.board.cols)
+        self.view_rows = min(height // self.grid_size, self.board.rows)
+        self.visible_cols = min(-(-width // self.grid_size), self.board.cols)
+        self.visible_rows = min(-(-height // self.grid_size), self.board.rows)
+        self.camera = self._center_on(self._focus())  # Case du plateau en haut à gauche de l'écran
+
+    def invalidate(self):
+        """ Force un redessin complet (après un écran de pause, par exemple). """
+        self.full_redraw = True
+
+    def set_item(self, name, item):
+        """ Place ou remplace un élément du HUD ; il n'est redessiné que si son contenu change. """
+        old = self.items.get(name)
+        if old is not None and old.key == item.key:
+            return
+        self.items[name] = item
+        if old is not None:
+            self.dirty.append(old.rect)
+        self.dirty.append(item.rect)
+
+    def set_text(self, name, text, font, color, anchor):
+        old = self.items.get(name)
+        if old is not None and old.key == (text, color):
+            return  # Évite de refaire le rendu du texte
+        self.set_item(name, TextItem(text, font, color, anchor))
+
+    def remove_item(self, name):
+        old = self.items.pop(name, None)
+        if old is not None:
+            self.dirty.append(old.rect)
+
+    @property
+    def offset(self):
+        """ Position (en pixels du plateau) du coin haut gauche de l'écran. """
+        return self.camera[0] * self.grid_size, self.camera[1] * self.grid_size
+
+    def _center_on(self, index):
+        """ Caméra centrée sur la case index, sans sortir du plateau. """
+        board = self.board
+        x = index % board.cols - self.view_cols // 2
+        y = index // board.cols - self.view_rows // 2
+        return (max(0, min(x, board.cols - self.view_cols)),
+                max(0, min(y, board.rows - self.view_rows)))
+
+    def _focus(self):
+        """ Case suivie par la caméra. """
+        return self.game.snake.cells[0]
+
+    def _follow(self):
+        """ Recentre la caméra quand la tête entre dans le dernier quart de la vue. """
+        head = self._focus()
+        x = head % self.board.cols - self.camera[0]
+        y = head // self.board.cols - self.camera[1]
+        margin_x, margin_y = self.view_cols // 4, self.view_rows // 4
+        if (x < margin_x or x >= self.view_cols - margin_x or y < margin_y or y >= self.view_rows - margin_y):
+            self.camera = self._center_on(head)  # La couche statique sera refaite
+
+    def is_visible(self, index):
+        x = index % self.board.cols - self.camera[0]
+        y = index // self.board.cols - self.camera[1]
+        return 0 <= x < self.visible_cols and 0 <= y < self.visible_rows
+
+    def cell_rect(self, index):
+        """ Zone de l'écran à redessiner pour une case : le triangle de la pomme
+        spéciale déborde d'un pixel sur les cases voisines. """
+        grid_size = self.grid_size
+        return pygame.Rect((index % self.board.cols - self.camera[0]) * grid_size,
+                           (index // self.board.cols - self.camera[1]) * grid_size,
+                           grid_size + 1, grid_size + 1)
+
+    def _build_static_layer(self):
+        """ Fond, obstacles et bordure de la zone visible cuits dans une surface.
+
+        Les obstacles ne changent pas pendant une partie : la couche n'est
+        reconstruite que si la version des obstacles du plateau change
+        (nouveau niveau, carte générée...) ou si la caméra se déplace. Seules
+        les cases visibles sont parcourues, quelle que soit la taille du plateau.
+        """
+        board, grid_size = self.board, self.grid_size
+        camera_x, camera_y = self.camera
+        layer = pygame.Surface(self.surface.get_size()).convert()
+        layer.fill(BACKGROUND)
+        cells = board.cells
+        for y in range(min(self.visible_rows, board.rows - camera_y)):
+            row = (camera_y + y) * board.cols + camera_x
+            for x in range(min(self.visible_cols, board.cols - camera_x)):
+                if cells[row + x] & board.OBSTACLE:
+                    pygame.draw.rect(layer, OBSTACLE_COLOR, (x * grid_size, y * grid_size, grid_size, grid_size))
+        pygame.draw.rect(layer, BORDER_COLOR, self._border(), 2)
+        self.static_layer = layer
+        self.static_version = (board.obstacle_version, self.camera)
+
+    def _border(self):
+        offset_x, offset_y = self.offset
+        return pygame.Rect(-offset_x, -offset_y, self.board.width, self.board.height)
+
+    def _draw_snake_cells(self, rect, skip=()):
+        """ Dessine les segments du serpent dans les cases qui touchent rect (sauf les cases de skip). """
+        draw_snake_cells(self.surface, self.board, rect, self.offset, skip)
+
+    def _apples(self):
+        """ Pommes des cases visibles : le triangle de la pomme spéciale déborde d'un pixel,
+        une pomme juste hors de la vue ne doit pas en laisser un au bord de l'écran. """
+        index = self.board.index
+        return [apple for apple in (self.game.apple, self.game.special_apple)
+                if apple is not None and apple.position is not None and self.is_visible(index(apple.position))]
+
+    def _draw_overlays(self, rect):
+        """ Pommes, bordure (au-dessus du serpent) et HUD dans rect. """
+        surface, grid_size = self.surface, self.grid_size
+        offset_x, offset_y = self.offset
+        for apple in self._apples():
+            if rect.colliderect((apple.position[0] - offset_x, apple.position[1] - offset_y,
+                                 grid_size + 1, grid_size + 1)):
+                draw_apple(surface, apple, grid_size, (offset_x, offset_y))
+        border = self._border()
+        if not border.inflate(-4, -4).contains(rect):
+            pygame.draw.rect(surface, BORDER_COLOR, border, 2)
+        for item in self.items.values():
+            if rect.colliderect(item.rect):
+                item.draw(surface)
+
+    def _redraw(self, rect):
+        """ Redessine rect : couche statique en un seul blit, puis serpent, pommes et HUD. """
+        surface = self.surface
+        surface.set_clip(rect)
+        surface.blit(self.static_layer, rect, rect)
+        self._draw_snake_cells(rect)
+        self._draw_overlays(rect)
+        surface.set_clip(None)
+
+    def _side(self, origin, target):
+        """ Direction de la case voisine target vue depuis origin (bords du plateau compris). """
+        cols = self.board.cols
+        dx = target % cols - origin % cols
+        dy = target // cols - origin // cols
+        if dx:
+            return "RIGHT" if dx == 1 or dx < -1 else "LEFT"
+        return "DOWN" if dy == 1 or dy < -1 else "UP"
+
+    def _edge_rect(self, index, side, size):
+        """ Bande de size pixels collée au bord side de la case index. """
+        grid_size = self.grid_size
+        x, y = self.cell_rect(index).topleft
+        if side == "LEFT":
+            return pygame.Rect(x, y, size, grid_size)
+        if side == "RIGHT":
+            return pygame.Rect(x + grid_size - size, y, size, grid_size)
+        if side == "UP":
+            return pygame.Rect(x, y, grid_size, size)
+        return pygame.Rect(x, y + grid_size - size, grid_size, size)
+
+    def _motion(self, alpha):
+        """ (case, bande à remplir) pour la tête qui entre et la queue qui sort au tour en cours. """
+        game, board = self.game, self.board
+        snake = game.snake
+        if game.state != "continue" or alpha >= 1 or len(snake.cells) < 2:
+            return []
+        head, neck, vacated = snake.cells[0], snake.cells[1], snake.vacated
+        grid_size = self.grid_size
+        motion = []
+        if board.snake_count(head) == 1 and head != neck:
+            size = max(1, math.ceil(alpha * grid_size))
+            motion.append((head, self._edge_rect(head, self._side(head, neck), size)))
+        if vacated is not None and board.cells[vacated] == 0:
+            size = grid_size - int(alpha * grid_size)
+            if size > 0:
+                motion.append((vacated, self._edge_rect(vacated, self._side(vacated, snake.cells[-1]), size)))
+        return motion
+
+    def _draw_motion(self, alpha):
+        """ Redessine la tête et la queue en cours de déplacement ; renvoie les zones touchées. """
+        surface = self.surface
+        rects = []
+        motion = [(index, fill) for index, fill in self._motion(alpha) if self.is_visible(index)]
+        self.partial = [index for index, _ in motion]
+        for index, _ in motion:
+            rect = self.cell_rect(index)
+            surface.set_clip(rect)
+            surface.blit(self.static_layer, rect, rect)
+            # Le rectangle déborde d'un pixel sur les cases voisines, qui peuvent être l'autre case en mouvement
+            self._draw_snake_cells(rect, skip=self.partial)
+            for _, fill in motion:
+                pygame.draw.rect(surface, SNAKE_COLOR, fill)
+            self._draw_overlays(rect)
+            surface.set_clip(None)
+            rects.append(rect)
+        return rects
+
+    def _redraw_all(self):
+        surface, grid_size = self.surface, self.grid_size
+        surface.blit(self.static_layer, (0, 0))
+        snake = self.game.snake
+        if len(snake.cells) < self.visible_cols * self.visible_rows:
+            for index in set(snake.cells):
+                if self.is_visible(index):
+                    pygame.draw.rect(surface, SNAKE_COLOR, (*self.cell_rect(index).topleft, grid_size, grid_size))
+        else:
+            self._draw_snake_cells(surface.get_rect())  # Serpent plus long que la vue : on parcourt la vue
+        self._draw_overlays(surface.get_rect())
+
+    def render(self, alpha=None):
+        """ Dessine l'image courante et l'envoie à l'écran ; renvoie les rectangles mis à jour.
+
+        alpha (entre 0 et 1) est l'avancement du tour en cours : la tête et la
+        queue sont dessinées en mouvement. Sans alpha, le serpent est dessiné
+        case par case.
+        """
+        changes = self.game.changes
+        # Les cases dessinées à moitié à l'image précédente sont à refaire
+        changes.update(self.partial)
+        self.partial = []
+        self._follow()
+        if self.static_layer is None or self.static_version != (self.board.obstacle_version, self.camera):
+            self._build_static_layer()
+            self.full_redraw = True
+        if self.full_redraw:
+            self.full_redraw = False
+            changes.clear()
+            self.dirty = []
+            self._redraw_all()
+            if alpha is not None:
+                self._draw_motion(alpha)
+            self._mark("draw")
+            pygame.display.flip()
+            self._mark("flip")
+            return [self.surface.get_rect()]
+
+        rects = self.dirty
+        rects.extend(self.cell_rect(index) for index in changes if self.is_visible(index))
+        changes.clear()
+        self.dirty = []
+        for rect in rects:
+            self._redraw(rect)
+        if alpha is not None:
+            rects.extend(self._draw_motion(alpha))
+        self._mark("draw")
+        if not rects:
+            return []
+        pygame.display.update(rects)
+        self._mark("flip")
+        return rects
+
+    def _mark(self, phase):
+        if self.profiler is not None:
+            self.profiler.mark(phase)
+
+
+class Pellet:
+    """ Pomme de l'arène (ou sprite de pomme), à dessiner avec draw_apple. """
+    __slots__ = ("position", "special")
+
+    def __init__(self, position, special=False):
+        self.position = position
+        self.special = special
+
+
+class ArenaRenderer(GameRenderer):
+    """ Affichage d'une arène (arena.Arena) : tous les serpents, les pommes, et une caméra sur l'un d'eux.
+
+    Les tours de l'arène arrivent du réseau à un rythme irrégulier : les
+    serpents sont dessinés case par case, sans interpolation.
+    """
+
+    def __init__(self, surface, arena, focus=None):
+        self.focus = focus  # id du serpent suivi par la caméra
+        self.last_focus = arena.board.cols * (arena.board.rows // 2) + arena.board.cols // 2
+        self.pellets = []
+        self.pellets_key = None
+        super().__init__(surface, arena)
+
+    def _focus(self):
+        snake = self.game.snakes.get(self.focus)
+        if snake is not None:
+            self.last_focus = snake.cells[0]
+        return self.last_focus  # Serpent mort : la caméra reste où il était
+
+    def _apples(self):
+        # Les pommes ne changent qu'à chaque tour : la liste sert à tous les rectangles de l'image
+        key = (self.game.ticks, self.camera)
+        if key != self.pellets_key:
+            position = self.board.position
+            self.pellets = [Pellet(position(cell)) for cell in self.game.apples if self.is_visible(cell)]
+            self.pellets_key = key
+        return self.pellets
+
+    def _motion(self, alpha):
+        return []
+
+    def _draw_snake_cells(self, rect, skip=()):
+        """ Comme GameRenderer._draw_snake_cells, avec la couleur du serpent lue dans la grille des propriétaires. """
+        owner, focus = self.game.owner, self.focus
+        draw_snake_cells(self.surface, self.board, rect, self.offset, skip,
+                         lambda index: SNAKE_COLOR if owner[index] == focus else OTHER_SNAKE_COLOR)
+
+    def _redraw_all(self):
+        surface = self.surface
+        surface.blit(self.static_layer, (0, 0))
+        self._draw_snake_cells(surface.get_rect())
+        self._draw_overlays(surface.get_rect())
@@ -0,0 +1,271 @@
+"""Enregistrement et relecture des parties.
+
+Une partie est entièrement déterminée par sa graine, son mode, sa
+difficulté, son niveau généré éventuel et la direction du serpent à chaque
+tour : les obstacles et les pommes viennent du générateur aléatoire de la
+partie (et de levels.py, depuis son cache, pour les niveaux générés). Un replay ne garde
+donc que ces informations, avec 2 bits par tour (4 tours par octet) :
+une minute de jeu à 10 tours par seconde tient en 150 octets.
+
+La relecture sans affichage rejoue des milliers de tours par seconde
+(vérification, tests de non-régression) ; ReplayPlayer garde des
+instantanés de la partie à intervalles réguliers pour sauter à n'importe
+quel tour sans tout rejouer depuis le début.
+
+Exemples :
+    python replay.py partie.snkr              # relecture rapide et vérification du score
+    python replay.py partie.snkr --show --speed 2
+"""
+import argparse
+import os
+import struct
+import sys
+import time
+
+from engine import COLS, DIRECTIONS, HEIGHT, ROWS, WIDTH, Game
+from scores import user_data_dir
+
+MAGIC = b"SNKR"
+VERSION = 2  # La version 1 (sans niveau généré) se relit toujours
+MODES = ("classic", "chrono")
+DIFFICULTIES = ("easy", "medium", "hard")
+LEVELS = (None, "density", "maze", "rooms")  # Presets de levels.py (None : obstacles de la difficulté)
+STATES = ("continue", "game_over", "victory")
+KEYFRAME_INTERVAL = 256  # Tours entre deux instantanés pendant la relecture
+MAX_REPLAYS = 50  # Replays gardés dans le dossier de l'utilisateur
+
+# magic, version, mode, difficulté, état final, graine, colonnes, lignes, tours, score final, niveau
+_HEADER = struct.Struct("<4sBBBBQHHIIB")
+_HEADER_V1 = struct.Struct("<4sBBBBQHHII")
+
+
+class Replay:
+    """ Partie enregistrée : paramètres, directions tour par tour et résultat final. """
+
+    def __init__(self, mode, difficulty, seed, cols=COLS, rows=ROWS, moves=b"", ticks=0, score=0,
+                 state="continue", level=None):
+        if not 0 <= seed < 2 ** 64:
+            raise ValueError(f"graine non enregistrable : {seed!r} (entier sur 64 bits attendu)")
+        self.mode = mode
+        self.difficulty = difficulty
+        self.seed = seed
+        self.cols = cols
+        self.rows = rows
+        self.moves = bytearray(moves)  # 2 bits par tour, indices dans engine.DIRECTIONS
+        self.ticks = ticks
+        self.score = score
+        self.state = state
+        self.level = level
+
+    @classmethod
+    def for_game(cls, game):
+        """ Replay vide, prêt à enregistrer une partie qui vient d'être créée. """
+        return cls(game.mode, game.difficulty, game.seed, game.board.cols, game.board.rows, level=game.level)
+
+    def record(self, game):
+        """ Enregistre le tour que game vient de jouer (appelé après chaque game.step()).
+
+        Les tours doivent être joués avec la durée par défaut (step sans dt)
+        pour que le chrono se rejoue à l'identique.
+        """
+        code = DIRECTIONS.index(game.snake.direction)
+        if self.ticks % 4 == 0:
+            self.moves.append(0)
+        self.moves[-1] |= code << (2 * (self.ticks % 4))
+        self.ticks += 1
+        self.score = game.score
+        self.state = game.state
+
+    def direction(self, tick):
+        """ Direction du serpent au tour tick (en partant de 0). """
+        return DIRECTIONS[(self.moves[tick // 4] >> (2 * (tick % 4))) & 3]
+
+    def new_game(self):
+        return Game(self.mode, self.difficulty, seed=self.seed, cols=self.cols, rows=self.rows, level=self.level)
+
+    def to_bytes(self):
+        header = _HEADER.pack(MAGIC, VERSION, MODES.index(self.mode), DIFFICULTIES.index(self.difficulty),
+                              STATES.index(self.state), self.seed, self.cols, self.rows, self.ticks, self.score,
+                              LEVELS.index(self.level))
+        return header + bytes(self.moves)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if len(data) < _HEADER_V1.size:
+            raise ValueError("replay tronqué")
+        magic, version = data[:4], data[4]
+        if magic != MAGIC:
+            raise ValueError("ce fichier n'est pas un replay")
+        if version not in (1, VERSION):
+            raise ValueError(f"version de replay non prise en charge : {version}")
+        header = _HEADER_V1 if version == 1 else _HEADER
+        if len(data) < header.size:
+            raise ValueError("replay tronqué")
+        _, _, mode, difficulty, state, seed, cols, rows, ticks, score, *level = header.unpack_from(data)
+        moves = data[header.size:]
+        if len(moves) != (ticks + 3) // 4:
+            raise ValueError("replay tronqué")
+        return cls(MODES[mode], DIFFICULTIES[difficulty], seed, cols, rows, moves, ticks, score, STATES[state],
+                   LEVELS[level[0]] if level else None)
+
+    def save(self, path):
+        """ Écrit le replay (dans un fichier temporaire renommé ensuite : pas de fichier à moitié écrit). """
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as file:
+            file.write(self.to_bytes())
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as file:
+            return cls.from_bytes(file.read())
+
+
+def replay_dir():
+    return os.path.join(user_data_dir(), "replays")
+
+
+def save_recent(replay, directory=None, keep=MAX_REPLAYS):
+    """ Enregistre le replay d'une partie jouée et ne garde que les keep plus récents.
+
+    Renvoie le chemin du fichier, ou None si l'écriture a échoué (le jeu
+    continue sans replay).
+    """
+    directory = directory or replay_dir()
+    now = time.time()
+    stamp = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}.{int(now * 1000) % 1000:03d}"
+    name = f"{stamp}_{replay.mode}_{replay.difficulty}_{replay.seed}"
+    try:
+        os.makedirs(directory, exist_ok=True)
+        # Le nom est réservé par une création exclusive : deux parties de
+        # la même milliseconde (même graine) ne s'écrasent pas
+        for number in range(100):
+            path = os.path.join(directory, f"{name}-{number}.snkr" if number else f"{name}.snkr")
+            try:
+                open(path, "x").close()
+                break
+            except FileExistsError:
+                continue
+        else:
+            return None
+        try:
+            replay.save(path)
+        except OSError:
+            os.remove(path)  # Pas de fichier vide dans la liste des replays
+            raise
+        replays = [os.path.join(directory, entry) for entry in os.listdir(directory) if entry.endswith(".snkr")]
+        replays.sort(key=lambda entry: (os.stat(entry).st_mtime_ns, entry))
+        for old in replays[:-keep]:
+            os.remove(old)
+    except OSError:
+        return None
+    return path
+
+
+class ReplayPlayer:
+    """ Rejoue un replay tour par tour, avec retour arrière et saut rapide. """
+
+    def __init__(self, replay, keyframe_interval=KEYFRAME_INTERVAL):
+        self.replay = replay
+        self.keyframe_interval = keyframe_interval
+        self.game = replay.new_game()
+        self.keyframes = [self.game.snapshot()]  # Instantané du tour i * keyframe_interval
+
+    @property
+    def tick(self):
+        return self.game.ticks
+
+    def finished(self):
+        return self.game.ticks >= self.replay.ticks or self.game.state != "continue"
+
+    def step(self):
+        """ Joue le tour suivant ; renvoie le StepResult du moteur. """
+        game = self.game
+        result = game.step(self.replay.direction(game.ticks))
+        if game.ticks % self.keyframe_interval == 0 and game.ticks // self.keyframe_interval == len(self.keyframes):
+            self.keyframes.append(game.snapshot())
+        return result
+
+    def seek(self, tick):
+        """ Place la partie au tour tick, depuis l'instantané le plus proche.
+
+        Les instantanés ne sont pris que sur les tours déjà joués : un
+        retour en arrière, ou un saut en avant dans la partie déjà vue,
+        rejoue au plus keyframe_interval - 1 tours, mais un saut au-delà
+        du dernier instantané rejoue tous les tours jusqu'au but.
+        """
+        tick = max(0, min(tick, self.replay.ticks))
+        keyframe = min(tick // self.keyframe_interval, len(self.keyframes) - 1)
+        # Retour en arrière, ou instantané plus proche du but que la position actuelle
+        if tick < self.game.ticks or keyframe * self.keyframe_interval > self.game.ticks:
+            self.game.restore(self.keyframes[keyframe])
+        while self.game.ticks < tick and not self.finished():
+            self.step()
+
+    def play(self):
+        """ Rejoue jusqu'à la fin sans affichage ; renvoie la partie. """
+        while not self.finished():
+            self.step()
+        return self.game
+
+    def verify(self):
+        """ Vrai si la relecture retrouve le score et l'état enregistrés. """
+        game = self.play()
+        return (game.ticks, game.score, game.state) == (self.replay.ticks, self.replay.score, self.replay.state)
+
+
+def show(replay, speed=1.0):
+    """ Relecture affichée dans une fenêtre, speed fois plus vite que la partie. """
+    import pygame
+    from renderer import GameRenderer
+
+    pygame.init()
+    player = ReplayPlayer(replay)
+    game = player.game
+    # Fenêtre de la taille de l'écran du jeu au plus : la caméra suit la tête sur les grands plateaux
+    display = pygame.display.set_mode((min(game.board.width, WIDTH), min(game.board.height, HEIGHT)))
+    pygame.display.set_caption(f"Replay {replay.mode} {replay.difficulty}")
+    renderer = GameRenderer(display, game)
+    clock = pygame.time.Clock()
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                pygame.quit()
+                return game
+            if event.type == pygame.KEYDOWN and event.key in (pygame.K_LEFT, pygame.K_RIGHT):
+                # Flèches : 10 secondes de jeu en arrière ou en avant
+                offset = int(10 * game.speed) * (1 if event.key == pygame.K_RIGHT else -1)
+                player.seek(player.tick + offset)
+                renderer.invalidate()
+        if not player.finished():
+            player.step()
+        renderer.render()
+        clock.tick(game.speed * speed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Relecture d'une partie de Snake enregistrée")
+    parser.add_argument("replay", help="fichier de replay (.snkr)")
+    parser.add_argument("--show", action="store_true", help="afficher la relecture")
+    parser.add_argument("--speed", type=float, default=1.0, help="vitesse de la relecture affichée")
+    args = parser.parse_args(argv)
+
+    replay = Replay.load(args.replay)
+    level = f" - niveau {replay.level}" if replay.level else ""
+    print(f"{replay.mode} {replay.difficulty}{level} - graine {replay.seed} - {replay.ticks} tours - "
+          f"score {replay.score} ({replay.state})")
+    if args.show:
+        show(replay, args.speed)
+        return
+    start = time.perf_counter()
+    player = ReplayPlayer(replay)
+    ok = player.verify()
+    seconds = time.perf_counter() - start
+    print(f"Relecture : score {player.game.score} en {player.game.ticks} tours "
+          f"({player.game.ticks / seconds:.0f} tours/s) - {'OK' if ok else 'DIFFÉRENT'}")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Stockage local des scores (SQLite).
+
+Tous les scores sont gardés dans une seule base, dans le dossier de
+données de l'utilisateur (resource_path pointe vers un dossier temporaire
+en lecture seule quand le jeu est packagé avec PyInstaller). Chaque partie
+terminée est ajoutée avec sa date dans une transaction : une écriture
+interrompue ne corrompt jamais la base.
+
+Le meilleur score de chaque mode et difficulté est gardé en mémoire : le
+jeu n'interroge pas la base pendant une partie. Les anciens fichiers
+highscore/highscore_{mode}_{difficulty}.txt sont importés une seule fois.
+
+Exemple :
+    python scores.py            # classements de tous les modes
+    python scores.py --top 5
+"""
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import time
+
+APP_NAME = "jeu_snake"
+DATABASE_NAME = "scores.sqlite3"
+TOP_N = 10  # Taille des classements
+
+_LEGACY_FILE = re.compile(r"highscore_(\w+)_(\w+)\.txt$")
+
+
+def user_data_dir():
+    """ Dossier de données de l'utilisateur (variable SNAKE_DATA_DIR pour le changer). """
+    if os.environ.get("SNAKE_DATA_DIR"):
+        return os.environ["SNAKE_DATA_DIR"]
+    if sys.platform == "win32":
+        base = os.environ.get("APPDATA") or os.path.expanduser("~")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Application Support")
+    else:
+        base = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+    return os.path.join(base, APP_NAME)
+
+
+class ScoreStore:
+    """ Scores de toutes les parties, classés par mode et difficulté. """
+
+    def __init__(self, path=None, legacy_dir=None):
+        if path is None:
+            os.makedirs(user_data_dir(), exist_ok=True)
+            path = os.path.join(user_data_dir(), DATABASE_NAME)
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS scores ("
+                "id INTEGER PRIMARY KEY, mode TEXT NOT NULL, difficulty TEXT NOT NULL, "
+                "score INTEGER NOT NULL, created REAL NOT NULL)")
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS scores_ranking ON scores (mode, difficulty, score DESC)")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        if legacy_dir is not None:
+            self.import_legacy(legacy_dir)
+        # Index en mémoire : (mode, difficulté) -> meilleur score
+        self.best_scores = {
+            (mode, difficulty): best
+            for mode, difficulty, best in self.connection.execute(
+                "SELECT mode, difficulty, MAX(score) FROM scores GROUP BY mode, difficulty")
+        }
+
+    def import_legacy(self, directory):
+        """ Importe une seule fois les anciens fichiers highscore_{mode}_{difficulty}.txt. """
+        if self.connection.execute("SELECT 1 FROM meta WHERE key = 'legacy_import'").fetchone():
+            return 0
+        rows = []
+        if os.path.isdir(directory):
+            for name in sorted(os.listdir(directory)):
+                match = _LEGACY_FILE.match(name)
+                if not match:
+                    continue
+                filename = os.path.join(directory, name)
+                try:
+                    with open(filename) as file:
+                        score = int(file.read().strip())
+                except (OSError, ValueError):
+                    continue  # Fichier illisible : on l'ignore
+                if score > 0:
+                    rows.append((match.group(1), match.group(2), score, os.path.getmtime(filename)))
+        with self.connection:  # Les scores et la marque d'import sont écrits ensemble
+            self.connection.executemany(
+                "INSERT INTO scores (mode, difficulty, score, created) VALUES (?, ?, ?, ?)", rows)
+            self.connection.execute("INSERT INTO meta (key, value) VALUES ('legacy_import', ?)",
+                                    (str(time.time()),))
+        return len(rows)
+
+    def best(self, mode, difficulty):
+        """ Meilleur score (0 si aucune partie), lu en mémoire. """
+        return self.best_scores.get((mode, difficulty), 0)
+
+    def add(self, mode, difficulty, score, created=None):
+        """ Enregistre le score d'une partie ; renvoie True si c'est un nouveau record. """
+        if score <= 0:
+            return False
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO scores (mode, difficulty, score, created) VALUES (?, ?, ?, ?)",
+                (mode, difficulty, score, time.time() if created is None else created))
+        record = score > self.best(mode, difficulty)
+        if record:
+            self.best_scores[(mode, difficulty)] = score
+        return record
+
+    def top(self, mode, difficulty, n=TOP_N):
+        """ Les n meilleurs scores : liste de (score, date en secondes depuis l'epoch). """
+        return self.connection.execute(
+            "SELECT score, created FROM scores WHERE mode = ? AND difficulty = ? "
+            "ORDER BY score DESC, created LIMIT ?", (mode, difficulty, n)).fetchall()
+
+    def leaderboards(self, n=TOP_N):
+        """ Classements de tous les modes et difficultés déjà joués. """
+        keys = self.connection.execute(
+            "SELECT DISTINCT mode, difficulty FROM scores ORDER BY mode, difficulty").fetchall()
+        return {key: self.top(*key, n=n) for key in keys}
+
+    def close(self):
+        self.connection.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Classements du jeu Snake")
+    parser.add_argument("--top", type=int, default=TOP_N, help="nombre de scores par classement")
+    parser.add_argument("--database", help="base de scores (par défaut dans le dossier de l'utilisateur)")
+    args = parser.parse_args(argv)
+
+    store = ScoreStore(args.database)
+    for (mode, difficulty), rows in store.leaderboards(args.top).items():
+        print(f"{mode} - {difficulty}")
+        for rank, (score, created) in enumerate(rows, 1):
+            print(f"  {rank:2d}. {score:6d}  {time.strftime('%Y-%m-%d %H:%M', time.localtime(created))}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
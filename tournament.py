@@ -0,0 +1,181 @@
+"""Tournoi d'agents : des milliers de parties sans affichage sur tous les cœurs.
+
+Exemple :
+    python tournament.py --agent greedy --games 1000 --workers 8 --seed 42
+
+Chaque partie a sa propre graine, dérivée de la graine du tournoi, du
+mode, de la difficulté et de son numéro : deux tournois lancés avec les
+mêmes paramètres donnent les mêmes scores, quel que soit le nombre de
+processus.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import time
+
+from agents import load_agent
+from engine import CHRONO_SETTINGS, Game
+
+MODES = ("classic", "chrono")
+DIFFICULTIES = ("easy", "medium", "hard")
+
+
+def game_seed(seed, mode, difficulty, number):
+    """ Graine déterministe d'une partie (indépendante de PYTHONHASHSEED). """
+    return random.Random(f"{seed}:{mode}:{difficulty}:{number}").getrandbits(63)
+
+
+def play_game(agent_class, mode, difficulty, seed, max_ticks):
+    """ Joue une partie jusqu'à la fin (ou max_ticks tours) et renvoie son résultat. """
+    game = Game(mode, difficulty, seed=seed)
+    agent = agent_class(seed)
+    while game.state == "continue" and game.ticks < max_ticks:
+        game.step(agent.act(game))
+    return {
+        "score": game.score,
+        "ticks": game.ticks,
+        "state": game.state,
+        "end_reason": game.end_reason,
+    }
+
+
+def run_batch(task):
+    """ Joue un lot de parties dans un processus du pool. """
+    agent_spec, mode, difficulty, numbers, seed, max_ticks = task
+    agent_class = load_agent(agent_spec)
+    start = time.perf_counter()
+    results = []
+    for number in numbers:
+        result = play_game(agent_class, mode, difficulty, game_seed(seed, mode, difficulty, number), max_ticks)
+        result["number"] = number
+        results.append(result)
+    return {
+        "mode": mode,
+        "difficulty": difficulty,
+        "worker": os.getpid(),
+        "seconds": time.perf_counter() - start,
+        "results": results,
+    }
+
+
+def make_tasks(agent_spec, modes, difficulties, games, seed, max_ticks, batch_size):
+    tasks = []
+    for mode in modes:
+        for difficulty in difficulties:
+            for first in range(0, games, batch_size):
+                numbers = range(first, min(first + batch_size, games))
+                tasks.append((agent_spec, mode, difficulty, numbers, seed, max_ticks))
+    return tasks
+
+
+def summarize(batches):
+    """ Statistiques par mode et difficulté, et débit (tours/s) de chaque processus. """
+    groups = {}
+    workers = {}
+    for batch in batches:
+        groups.setdefault((batch["mode"], batch["difficulty"]), []).extend(batch["results"])
+        worker = workers.setdefault(batch["worker"], {"ticks": 0, "seconds": 0.0, "games": 0})
+        worker["ticks"] += sum(result["ticks"] for result in batch["results"])
+        worker["seconds"] += batch["seconds"]
+        worker["games"] += len(batch["results"])
+
+    summary = []
+    for (mode, difficulty), results in sorted(groups.items()):
+        results.sort(key=lambda result: result["number"])  # Ordre stable, quel que soit l'ordonnancement
+        scores = [result["score"] for result in results]
+        ticks = [result["ticks"] for result in results]
+        # Seul le mode chrono se gagne : victoire quand le score est atteint avant la fin du temps
+        victory_score = CHRONO_SETTINGS[difficulty][1] if mode == "chrono" else None
+        victories = sum(result["state"] == "victory" for result in results)
+        summary.append({
+            "mode": mode,
+            "difficulty": difficulty,
+            "games": len(results),
+            "mean_score": statistics.fmean(scores),
+            "max_score": max(scores),
+            "mean_ticks": statistics.fmean(ticks),
+            "victory_score": victory_score,
+            "victory_rate": victories / len(results) if mode == "chrono" else None,
+            "scores": scores,
+        })
+
+    per_worker = [
+        {"worker": pid, "games": stats["games"], "ticks": stats["ticks"],
+         "ticks_per_second": stats["ticks"] / stats["seconds"] if stats["seconds"] else 0.0}
+        for pid, stats in sorted(workers.items())
+    ]
+    return summary, per_worker
+
+
+def run_tournament(agent_spec="greedy", modes=MODES, difficulties=DIFFICULTIES, games=100, seed=0,
+                   workers=None, max_ticks=20000, batch_size=25):
+    """ Lance le tournoi sur un pool de processus et renvoie le rapport. """
+    load_agent(agent_spec)  # Erreur immédiate si l'agent est introuvable
+    tasks = make_tasks(agent_spec, modes, difficulties, games, seed, max_ticks, batch_size)
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    if workers == 1:
+        batches = [run_batch(task) for task in tasks]
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            batches = list(pool.imap_unordered(run_batch, tasks))
+    wall_time = time.perf_counter() - start
+
+    summary, per_worker = summarize(batches)
+    total_ticks = sum(worker["ticks"] for worker in per_worker)
+    return {
+        "agent": agent_spec,
+        "seed": seed,
+        "workers": workers,
+        "wall_seconds": wall_time,
+        "ticks_per_second": total_ticks / wall_time if wall_time else 0.0,
+        "results": summary,
+        "per_worker": per_worker,
+    }
+
+
+def print_report(report):
+    print(f"Agent {report['agent']} - graine {report['seed']} - {report['workers']} processus")
+    print(f"{'mode':8} {'difficulté':10} {'parties':>8} {'score moy.':>10} {'max':>6} "
+          f"{'tours moy.':>10} {'victoires':>9}")
+    for row in report["results"]:
+        victories = f"{row['victory_rate']:9.1%}" if row["victory_rate"] is not None else f"{'-':>9}"
+        print(f"{row['mode']:8} {row['difficulty']:10} {row['games']:8d} {row['mean_score']:10.1f} "
+              f"{row['max_score']:6d} {row['mean_ticks']:10.1f} {victories}")
+    for worker in report["per_worker"]:
+        print(f"processus {worker['worker']}: {worker['games']} parties, "
+              f"{worker['ticks_per_second']:.0f} tours/s")
+    print(f"Total : {report['ticks_per_second']:.0f} tours/s en {report['wall_seconds']:.2f} s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tournoi d'agents Snake sans affichage")
+    parser.add_argument("--agent", default="greedy", help="agent intégré (random, greedy, autopilot) ou module:Classe")
+    parser.add_argument("--games", type=int, default=100, help="parties par mode et par difficulté")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--difficulties", nargs="+", choices=DIFFICULTIES, default=list(DIFFICULTIES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="nombre de processus (tous les cœurs par défaut)")
+    parser.add_argument("--max-ticks", type=int, default=20000, help="limite de tours par partie")
+    parser.add_argument("--batch-size", type=int, default=25, help="parties par tâche envoyée au pool")
+    parser.add_argument("--json", metavar="FICHIER", help="écrit le rapport complet en JSON ('-' pour stdout)")
+    args = parser.parse_args(argv)
+
+    report = run_tournament(args.agent, args.modes, args.difficulties, args.games, args.seed,
+                            args.workers, args.max_ticks, args.batch_size)
+    if args.json == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        print_report(report)
+        if args.json:
+            with open(args.json, "w") as file:
+                json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
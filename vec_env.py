@@ -0,0 +1,345 @@
+"""Environnement vectorisé : N parties de Snake avancées en même temps.
+
+VecSnake garde les N plateaux dans des tableaux NumPy et applique à
+chaque tour les règles de engine.Game sur toutes les parties d'un coup
+(déplacement, téléportation en mode easy, mort contre les murs, pommes,
+chrono et remise à zéro automatique des parties terminées). Il sert à
+l'entraînement des bots et au réglage des difficultés, où l'on a besoin
+de millions de tours.
+"""
+import numpy as np
+
+from engine import (
+    APPLE_POINTS, BASE_SPEED, CHRONO_SETTINGS, COLS, DIRECTIONS, GRID_SIZE, MAX_SPEED, ROWS,
+    SPECIAL_APPLE_CHANCE, SPECIAL_APPLE_LIFETIME, SPECIAL_APPLE_POINTS, SPEED_RAMP, TELEPORT_PENALTY,
+)
+
+# Codes renvoyés par step() pour chaque partie
+CONTINUE, GAME_OVER, VICTORY = 0, 1, 2
+
+# Directions codées comme des entiers (même ordre que engine.DIRECTIONS)
+UP, DOWN, LEFT, RIGHT = range(4)
+NO_ACTION = -1
+_OPPOSITE = np.array([DOWN, UP, RIGHT, LEFT], dtype=np.int8)
+_DX = np.array([0, 0, -1, 1], dtype=np.int64)
+_DY = np.array([-1, 1, 0, 0], dtype=np.int64)
+
+OBSTACLE = 0x80
+SNAKE_MASK = 0x7F
+
+# Position de départ du serpent (même que engine.Snake), tête en premier
+_START = [(100 // GRID_SIZE, 100 // GRID_SIZE), (80 // GRID_SIZE, 100 // GRID_SIZE),
+          (60 // GRID_SIZE, 100 // GRID_SIZE)]
+
+
+class VecSnake:
+    """ N parties indépendantes de même mode et difficulté, avancées ensemble. """
+
+    def __init__(self, num_envs, mode="classic", difficulty="easy", seed=None, cols=COLS, rows=ROWS):
+        self.num_envs = num_envs
+        self.mode = mode
+        self.difficulty = difficulty
+        self.easy_mode = (difficulty == "easy")
+        self.cols = cols
+        self.rows = rows
+        self.num_cells = cols * rows
+        self.rng = np.random.default_rng(seed)
+
+        if mode == "chrono":
+            self.time_limit, self.victory_score = CHRONO_SETTINGS[difficulty]
+        else:
+            self.time_limit, self.victory_score = None, None
+
+        n = num_envs
+        # Même codage que engine.Board : nombre de segments + bit obstacle
+        self.grid = np.zeros((n, self.num_cells), dtype=np.uint8)
+        # Corps en tampon circulaire : la tête est en body[i, head_ptr[i]]
+        # et le corps continue vers les indices croissants
+        self.capacity = self.num_cells + 8
+        self.body = np.zeros((n, self.capacity), dtype=np.int32)
+        self.head_ptr = np.zeros(n, dtype=np.int64)
+        self.length = np.zeros(n, dtype=np.int64)
+        self.direction = np.zeros(n, dtype=np.int8)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.elapsed = np.zeros(n, dtype=np.float64)
+        self.ticks = np.zeros(n, dtype=np.int64)
+        self.apple = np.full(n, -1, dtype=np.int64)
+        self.special_active = np.zeros(n, dtype=bool)
+        self.special = np.full(n, -1, dtype=np.int64)  # -1 : pomme spéciale sans case libre
+        self.special_start = np.zeros(n, dtype=np.float64)
+
+        # Murs des bords en mode medium et hard
+        self.walls = np.zeros(self.num_cells, dtype=np.uint8)
+        if difficulty in ("medium", "hard"):
+            walls = self.walls.reshape(rows, cols)
+            walls[0, :] = walls[-1, :] = walls[:, 0] = walls[:, -1] = OBSTACLE
+
+        # Statistiques des parties terminées depuis la création
+        self.episodes = 0
+        self.victories = 0
+        self.total_score = 0
+
+        self.reset()
+
+    def reset(self, mask=None):
+        """ Recommence les parties sélectionnées par mask (toutes par défaut). """
+        envs = np.arange(self.num_envs) if mask is None else np.flatnonzero(mask)
+        if len(envs) == 0:
+            return
+        cols = self.cols
+        self.grid[envs] = self.walls
+        start = np.array([y * cols + x for x, y in _START], dtype=np.int32)
+        self.body[envs, :len(start)] = start
+        self.head_ptr[envs] = 0
+        self.length[envs] = len(start)
+        self.grid[envs[:, None], start[None, :]] += 1
+        self.direction[envs] = RIGHT
+        self.score[envs] = 0
+        self.elapsed[envs] = 0.0
+        self.ticks[envs] = 0
+        self.special_active[envs] = False
+        self.special[envs] = -1
+
+        # Obstacles aléatoires du niveau "hard" (même tirage que generate_obstacles)
+        if self.difficulty == "hard":
+            for _ in range(10):
+                pending = envs
+                while len(pending):
+                    x = self.rng.integers(1, cols - 1, size=len(pending))
+                    y = self.rng.integers(2, self.rows - 1, size=len(pending))
+                    cells = y * cols + x
+                    ok = self.grid[pending, cells] == 0
+                    self.grid[pending[ok], cells[ok]] |= OBSTACLE
+                    pending = pending[~ok]
+
+        self.apple[envs] = self._sample_free(envs, np.full(len(envs), -1, dtype=np.int64))
+
+    def _sample_free(self, envs, fallback):
+        """ Une case libre au hasard pour chaque partie de envs (fallback si le plateau est plein). """
+        result = fallback.copy()
+        pending = np.arange(len(envs))
+        # Tirage par rejet vectorisé, efficace tant que le plateau n'est pas presque plein
+        for _ in range(16):
+            if not len(pending):
+                return result
+            cells = self.rng.integers(0, self.num_cells, size=len(pending))
+            ok = self.grid[envs[pending], cells] == 0
+            result[pending[ok]] = cells[ok]
+            pending = pending[~ok]
+        # Plateaux presque pleins : tirage exact parmi les cases libres
+        for k in pending:
+            free = np.flatnonzero(self.grid[envs[k]] == 0)
+            if len(free):
+                result[k] = free[self.rng.integers(len(free))]
+        return result
+
+    def _grow(self, envs):
+        tail = self.body[envs, (self.head_ptr[envs] + self.length[envs] - 1) % self.capacity]
+        self.body[envs, (self.head_ptr[envs] + self.length[envs]) % self.capacity] = tail
+        self.length[envs] += 1
+        self.grid[envs, tail] += 1
+
+    def step(self, actions=None):
+        """ Avance toutes les parties d'un tour.
+
+        actions est un tableau de N directions (UP, DOWN, LEFT, RIGHT) ou
+        NO_ACTION pour garder la direction courante. Renvoie (state, score,
+        events) : le code de fin de chaque partie, son score à ce tour et
+        un dict de tableaux booléens ("apple", "special_apple", "teleport").
+        Les parties terminées sont recommencées automatiquement après le tour.
+        """
+        n = self.num_envs
+        all_envs = np.arange(n)
+        state = np.zeros(n, dtype=np.int8)
+        events = {name: np.zeros(n, dtype=bool) for name in ("apple", "special_apple", "teleport")}
+
+        # Durée du tour à la vitesse du score courant (engine.tick_rate)
+        self.elapsed += 1 / np.minimum(BASE_SPEED + np.maximum(self.score, 0) / SPEED_RAMP, MAX_SPEED)
+        self.ticks += 1
+
+        # Vérifier si le temps est écoulé
+        alive = np.ones(n, dtype=bool)
+        if self.time_limit is not None:
+            time_up = self.time_limit - self.elapsed.astype(np.int64) <= 0
+            state[time_up] = np.where(self.score[time_up] >= self.victory_score, VICTORY, GAME_OVER)
+            alive &= ~time_up
+
+        # Changement de direction (un demi-tour est ignoré)
+        if actions is not None:
+            actions = np.asarray(actions, dtype=np.int8)
+            turn = (actions != NO_ACTION) & (actions != _OPPOSITE[self.direction])
+            self.direction[turn] = actions[turn]
+
+        head = self.body[all_envs, self.head_ptr]
+        x = head % self.cols + _DX[self.direction]
+        y = head // self.cols + _DY[self.direction]
+
+        if self.easy_mode:
+            # Téléportation de l'autre côté et réduction du score
+            teleported = (x < 0) | (x >= self.cols) | (y < 0) | (y >= self.rows)
+            x %= self.cols
+            y %= self.rows
+            teleported &= alive
+            events["teleport"] = teleported
+            self.score[teleported] = np.maximum(self.score[teleported] - TELEPORT_PENALTY, 0)
+            dead = teleported & (self.score <= 0)
+        else:  # Mode medium et hard -> Game over si on touche le bord
+            dead = alive & ((x < 0) | (x >= self.cols) | (y < 0) | (y >= self.rows))
+        state[dead] = GAME_OVER
+        alive &= ~dead
+
+        # Déplacement : nouvelle tête, la queue libère sa case
+        movers = np.flatnonzero(alive)
+        new_head = (y * self.cols + x)[movers]
+        tail_ptr = (self.head_ptr[movers] + self.length[movers] - 1) % self.capacity
+        self.grid[movers, self.body[movers, tail_ptr]] -= 1
+        self.head_ptr[movers] = (self.head_ptr[movers] - 1) % self.capacity
+        self.body[movers, self.head_ptr[movers]] = new_head
+        self.grid[movers, new_head] += 1
+
+        # La pomme spéciale disparaît après sa durée de vie
+        expired = alive & self.special_active & \
+            (SPECIAL_APPLE_LIFETIME - (self.elapsed - self.special_start) <= 0)
+        self.special_active[expired] = False
+
+        # Pomme normale
+        heads = np.full(n, -1, dtype=np.int64)
+        heads[movers] = new_head
+        ate = np.flatnonzero(alive & (heads == self.apple))
+        if len(ate):
+            events["apple"][ate] = True
+            self._grow(ate)
+            self.score[ate] += APPLE_POINTS
+            self.apple[ate] = self._sample_free(ate, self.apple[ate])
+            spawn = (self.score[ate] % 100 == 0)
+            lucky = ~self.special_active[ate]
+            # Le tirage aléatoire n'a lieu que si le score n'est pas un multiple de 100
+            draw = ~spawn & lucky
+            spawn[draw] = self.rng.random(int(draw.sum())) < SPECIAL_APPLE_CHANCE
+            spawned = ate[spawn]
+            if len(spawned):
+                self.special[spawned] = self._sample_free(spawned, np.full(len(spawned), -1, dtype=np.int64))
+                self.special_active[spawned] = True
+                self.special_start[spawned] = self.elapsed[spawned]
+
+        # Pomme spéciale
+        ate_special = np.flatnonzero(alive & self.special_active & (heads == self.special))
+        if len(ate_special):
+            events["special_apple"][ate_special] = True
+            self._grow(ate_special)
+            self._grow(ate_special)
+            self.score[ate_special] += SPECIAL_APPLE_POINTS
+            self.special_active[ate_special] = False
+
+        # Collision avec le corps ou un obstacle
+        cell = self.grid[movers, new_head]
+        collided = movers[((cell & OBSTACLE) != 0) | ((cell & SNAKE_MASK) > 1)]
+        state[collided] = GAME_OVER
+
+        score = self.score.copy()
+        done = state != CONTINUE
+        if done.any():
+            self.episodes += int(done.sum())
+            self.victories += int((state == VICTORY).sum())
+            self.total_score += int(score[done].sum())
+            self.reset(done)
+        return state, score, events
+
+    def board_view(self):
+        """ Les grilles d'occupation sous forme (N, rows, cols), sans copie. """
+        return self.grid.reshape(self.num_envs, self.rows, self.cols)
+
+    def heads(self):
+        """ Indice de la case de la tête de chaque serpent. """
+        return self.body[np.arange(self.num_envs), self.head_ptr]
+
+    def action_codes(self, names):
+        """ Convertit des noms de direction ("UP", ...) ou None en codes d'action. """
+        return np.array([NO_ACTION if name is None else DIRECTIONS.index(name) for name in names],
+                        dtype=np.int8)
+
+
+def check_against_engine(mode, difficulty, seed=0, games=5, noise=0.1, max_ticks=3000):
+    """ Joue les mêmes parties avec engine.Game et une VecSnake à une partie, et compare tour par tour.
+
+    Les deux n'ont pas le même générateur aléatoire : la VecSnake part du
+    plateau de Game (obstacles compris) et, après chaque tour, reprend ses
+    pommes. Seul le tirage de la pomme spéciale après une pomme (hors
+    multiples de 100 points) peut donc différer. Les directions viennent
+    du pilote automatique, qui tient assez longtemps pour finir au chrono
+    et laisser expirer des pommes spéciales ; une partie sur deux reçoit en
+    plus une proportion noise de virages au hasard, pour passer par les
+    bords. Renvoie la liste des écarts (vide si les règles sont les mêmes).
+    """
+    import random
+
+    from autopilot import Autopilot
+    from engine import Game
+
+    mismatches = []
+    rng = random.Random(seed)
+    for number in range(games):
+        game = Game(mode, difficulty, seed=seed * 1000 + number)
+        env = VecSnake(1, mode, difficulty, seed=0, cols=game.board.cols, rows=game.board.rows)
+        env.grid[0] = np.frombuffer(game.board.cells, dtype=np.uint8)
+        _sync_apples(env, game)
+        agent = Autopilot(seed * 1000 + number)
+        while game.state == "continue" and game.ticks < max_ticks:
+            action = rng.choice(DIRECTIONS) if number % 2 == 0 and rng.random() < noise else agent.act(game)
+            game.step(action)
+            state, score, events = env.step(env.action_codes([action]))
+            expected = (("continue", "game_over", "victory").index(game.state), game.score,
+                        [name in game.events for name in ("apple", "special_apple", "teleport")])
+            actual = (int(state[0]), int(score[0]), [bool(events[name][0]) for name in ("apple", "special_apple",
+                                                                                        "teleport")])
+            if expected != actual:
+                mismatches.append((number, game.ticks, "state/score/events", expected, actual))
+                break
+            if game.state != "continue":
+                break  # La VecSnake a déjà recommencé la partie
+            if env.length[0] != len(game.snake) or bytes(env.grid[0]) != bytes(game.board.cells):
+                mismatches.append((number, game.ticks, "grid", len(game.snake), int(env.length[0])))
+                break
+            random_draw = "apple" in game.events and game.score % 100 != 0
+            if bool(env.special_active[0]) != (game.special_apple is not None) and not random_draw:
+                mismatches.append((number, game.ticks, "special_apple", game.special_apple is not None,
+                                   bool(env.special_active[0])))
+                break
+            _sync_apples(env, game)
+    return mismatches
+
+
+def _sync_apples(env, game):
+    """ Place les pommes de game dans la première partie de env. """
+    board = game.board
+    env.apple[0] = board.index(game.apple.position) if game.apple.position is not None else -1
+    special = game.special_apple
+    env.special_active[0] = special is not None
+    if special is not None:
+        env.special[0] = board.index(special.position) if special.position is not None else -1
+        env.special_start[0] = special.start_time
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Vérifie que VecSnake applique les règles de engine.Game")
+    parser.add_argument("--games", type=int, default=10, help="parties par mode et par difficulté")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    failed = False
+    for mode in ("classic", "chrono"):
+        for difficulty in ("easy", "medium", "hard"):
+            mismatches = check_against_engine(mode, difficulty, args.seed, args.games)
+            print(f"{mode:8} {difficulty:7} {'ok' if not mismatches else f'{len(mismatches)} écarts'}")
+            for mismatch in mismatches[:5]:
+                print(f"  partie {mismatch[0]}, tour {mismatch[1]} : {mismatch[2]} attendu {mismatch[3]}, "
+                      f"obtenu {mismatch[4]}")
+            failed |= bool(mismatches)
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()